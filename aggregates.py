@@ -0,0 +1,205 @@
+"""
+Dashboard aggregates, computed once per version of the dataset
+
+Every tab reads category counts, per-channel totals, the most viewed
+videos and the engagement cut-off. DatasetAggregates holds them for one
+frame, and AggregateCache keys them on the frame's content hash, so a
+rerun or another session showing the same data reuses them. When a frame
+is an earlier version with rows appended, only the new rows are folded in.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from frames import content_hash
+
+# Rows kept per ranking; the gallery shows at most this many and the scatter plots 20
+RANKED_ROWS = 20
+
+# Gallery sort options, each kept in both directions
+RANKED_COLUMNS = ['views', 'likes', 'engagement_rate', 'published_at']
+
+# Videos above this engagement quantile count as high engagement
+HIGH_ENGAGEMENT_QUANTILE = 0.8
+
+# Dataset versions held at once, across every session
+DEFAULT_MAX_VERSIONS = 8
+
+CHANNEL_COLUMNS = ['views', 'likes', 'comments']
+
+class DatasetAggregates:
+    """Counts, sums and rankings of one frame, extendable with appended rows"""
+    
+    def __init__(self, df, fingerprint=None):
+        self.fingerprint = fingerprint or content_hash(df)
+        self.rows = 0
+        self.views_sum = 0.0
+        self.engagement_sum = 0.0
+        self.category_counts = pd.Series(dtype='int64')
+        self.category_engagement = pd.Series(dtype='float64')
+        self.channel_totals = pd.DataFrame(columns=CHANNEL_COLUMNS + ['video_count'], dtype='int64')
+        self.ranked = {}
+        self._engagement = np.empty(0, dtype='float32')
+        self._fold(df)
+    
+    def extended(self, df, fingerprint=None):
+        """Copy with df.iloc[self.rows:] folded in; df must start with the rows already counted"""
+        aggregates = DatasetAggregates.__new__(DatasetAggregates)
+        aggregates.__dict__.update(self.__dict__)
+        aggregates.ranked = dict(self.ranked)
+        aggregates.fingerprint = fingerprint or content_hash(df)
+        aggregates._fold(df.iloc[self.rows:])
+        return aggregates
+    
+    def _fold(self, df):
+        """Add the rows of df to every aggregate and refresh the derived views"""
+        if len(df):
+            start = self.rows
+            self.rows += len(df)
+            self.views_sum += float(df['views'].sum())
+            self.engagement_sum += float(df['engagement_rate'].sum())
+            
+            categories = df.groupby('category_name', observed=True)['engagement_rate'].agg(['size', 'sum'])
+            categories.index = categories.index.astype(str)
+            self.category_counts = self.category_counts.add(categories['size'], fill_value=0).astype('int64')
+            self.category_engagement = self.category_engagement.add(categories['sum'], fill_value=0)
+            
+            by_channel = df.groupby('channel_title', observed=True)
+            channels = by_channel[CHANNEL_COLUMNS].sum()
+            channels['video_count'] = by_channel.size()
+            channels.index = channels.index.astype(str)
+            self.channel_totals = self.channel_totals.add(channels, fill_value=0).astype('int64')
+            
+            for column in RANKED_COLUMNS:
+                for ascending in (False, True):
+                    self.ranked[column, ascending] = self._rank(df[column], start, ascending)
+            
+            self._engagement = np.concatenate([self._engagement, df['engagement_rate'].to_numpy(dtype='float32')])
+        
+        cut_off = np.quantile(self._engagement, HIGH_ENGAGEMENT_QUANTILE) if self.rows else 0.0
+        self.high_engagement_count = int(np.count_nonzero(self._engagement > cut_off))
+    
+    def _rank(self, values, start, ascending):
+        """(row positions, sort keys) of the top RANKED_ROWS rows seen so far
+        
+        Positions stay valid for frames this one is a prefix of. Ties go to
+        the earlier row, as nlargest and nsmallest do.
+        """
+        if pd.api.types.is_datetime64_any_dtype(values):
+            values = values.astype('int64')
+        keys = values.to_numpy(dtype='float64')
+        keys = keys if ascending else -keys
+        positions = np.arange(start, start + len(keys))
+        previous = self.ranked.get((values.name, ascending))
+        if previous is not None:
+            positions = np.concatenate([previous[0], positions])
+            keys = np.concatenate([previous[1], keys])
+        if len(keys) > RANKED_ROWS:
+            kth = np.partition(keys, RANKED_ROWS - 1)[RANKED_ROWS - 1]
+            keep = keys <= kth
+            positions, keys = positions[keep], keys[keep]
+        order = np.lexsort((positions, keys))[:RANKED_ROWS]
+        return positions[order], keys[order]
+    
+    @property
+    def avg_views(self):
+        return self.views_sum / self.rows if self.rows else 0.0
+    
+    @property
+    def avg_engagement(self):
+        return self.engagement_sum / self.rows if self.rows else 0.0
+    
+    def top_categories(self, limit=10):
+        """Video count per category, largest first"""
+        return self.category_counts.sort_values(ascending=False, kind='stable').head(limit)
+    
+    @property
+    def top_category(self):
+        """Most common category; ties go to the first name alphabetically, as Series.mode does"""
+        if not self.rows:
+            return 'N/A'
+        counts = self.category_counts.sort_index()
+        return counts.idxmax()
+    
+    def engagement_by_category(self, limit=8):
+        """Average engagement rate per category, highest first"""
+        averages = self.category_engagement / self.category_counts
+        return averages.sort_values(ascending=False).head(limit)
+    
+    def top_channels(self, limit=15):
+        """Per-channel totals with average views per video, by total views"""
+        channels = self.channel_totals.sort_values('views', ascending=False).head(limit).copy()
+        channels.index.name = 'channel_title'
+        channels['avg_views_per_video'] = channels['views'] / channels['video_count']
+        return channels
+    
+    def top_videos(self, df, column='views', limit=RANKED_ROWS, ascending=False):
+        """Rows of df with the highest (or lowest) values of a RANKED_COLUMNS column"""
+        return df.iloc[self.ranked[column, ascending][0][:limit]]
+    
+    def gallery_rows(self, df):
+        """Every row of df that some gallery sort can show, in row order"""
+        positions = np.unique(np.concatenate([positions for positions, _ in self.ranked.values()])) if self.ranked else []
+        return df.iloc[positions]
+
+class AggregateCache:
+    """Recent DatasetAggregates keyed by content hash, shared across reruns and sessions"""
+    
+    def __init__(self, max_versions=DEFAULT_MAX_VERSIONS):
+        self.max_versions = max_versions
+        self._versions = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.extends = 0
+        self.builds = 0
+    
+    def get(self, df):
+        """Aggregates for df: cached, extended from an earlier version, or built from scratch"""
+        fingerprint = content_hash(df)
+        with self._lock:
+            aggregates = self._versions.get(fingerprint)
+            if aggregates is not None:
+                self._versions.move_to_end(fingerprint)
+                self.hits += 1
+                return aggregates
+            candidates = sorted(
+                (version for version in self._versions.values() if 0 < version.rows < len(df)),
+                key=lambda version: version.rows, reverse=True
+            )
+        
+        aggregates = None
+        prefixes = {}
+        for version in candidates:
+            if version.rows not in prefixes:
+                prefixes[version.rows] = content_hash(df, rows=version.rows)
+            if prefixes[version.rows] == version.fingerprint:
+                aggregates = version.extended(df, fingerprint)
+                break
+        
+        with self._lock:
+            if aggregates is not None:
+                self.extends += 1
+            else:
+                aggregates = DatasetAggregates(df, fingerprint)
+                self.builds += 1
+            self._versions[fingerprint] = aggregates
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+        return aggregates
+    
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+    
+    def stats(self):
+        """Versions held and how each lookup was answered"""
+        with self._lock:
+            return {
+                'versions': len(self._versions),
+                'hits': self.hits,
+                'extends': self.extends,
+                'builds': self.builds,
+            }
@@ -3,13 +3,38 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import requests
 import json
 from datetime import datetime, timedelta
 import numpy as np
 from pathlib import Path
 import time
 
+from categories import CategoryRegistry
+from frames import compact_frame, memory_footprint, video_url
+from quota import (
+    DEFAULT_DAILY_BUDGET, DEFAULT_MINUTE_BUDGET, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE,
+    QuotaScheduler
+)
+from youtube_client import DEFAULT_POOL_SIZE, ResponseCache, create_http_session
+from snapshots import DEFAULT_SNAPSHOT_DIR, SOURCE_SEARCH, SOURCE_TRENDING, SnapshotStore
+from video_details import VideoDetailCache
+from aggregates import AggregateCache
+from figures import FigureCache, scatter
+from exports import EXPORT_FORMATS, export_file, export_name
+from metrics import (
+    API_CACHE, API_COALESCED, API_ERRORS, API_QUOTA_UNITS, API_REQUESTS, API_RESPONSE_BYTES, API_RETRIES,
+    API_STALE, DEFAULT_METRICS_PORT, REGISTRY, start_metrics_server
+)
+from resilience import CircuitBreakers
+from singleflight import SingleFlight
+from thumbnails import THUMBNAIL_WIDTH, ThumbnailCache
+from trends_service import TrendsServiceClient
+from velocity import BOOTSTRAP_HOURS, VELOCITY_COLUMNS, VelocityTracker
+from youtube_fetcher import (
+    FORMAT_LIVE, MAX_REGION_WORKERS, SHORTS_MAX_SECONDS, YouTubeAPIError, YouTubeFetcher,
+    classify_formats, default_base_url, parse_durations
+)
+
 # Set page config
 st.set_page_config(
     page_title="Live YouTube Analytics Dashboard",
@@ -90,256 +115,241 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def calculate_hours_since_published(published_at_series):
-    """Calculate hours since published, handling timezone issues"""
+# Pseudo region code used by the region selector for the combined view
+ALL_REGIONS = 'ALL'
+
+# How long a finished deep crawl is reused before crawling again (seconds)
+CRAWL_TTL = 300
+
+# Default window of the snapshot history chart (days)
+HISTORY_DAYS = 7
+
+# Interval of the dashboard's auto-refresh timer (seconds)
+AUTO_REFRESH_SECONDS = 30
+
+# How much earlier than its interval a timer rerun may start, after a slow previous one (seconds)
+TIMER_SLACK_SECONDS = 1
+
+# Shared fetchers kept for distinct API keys entered in this process
+MAX_SHARED_FETCHERS = 8
+
+DASHBOARD_TABS = ["Categories", "Top Videos", "Engagement", "Channels", "Video Gallery"]
+
+def get_secret(name, default=None, cast=str):
+    """Read an optional setting from Streamlit secrets, falling back to a default"""
     try:
-        # Convert to UTC timezone-aware datetime
-        published_utc = pd.to_datetime(published_at_series, utc=True)
-        
-        # Get current time in UTC
-        now_utc = pd.Timestamp.now(tz='UTC')
-        
-        # Calculate difference in hours
-        time_diff = (now_utc - published_utc).dt.total_seconds() / 3600
-        return time_diff.fillna(0)  # Fill any NaN values with 0
-    except Exception as e:
-        # Fallback: return 0 hours if calculation fails
-        return pd.Series([0] * len(published_at_series), index=published_at_series.index)
-
-class LiveYouTubeAnalytics:
-    def __init__(self):
-        self.api_key = None
-        self.base_url = "https://www.googleapis.com/youtube/v3"
-        self.regions = {
-            'US': 'United States', 'CA': 'Canada', 'GB': 'United Kingdom',
-            'DE': 'Germany', 'FR': 'France', 'IN': 'India', 'JP': 'Japan',
-            'KR': 'South Korea', 'MX': 'Mexico', 'RU': 'Russia', 'BR': 'Brazil',
-            'AU': 'Australia', 'IT': 'Italy', 'ES': 'Spain', 'NL': 'Netherlands'
-        }
-        self.categories = {}
-        
-    def set_api_key(self, api_key):
-        """Set the YouTube Data API key"""
-        self.api_key = api_key
+        if hasattr(st, 'secrets') and name in st.secrets:
+            return cast(st.secrets[name])
+    except (FileNotFoundError, KeyError, ValueError):
+        # No secrets file, key not found or unparsable value - use the default
+        pass
+    return default
+
+@st.cache_resource
+def get_http_session(pool_size=DEFAULT_POOL_SIZE):
+    """One pooled HTTP session per process, shared by every rerun and user session"""
+    return create_http_session(pool_size)
+
+@st.cache_resource
+def get_response_cache():
+    """Persistent on-disk response cache, opened once per process"""
+    return ResponseCache()
+
+@st.cache_resource
+def get_category_registry():
+    """Categories of every region, loaded once and shared by all sessions"""
+    return CategoryRegistry()
+
+@st.cache_resource
+def get_held_frames():
+    """Charts and searches fetched so far, so refreshes only re-download their counts"""
+    return {}
+
+@st.cache_resource
+def get_video_details():
+    """Per-video details shared by every search and chart in the process"""
+    return VideoDetailCache()
+
+@st.cache_resource
+def get_aggregate_cache():
+    """Dashboard aggregates per dataset version, shared by every session"""
+    return AggregateCache()
+
+@st.cache_resource
+def get_figure_cache():
+    """Serialized chart specs per dataset version, shared by every session"""
+    return FigureCache()
+
+@st.cache_resource
+def get_thumbnail_cache():
+    """Resized gallery thumbnails on disk, downloaded once per process and shared by every session"""
+    return ThumbnailCache(get_http_session())
+
+@st.cache_resource
+def get_snapshot_store(root=DEFAULT_SNAPSHOT_DIR):
+    """Parquet history that live fetches and the collector append to"""
+    return SnapshotStore(root)
+
+@st.cache_resource
+def get_velocity_tracker(root):
+    """Per-video growth rates, kept up to date across reruns and sessions
+    
+    root is only the cache key: each snapshot directory gets its own
+    tracker, so rates from one store are never folded into another's.
+    """
+    return VelocityTracker()
+
+@st.cache_resource
+def get_metrics_server(port=DEFAULT_METRICS_PORT):
+    """Serve the process's metrics for Prometheus once per process; (server, error message)"""
+    try:
+        return start_metrics_server(REGISTRY, port), None
+    except OSError as e:
+        # Another dashboard process on this host already holds the port
+        return None, str(e)
+
+@st.cache_resource
+def get_circuit_breakers():
+    """Per-endpoint circuit breakers shared by every session, so one session's failures spare the others"""
+    return CircuitBreakers()
+
+@st.cache_resource
+def get_request_flights():
+    """Identical API requests in flight at once, shared by every session's fetcher"""
+    return SingleFlight()
+
+@st.cache_resource
+def get_quota_scheduler(daily_budget=DEFAULT_DAILY_BUDGET, minute_budget=DEFAULT_MINUTE_BUDGET):
+    """Process-wide quota scheduler that every API request is charged through"""
+    return QuotaScheduler(daily_budget=daily_budget, minute_budget=minute_budget)
+
+class LiveYouTubeAnalytics(YouTubeFetcher):
+    """Dashboard fetcher: Streamlit-cached results with errors reported in the page
+    
+    Given a TrendsServiceClient, charts, searches and categories come from
+    that service instead of the YouTube API, and no API key is needed.
+    """
+    
+    def __init__(self, session=None, cache=None, scheduler=None, store=None, base_url=None, service=None):
+        super().__init__(
+            session if session is not None else get_http_session(), cache, scheduler, base_url,
+            categories=get_category_registry(), held_frames=get_held_frames(), details=get_video_details(),
+            breakers=get_circuit_breakers(), flights=get_request_flights()
+        )
+        self.store = store
+        self.service = service
+        # Where charts and searches come from: the trends service, or this fetcher
+        self.source = service if service is not None else self
+    
+    @property
+    def can_fetch(self):
+        return self.service is not None or bool(self.api_key)
+    
+    def load_categories(self, regions=None):
+        if self.service is None:
+            return super().load_categories(regions)
+        regions = list(regions if regions is not None else self.regions)
+        return self.categories.load(self.service.fetch_video_categories, regions)
+    
+    def record_snapshot(self, df, source=SOURCE_TRENDING, category_id=None, query=None):
+        """Append a fresh fetch to the snapshot history; the page works without it
         
-    def test_api_connection(self):
-        """Test if the API key is valid"""
-        if not self.api_key:
-            return False, "No API key provided"
-            
-        try:
-            url = f"{self.base_url}/videos"
-            params = {
-                'part': 'snippet',
-                'chart': 'mostPopular',
-                'maxResults': 1,
-                'key': self.api_key
-            }
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                return True, "API connection successful"
-            elif response.status_code == 403:
-                error_data = response.json()
-                error_message = error_data.get('error', {}).get('message', 'API key invalid or quota exceeded')
-                return False, f"API Error: {error_message}"
-            else:
-                return False, f"HTTP Error: {response.status_code}"
-                
-        except requests.exceptions.RequestException as e:
-            return False, f"Connection Error: {str(e)}"
-    
-    @st.cache_data(ttl=3600)  # Cache for 1 hour
-    def get_video_categories(_self, region_code='US'):
-        """Fetch video categories for a region"""
-        if not _self.api_key:
-            return {}
-            
+        Frames served from stale cached responses are not recorded, so the
+        history only holds counts as they were at the snapshot time.
+        """
+        if self.store is None or df.empty or 'stale_since' in df.attrs:
+            return
         try:
-            url = f"{_self.base_url}/videoCategories"
-            params = {
-                'part': 'snippet',
-                'regionCode': region_code,
-                'key': _self.api_key
-            }
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                categories = {}
-                for item in data.get('items', []):
-                    if item['snippet']['assignable']:
-                        categories[item['id']] = item['snippet']['title']
-                return categories
-            else:
-                st.warning(f"Could not fetch categories for {region_code}")
-                return {}
-                
-        except Exception as e:
-            st.error(f"Error fetching categories: {str(e)}")
-            return {}
+            self.store.append(df, source, category_id, query)
+        except (OSError, ValueError) as e:
+            st.warning(f"Could not save snapshot: {str(e)}")
     
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def get_trending_videos(_self, region_code='US', category_id=None, max_results=50):
+    @property
+    def cache_scope(self):
+        """What the cached results depend on besides their arguments: the key and where data comes from"""
+        if self.service is not None:
+            return ('service', self.service.base_url)
+        return ('api', self.base_url, self.api_key)
+    
+    def get_trending_videos(self, region_code='US', category_id=None, max_results=50):
         """Fetch trending videos for a specific region"""
-        if not _self.api_key:
+        return self._trending_videos(self.cache_scope, region_code, category_id, max_results)
+    
+    def get_all_regions_trending(self, category_id=None, max_results=50, max_workers=MAX_REGION_WORKERS):
+        """Fetch trending videos for every region concurrently and merge them"""
+        return self._all_regions_trending(self.cache_scope, category_id, max_results, max_workers)
+    
+    def search_videos(self, query, region_code='US', max_results=25):
+        """Search for videos by query"""
+        return self._search_videos(self.cache_scope, query, region_code, max_results)
+    
+    # The instance is not hashed (_self), so scope keeps one key's or mode's results from another's
+    @st.cache_data(ttl=300)  # Cache for 5 minutes
+    def _trending_videos(_self, scope, region_code, category_id, max_results):
+        if not _self.can_fetch:
             return pd.DataFrame()
-            
+        
         try:
-            url = f"{_self.base_url}/videos"
-            params = {
-                'part': 'snippet,statistics,contentDetails',
-                'chart': 'mostPopular',
-                'regionCode': region_code,
-                'maxResults': min(max_results, 50),  # API limit
-                'key': _self.api_key
-            }
-            
-            if category_id:
-                params['videoCategoryId'] = category_id
-                
-            response = requests.get(url, params=params, timeout=15)
-            
-            if response.status_code == 200:
-                data = response.json()
-                videos = []
-                
-                for item in data.get('items', []):
-                    video_data = {
-                        'video_id': item['id'],
-                        'title': item['snippet']['title'],
-                        'channel_title': item['snippet']['channelTitle'],
-                        'category_id': item['snippet']['categoryId'],
-                        'published_at': item['snippet']['publishedAt'],
-                        'views': int(item['statistics'].get('viewCount', 0)),
-                        'likes': int(item['statistics'].get('likeCount', 0)),
-                        'comments': int(item['statistics'].get('commentCount', 0)),
-                        'duration': item['contentDetails']['duration'],
-                        'region': region_code,
-                        'region_name': _self.regions.get(region_code, region_code),
-                        'thumbnail': item['snippet']['thumbnails']['medium']['url'],
-                        'description': item['snippet']['description'][:200] + '...' if len(item['snippet']['description']) > 200 else item['snippet']['description'],
-                        'video_url': f"https://www.youtube.com/watch?v={item['id']}"
-                    }
-                    videos.append(video_data)
-                
-                df = pd.DataFrame(videos)
-                if not df.empty:
-                    # Handle datetime conversion properly
-                    df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
-                    df['fetch_time'] = datetime.now()
-                    
-                    # Add category names
-                    categories = _self.get_video_categories(region_code)
-                    df['category_name'] = df['category_id'].map(categories).fillna('Unknown')
-                    
-                    # Calculate engagement metrics
-                    df['engagement_rate'] = (df['likes'] / df['views'] * 100).fillna(0)
-                    df['comment_rate'] = (df['comments'] / df['views'] * 100).fillna(0)
-                    
-                    # Calculate time since published (fixed timezone handling)
-                    df['hours_since_published'] = calculate_hours_since_published(df['published_at'])
-                
-                return df
-                
-            else:
-                st.error(f"API Error {response.status_code}: Could not fetch trending videos for {region_code}")
-                return pd.DataFrame()
-                
+            df = _self.source.fetch_trending_videos(region_code, category_id, max_results)
+            _self.record_snapshot(df, SOURCE_TRENDING, category_id)
+            return df
+        except YouTubeAPIError as e:
+            st.error(str(e))
+            return pd.DataFrame()
         except Exception as e:
             st.error(f"Error fetching trending videos: {str(e)}")
             return pd.DataFrame()
     
+    @st.cache_data(ttl=300)  # Cache for 5 minutes
+    def _all_regions_trending(_self, scope, category_id, max_results, max_workers):
+        if not _self.can_fetch:
+            return pd.DataFrame(), {}, {}
+        try:
+            df, errors, timings = _self.source.fetch_all_regions(category_id, max_results, max_workers)
+        except YouTubeAPIError as e:
+            # Only the trends service fails as a whole; the fetcher reports regions one by one
+            st.error(str(e))
+            return pd.DataFrame(), {}, {}
+        _self.record_snapshot(df, SOURCE_TRENDING, category_id)
+        return df, errors, timings
+    
     @st.cache_data(ttl=600)  # Cache for 10 minutes
-    def search_videos(_self, query, region_code='US', max_results=25):
-        """Search for videos by query"""
-        if not _self.api_key:
+    def _search_videos(_self, scope, query, region_code, max_results):
+        if not _self.can_fetch:
             return pd.DataFrame()
-            
+        
         try:
-            # First, search for video IDs
-            search_url = f"{_self.base_url}/search"
-            search_params = {
-                'part': 'snippet',
-                'q': query,
-                'type': 'video',
-                'regionCode': region_code,
-                'maxResults': max_results,
-                'order': 'relevance',
-                'key': _self.api_key
-            }
-            
-            search_response = requests.get(search_url, params=search_params, timeout=15)
-            
-            if search_response.status_code != 200:
-                st.error(f"Search API Error: {search_response.status_code}")
-                return pd.DataFrame()
-            
-            search_data = search_response.json()
-            video_ids = [item['id']['videoId'] for item in search_data.get('items', [])]
-            
-            if not video_ids:
-                return pd.DataFrame()
-            
-            # Then get detailed video information
-            videos_url = f"{_self.base_url}/videos"
-            videos_params = {
-                'part': 'snippet,statistics,contentDetails',
-                'id': ','.join(video_ids),
-                'key': _self.api_key
-            }
-            
-            videos_response = requests.get(videos_url, params=videos_params, timeout=15)
-            
-            if videos_response.status_code == 200:
-                videos_data = videos_response.json()
-                videos = []
-                
-                for item in videos_data.get('items', []):
-                    video_data = {
-                        'video_id': item['id'],
-                        'title': item['snippet']['title'],
-                        'channel_title': item['snippet']['channelTitle'],
-                        'category_id': item['snippet']['categoryId'],
-                        'published_at': item['snippet']['publishedAt'],
-                        'views': int(item['statistics'].get('viewCount', 0)),
-                        'likes': int(item['statistics'].get('likeCount', 0)),
-                        'comments': int(item['statistics'].get('commentCount', 0)),
-                        'duration': item['contentDetails']['duration'],
-                        'region': region_code,
-                        'region_name': _self.regions.get(region_code, region_code),
-                        'thumbnail': item['snippet']['thumbnails']['medium']['url'],
-                        'description': item['snippet']['description'][:200] + '...' if len(item['snippet']['description']) > 200 else item['snippet']['description'],
-                        'video_url': f"https://www.youtube.com/watch?v={item['id']}"
-                    }
-                    videos.append(video_data)
-                
-                df = pd.DataFrame(videos)
-                if not df.empty:
-                    # Handle datetime conversion properly
-                    df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
-                    df['fetch_time'] = datetime.now()
-                    
-                    # Add category names
-                    categories = _self.get_video_categories(region_code)
-                    df['category_name'] = df['category_id'].map(categories).fillna('Unknown')
-                    
-                    # Calculate engagement metrics
-                    df['engagement_rate'] = (df['likes'] / df['views'] * 100).fillna(0)
-                    df['comment_rate'] = (df['comments'] / df['views'] * 100).fillna(0)
-                    
-                    # Calculate time since published (fixed timezone handling)
-                    df['hours_since_published'] = calculate_hours_since_published(df['published_at'])
-                
-                return df
-            else:
-                st.error(f"Videos API Error: {videos_response.status_code}")
-                return pd.DataFrame()
-                
+            df = _self.source.fetch_search_videos(query, region_code, max_results)
+            _self.record_snapshot(df, SOURCE_SEARCH, query=query)
+            return df
+        except YouTubeAPIError as e:
+            st.error(str(e))
+            return pd.DataFrame()
         except Exception as e:
             st.error(f"Error searching videos: {str(e)}")
             return pd.DataFrame()
 
+@st.cache_resource(max_entries=MAX_SHARED_FETCHERS)
+def get_analytics(api_key=None, base_url=None, pool_size=DEFAULT_POOL_SIZE, daily_budget=DEFAULT_DAILY_BUDGET,
+                  minute_budget=DEFAULT_MINUTE_BUDGET, snapshot_dir=str(DEFAULT_SNAPSHOT_DIR), service_url=None):
+    """The process-wide fetcher for one API key, shared by every session that uses the key
+    
+    Sessions set their request priority per thread (set_thread_priority),
+    since the instance is shared; everything else on it is the same for
+    every session. With service_url, data comes from that trends service.
+    """
+    session = get_http_session(pool_size)
+    analytics = LiveYouTubeAnalytics(
+        session,
+        get_response_cache(),
+        get_quota_scheduler(daily_budget, minute_budget),
+        get_snapshot_store(snapshot_dir),
+        base_url,
+        TrendsServiceClient(service_url, session) if service_url else None
+    )
+    analytics.set_api_key(api_key)
+    return analytics
+
 def format_number(num):
     """Format large numbers with K, M, B suffixes"""
     if num >= 1_000_000_000:
@@ -356,10 +366,10 @@ def display_video_card(video_data):
     col1, col2 = st.columns([1, 3])
     
     with col1:
-        st.image(video_data['thumbnail'], width=120)
+        st.image(get_thumbnail_cache().image(video_data['thumbnail']), width=THUMBNAIL_WIDTH)
     
     with col2:
-        st.markdown(f"**[{video_data['title'][:60]}...]({video_data['video_url']})**")
+        st.markdown(f"**[{video_data['title'][:60]}...]({video_url(video_data['video_id'])})**")
         st.markdown(f"**{video_data['channel_title']}**")
         
         col_a, col_b, col_c = st.columns(3)
@@ -372,12 +382,225 @@ def display_video_card(video_data):
         
         st.markdown(f"**Category**: {video_data['category_name']} | **Published**: {video_data['hours_since_published']:.1f}h ago")
 
-def main():
-    st.markdown('<h1 class="main-header">📺 <span class="live-indicator">🔴 LIVE</span> YouTube Analytics Dashboard</h1>', unsafe_allow_html=True)
+def render_quota_panel(scheduler):
+    """Show today's quota usage, units remaining and projected burn in the sidebar"""
+    usage = scheduler.usage()
+    
+    st.sidebar.header("API Quota")
+    st.sidebar.progress(
+        min(usage['used'] / usage['daily_budget'], 1.0) if usage['daily_budget'] else 1.0,
+        text=f"{usage['used']:,} / {usage['daily_budget']:,} units used today"
+    )
+    
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        st.metric("Units Remaining", f"{usage['remaining']:,}")
+    with col2:
+        st.metric("Burn Rate", f"{usage['burn_rate_per_hour']:,}/h")
+    
+    if usage['projected_total'] > usage['daily_budget']:
+        st.sidebar.warning(f"At the current burn rate the budget runs out before the reset in {usage['hours_to_reset']:.1f}h")
+    else:
+        st.sidebar.caption(f"Projected {usage['projected_total']:,.0f} units by the reset in {usage['hours_to_reset']:.1f}h")
+
+def render_detail_cache_panel(details):
+    """Show how many video lookups the shared detail cache answered"""
+    stats = details.stats()
+    st.sidebar.header("Video Detail Cache")
+    col1, col2 = st.sidebar.columns(2)
+    with col1:
+        st.metric("Hit Ratio", f"{stats['hit_ratio']:.0%}")
+    with col2:
+        st.metric("Videos Cached", f"{stats['entries']:,}")
+    st.sidebar.caption(
+        f"{stats['hits']:,} lookups served from the cache, {stats['misses']:,} fetched in full; "
+        "cached videos only have their counts refreshed"
+    )
+
+def render_performance_panel(registry, metrics_url, metrics_error, breakers):
+    """Request counters, open circuit breakers and the slowest stages of this process, in a collapsed sidebar panel"""
+    with st.sidebar.expander("Performance"):
+        requests_sent = registry.total(API_REQUESTS)
+        cache_hits = registry.total(API_CACHE, result='hit') + registry.total(API_CACHE, result='revalidated')
+        lookups = registry.total(API_CACHE)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("API Requests", f"{requests_sent:,}")
+            st.metric("Quota Units", f"{registry.total(API_QUOTA_UNITS):,}")
+            st.metric("Errors", f"{registry.total(API_ERRORS):,}")
+            st.metric("Retries", f"{registry.total(API_RETRIES):,}")
+        with col2:
+            st.metric("Payload", f"{registry.total(API_RESPONSE_BYTES) / 1e6:,.1f} MB")
+            st.metric("Cache Hit Ratio", f"{cache_hits / lookups:.0%}" if lookups else "n/a")
+            st.metric("Stale Responses", f"{registry.total(API_STALE):,}")
+            st.metric("Coalesced", f"{registry.total(API_COALESCED):,}")
+        
+        for endpoint, retry_in in breakers.open_endpoints().items():
+            st.warning(f"Circuit open for {endpoint}: requests paused, next attempt in {retry_in:.0f}s")
+        
+        stages = registry.stages()
+        if stages:
+            table = pd.DataFrame(stages)[['stage', 'calls', 'mean_s', 'max_s', 'total_s']]
+            table[['mean_s', 'max_s']] *= 1000
+            st.dataframe(
+                table.rename(columns={'stage': 'Stage', 'calls': 'Calls', 'mean_s': 'Mean ms', 'max_s': 'Max ms', 'total_s': 'Total s'}),
+                hide_index=True,
+                column_config={
+                    'Mean ms': st.column_config.NumberColumn(format="%.1f"),
+                    'Max ms': st.column_config.NumberColumn(format="%.1f"),
+                    'Total s': st.column_config.NumberColumn(format="%.2f"),
+                }
+            )
+        if metrics_url:
+            st.caption(f"Since the process started; Prometheus metrics at {metrics_url}")
+        elif metrics_error:
+            st.caption(f"Since the process started; metrics endpoint unavailable: {metrics_error}")
+        else:
+            st.caption("Since the process started; metrics endpoint disabled (METRICS_PORT = 0)")
+
+def run_deep_crawl(analytics, region_code, category_ids, max_rows, max_units):
+    """Stream a deep trending crawl into the page, reusing a recent crawl with the same settings"""
+    crawl_key = (region_code, tuple(category_ids or ()), max_rows, max_units)
+    cached = st.session_state.get('deep_crawl')
+    if cached and cached['key'] == crawl_key and time.time() - cached['time'] < CRAWL_TTL:
+        return cached['df']
+    
+    progress = st.empty()
+    preview = st.empty()
+    pages = []
+    rows = 0
+    
+    try:
+        for page in analytics.iter_trending_pages(region_code, category_ids, max_rows, max_units):
+            pages.append(page)
+            rows += len(page)
+            progress.info(f"Crawled {len(pages)} pages, {rows} videos so far...")
+            # Show the first rows while the rest of the chart is still coming in
+            preview.dataframe(
+                page[['title', 'channel_title', 'views', 'category_name']].head(10),
+                use_container_width=True,
+                hide_index=True
+            )
+    except YouTubeAPIError as e:
+        st.error(str(e))
+    except Exception as e:
+        st.error(f"Error crawling trending videos: {str(e)}")
+    
+    progress.empty()
+    preview.empty()
+    
+    df = pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
+    analytics.record_snapshot(df, SOURCE_TRENDING)
+    st.session_state['deep_crawl'] = {'key': crawl_key, 'time': time.time(), 'df': df}
+    return df
+
+@st.cache_data(ttl=60)
+def load_latest_snapshots(_store, region_codes):
+    """Combine the newest snapshot of every collected category for the given regions
+    
+    Returns (DataFrame, time of the newest snapshot used).
+    """
+    df, newest = _store.latest(region_codes)
+    if df.empty:
+        return df, None
+    # A video can appear in both the unfiltered and a category chart
+    df = df.sort_values('snapshot_time', ascending=False)
+    df = df.drop_duplicates(subset=['region', 'video_id']).reset_index(drop=True)
+    # Snapshots collected before duration_seconds existed only have the raw string
+    if df['duration_seconds'].isna().any():
+        df['duration_seconds'] = parse_durations(df['duration'])
+    return compact_frame(df), newest.to_pydatetime()
+
+@st.cache_data(ttl=60)
+def load_snapshot_history(_store, region_codes, days, metrics):
+    """Per-region totals of the chosen metrics for every snapshot in the window
+    
+    Only the region, snapshot time and metric columns are decoded, and only
+    the date partitions inside the window are scanned.
+    """
+    since = datetime.now().astimezone() - timedelta(days=days)
+    history = _store.read(region_codes, start=since, columns=['region', 'snapshot_time', *metrics])
+    if history.empty:
+        return history
+    return history.groupby(['snapshot_time', 'region'], as_index=False, observed=True)[list(metrics)].sum()
+
+def update_velocity(store, tracker):
+    """Fold snapshots collected since the last update into the tracker
     
-    # Initialize analytics
-    analytics = LiveYouTubeAnalytics()
+    The first call starts from the last BOOTSTRAP_HOURS of history; after
+    that only the newest date partitions are read.
+    """
+    columns = ['region', 'video_id', 'snapshot_time', 'views', 'likes']
+    if tracker.last_time is None:
+        since = datetime.now().astimezone() - timedelta(hours=BOOTSTRAP_HOURS)
+    else:
+        since = tracker.last_time
+    tracker.update(store.read(start=since, columns=columns))
+    return tracker.rates()
+
+def render_velocity(df):
+    """List the videos gaining views fastest since their previous snapshot"""
+    rising = df.dropna(subset=['views_per_hour']).nlargest(10, 'views_per_hour')
+    with st.expander("View Velocity"):
+        if rising.empty:
+            st.caption("Rates appear once a video has been seen in two snapshots")
+            return
+        st.dataframe(
+            rising[['title', 'region', 'views', *VELOCITY_COLUMNS]],
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'views_per_hour': st.column_config.NumberColumn("Views/Hour", format="%.0f"),
+                'likes_per_hour': st.column_config.NumberColumn("Likes/Hour", format="%.0f"),
+                'view_acceleration': st.column_config.NumberColumn("Acceleration (views/h²)", format="%.1f"),
+            }
+        )
+
+def render_snapshot_history(store, region_codes, category=None):
+    """Chart how the collected totals moved over the selected window"""
+    with st.expander("Snapshot History"):
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            days = st.number_input("Window (days)", min_value=1, max_value=90, value=HISTORY_DAYS)
+        with col2:
+            metrics = st.multiselect("Metrics", ['views', 'likes', 'comments'], default=['views', 'likes'])
+        if not metrics:
+            return
+        
+        history = load_snapshot_history(store, tuple(region_codes), days, tuple(metrics))
+        if history.empty:
+            st.caption("No snapshots in this window")
+            return
+        
+        # The memo outlives a change of selection or newly collected rows while the dashboard's data stays the same
+        view = (tuple(region_codes), category, history['snapshot_time'].max())
+        for metric in metrics:
+            fig = memoized(('history', view, days, metric), lambda: px.line(
+                history, x='snapshot_time', y=metric, color='region',
+                title=f"Total {metric.title()} per Snapshot"
+            ))
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Every collected row in the window, read from the store only when the download is clicked
+        since = datetime.now().astimezone() - timedelta(days=days)
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            history_format = st.selectbox("Export format", list(EXPORT_FORMATS), index=list(EXPORT_FORMATS).index('Parquet'), key="history_export_format")
+        with col2:
+            st.download_button(
+                label=f"Download Snapshots as {history_format}",
+                data=lambda: export_file(store.read(region_codes, start=since), history_format),
+                file_name=export_name("youtube_snapshots", history_format, datetime.now()),
+                mime=EXPORT_FORMATS[history_format][1],
+                on_click="ignore"
+            )
+
+def configure_api_key(connect):
+    """Collect and validate the API key in the sidebar
     
+    connect(api_key) returns the key's shared fetcher; it is returned once
+    the key works, None until then.
+    """
     # API Key Setup
     st.sidebar.header("API Configuration")
     
@@ -441,11 +664,11 @@ def main():
             - Current engagement metrics and analytics
             - Interactive visualizations and insights
             """)
-        return
+        return None
     
-    analytics.set_api_key(api_key)
+    analytics = connect(api_key)
     
-    # Test API connection
+    # Test API connection (answered from the key's recent check on most reruns)
     is_connected, connection_message = analytics.test_api_connection()
     
     if is_connected:
@@ -462,79 +685,418 @@ def main():
             - **Quota Exceeded**: Check your daily usage limits
             - **Network Issues**: Check your internet connection
             """)
-        return
+        return None
     
-    # Sidebar controls
-    st.sidebar.header("Live Controls")
+    return analytics
+
+def configure_service(analytics):
+    """Check the trends service the dashboard reads from, returning analytics if it answers"""
+    st.sidebar.header("API Configuration")
+    is_connected, connection_message = analytics.service.health()
+    if is_connected:
+        st.sidebar.markdown(f'<div class="api-status api-success">{connection_message}</div>', unsafe_allow_html=True)
+        return analytics
+    st.sidebar.markdown(f'<div class="api-status api-error">{connection_message}</div>', unsafe_allow_html=True)
+    st.error(f"Trends Service Unavailable: {connection_message}. Start it with `youtube-trends-service` or unset TRENDS_SERVICE_URL.")
+    return None
+
+def load_dashboard_data(analytics, store, selection):
+    """Fetch the frame for the sidebar selection
     
-    # Data source selection
-    data_source = st.sidebar.radio(
-        "Data Source",
-        ["Trending Videos", "Search Videos"],
-        help="Choose between trending videos or search results"
-    )
+    Returns (DataFrame, last updated time, {region: error}, fetch timings).
+    """
+    region_errors = {}
+    fetch_timings = {}
+    last_updated = datetime.now()
+    selected_region = selection['region']
+    selected_category = selection['category']
+    with st.spinner("Fetching live YouTube data..."):
+        if selection['data_source'] == "Collected Snapshots":
+            df, snapshot_time = load_latest_snapshots(store, tuple(selection['snapshot_regions']))
+            if not df.empty:
+                rates = update_velocity(store, get_velocity_tracker(store.root))
+                df = df.merge(rates, on=['region', 'video_id'], how='left')
+            if selected_category != 'All Categories' and not df.empty:
+                df = df[df['category_name'] == selected_category].reset_index(drop=True)
+            if snapshot_time is not None:
+                last_updated = snapshot_time.astimezone()
+        elif selection['data_source'] == "Trending Videos":
+            category_id = None
+            if selected_category != 'All Categories':
+                category_id = analytics.categories.id_of(selection['category_region'], selected_category)
+            
+            if selected_region == ALL_REGIONS:
+                df, region_errors, fetch_timings = analytics.get_all_regions_trending(category_id, selection['max_results'])
+            elif selection['deep_crawl']:
+                if category_id:
+                    category_ids = [category_id]
+                elif selection['split_by_category']:
+                    category_ids = list(analytics.categories.names(selection['category_region']).keys())
+                else:
+                    category_ids = None
+                df = run_deep_crawl(analytics, selected_region, category_ids, selection['crawl_rows'], selection['crawl_units'])
+            else:
+                df = analytics.get_trending_videos(selected_region, category_id, selection['max_results'])
+        else:
+            df = analytics.search_videos(selection['search_query'], selected_region, selection['max_results'])
+    return df, last_updated, region_errors, fetch_timings
+
+def memoized(name, build):
+    """build() for the data currently on screen, kept until its content hash changes"""
+    memo = st.session_state['dashboard_memo']
+    if name not in memo:
+        memo[name] = build()
+    return memo[name]
+
+def cached_figure(name, build):
+    """A chart for the data on screen, from this session, another session's spec or build()"""
+    def timed_build():
+        with REGISTRY.span('figure_build'):
+            return build()
+    return memoized(('figure', name), lambda: get_figure_cache().get((st.session_state['dashboard_hash'], name), timed_build))
+
+def render_categories_tab(df, aggregates):
+    """Category counts as a bar chart and a pie"""
+    st.subheader("Video Categories Distribution")
+    category_counts = aggregates.top_categories(10)
     
-    # Region selection
-    regions = list(analytics.regions.keys())
-    selected_region = st.sidebar.selectbox(
-        "Select Region",
-        regions,
-        index=0,
-        help="Choose a country/region for data"
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        fig_bar = cached_figure('bar', lambda: px.bar(
+            x=category_counts.values,
+            y=category_counts.index,
+            orientation='h',
+            title="Top Categories by Video Count",
+            labels={'x': 'Number of Videos', 'y': 'Category'},
+            color=category_counts.values,
+            color_continuous_scale='Reds'
+        ).update_layout(height=500, showlegend=False))
+        st.plotly_chart(fig_bar, use_container_width=True)
+    
+    with col2:
+        fig_pie = cached_figure('pie', lambda: px.pie(
+            values=category_counts.values,
+            names=category_counts.index,
+            title="Category Distribution"
+        ).update_layout(height=500))
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+def render_top_videos_tab(df, aggregates):
+    """Most viewed videos as a scatter plot and a table"""
+    st.subheader("Top Performing Videos")
+    
+    # Performance scatter plot
+    top_videos = aggregates.top_videos(df, 'views', 20)
+    
+    fig_scatter = cached_figure('scatter', lambda: px.scatter(
+        top_videos,
+        x='views',
+        y='likes',
+        size='comments',
+        color='engagement_rate',
+        hover_name='title',
+        hover_data=['channel_title', 'category_name'],
+        title="Views vs Likes (Size = Comments, Color = Engagement Rate)",
+        labels={'views': 'Views', 'likes': 'Likes'},
+        color_continuous_scale='Viridis'
+    ).update_layout(height=600))
+    st.plotly_chart(fig_scatter, use_container_width=True)
+    
+    # Top videos table
+    st.subheader("Top 10 Videos by Views")
+    top_10 = aggregates.top_videos(df, 'views', 10)[['title', 'channel_title', 'views', 'likes', 'engagement_rate', 'category_name']]
+    top_10['views'] = top_10['views'].apply(format_number)
+    top_10['likes'] = top_10['likes'].apply(format_number)
+    top_10['engagement_rate'] = top_10['engagement_rate'].apply(lambda x: f"{x:.2f}%")
+    
+    st.dataframe(
+        top_10,
+        use_container_width=True,
+        column_config={
+            "title": "Video Title",
+            "channel_title": "Channel",
+            "views": "Views",
+            "likes": "Likes",
+            "engagement_rate": "Engagement",
+            "category_name": "Category"
+        }
     )
+
+def watchable_videos(df):
+    """Videos with a known length, live streams left out, with their views per minute of content"""
+    formats = df.assign(format=classify_formats(df['duration_seconds']))
+    watchable = formats[formats['format'] != FORMAT_LIVE]
+    return watchable.assign(views_per_minute=watchable['views'] / (watchable['duration_seconds'] / 60))
+
+def summarize_formats(watchable):
+    """Videos, averages and median views per minute for each format"""
+    return watchable.groupby('format', observed=True).agg(
+        videos=('video_id', 'size'),
+        avg_views=('views', 'mean'),
+        avg_engagement=('engagement_rate', 'mean'),
+        avg_minutes=('duration_seconds', lambda s: s.mean() / 60),
+        views_per_minute=('views_per_minute', 'median')
+    ).reset_index()
+
+def render_engagement_tab(df, aggregates):
+    """Engagement by category, engagement insights and Shorts vs long-form"""
+    st.subheader("Engagement Analysis")
     
-    # Search query (if search mode)
-    search_query = None
-    if data_source == "Search Videos":
-        search_query = st.sidebar.text_input(
-            "Search Query",
-            placeholder="e.g., 'python tutorial', 'music video'",
-            help="Enter keywords to search for videos"
-        )
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Engagement by category
+        engagement_by_category = aggregates.engagement_by_category(8)
+        fig_eng = cached_figure('eng', lambda: px.bar(
+            x=engagement_by_category.values,
+            y=engagement_by_category.index,
+            orientation='h',
+            title="Average Engagement Rate by Category",
+            labels={'x': 'Engagement Rate (%)', 'y': 'Category'},
+            color=engagement_by_category.values,
+            color_continuous_scale='Blues'
+        ).update_layout(height=400, showlegend=False))
+        st.plotly_chart(fig_eng, use_container_width=True)
+    
+    with col2:
+        # Views vs Engagement scatter
+        fig_views_eng = cached_figure('views_eng', lambda: scatter(
+            df,
+            x='views',
+            y='engagement_rate',
+            title="Views vs Engagement Rate",
+            color='category_name',
+            labels={'views': 'Views', 'engagement_rate': 'Engagement Rate (%)'},
+            hover_data=['title', 'channel_title']
+        ).update_layout(height=400))
+        st.plotly_chart(fig_views_eng, use_container_width=True)
+    
+    # Engagement insights
+    st.subheader("Engagement Insights")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("High Engagement Videos", aggregates.high_engagement_count)
+    with col2:
+        best_category = engagement_by_category.index[0] if len(engagement_by_category) > 0 else "N/A"
+        st.metric("Best Performing Category", best_category)
+    with col3:
+        avg_time_to_trend = df['hours_since_published'].mean()
+        st.metric("Avg Hours to Trend", f"{avg_time_to_trend:.1f}h")
+    
+    # Shorts vs long-form, and how many views each minute of content earns
+    st.subheader("Shorts vs Long-form")
+    format_summary = memoized('formats', lambda: summarize_formats(watchable_videos(df)))
+    
+    if format_summary.empty:
+        st.info("No videos with a known duration")
+    else:
+        col1, col2 = st.columns(2)
+        with col1:
+            fig_vpm = cached_figure('vpm', lambda: px.bar(
+                format_summary,
+                x='format',
+                y='views_per_minute',
+                color='format',
+                title="Median Views per Minute of Content",
+                labels={'format': 'Format', 'views_per_minute': 'Views per Minute'}
+            ).update_layout(height=400, showlegend=False))
+            st.plotly_chart(fig_vpm, use_container_width=True)
+        with col2:
+            fig_duration = cached_figure('duration', lambda: scatter(
+                watchable_videos(df),
+                x='duration_seconds',
+                y='views_per_minute',
+                title="Views per Minute vs Duration",
+                color='format',
+                log_x=True,
+                log_y=True,
+                labels={'duration_seconds': 'Duration (seconds)', 'views_per_minute': 'Views per Minute'},
+                hover_data=['title', 'channel_title']
+            ).update_layout(height=400))
+            st.plotly_chart(fig_duration, use_container_width=True)
         
-        if not search_query:
-            st.info("Enter a search query to find specific videos on YouTube")
-            return
+        st.caption(f"Shorts are videos up to {SHORTS_MAX_SECONDS // 60} minutes; live streams are left out")
+        st.dataframe(
+            format_summary,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'format': "Format",
+                'videos': "Videos",
+                'avg_views': st.column_config.NumberColumn("Avg Views", format="%.0f"),
+                'avg_engagement': st.column_config.NumberColumn("Avg Engagement (%)", format="%.2f"),
+                'avg_minutes': st.column_config.NumberColumn("Avg Length (min)", format="%.1f"),
+                'views_per_minute': st.column_config.NumberColumn("Median Views/Minute", format="%.0f"),
+            }
+        )
+
+def render_channels_tab(df, aggregates):
+    """Channels with the most total views"""
+    st.subheader("Top Channels Analysis")
     
-    # Category filter
-    categories = analytics.get_video_categories(selected_region)
-    category_options = ['All Categories'] + list(categories.values())
-    selected_category = st.sidebar.selectbox("Category Filter", category_options)
+    channel_stats = aggregates.top_channels(15)
     
-    # Results limit
-    max_results = st.sidebar.slider("Max Results", 10, 50, 25)
+    col1, col2 = st.columns(2)
     
-    # Auto-refresh
-    auto_refresh = st.sidebar.checkbox("Auto Refresh (30s)", value=False)
-    refresh_placeholder = st.sidebar.empty()
+    with col1:
+        fig_channels = cached_figure('channels', lambda: px.bar(
+            channel_stats.reset_index(),
+            x='views',
+            y='channel_title',
+            orientation='h',
+            title="Top Channels by Total Views",
+            labels={'views': 'Total Views', 'channel_title': 'Channel'},
+            color='views',
+            color_continuous_scale='Oranges'
+        ).update_layout(height=500, showlegend=False))
+        st.plotly_chart(fig_channels, use_container_width=True)
     
-    # Manual refresh button
-    if st.sidebar.button("Refresh Data Now", type="primary"):
-        st.cache_data.clear()
-        st.rerun()
+    with col2:
+        fig_channel_scatter = cached_figure('channel_scatter', lambda: px.scatter(
+            channel_stats.reset_index(),
+            x='video_count',
+            y='avg_views_per_video',
+            size='views',
+            color='likes',
+            hover_name='channel_title',
+            title="Channel Performance: Videos vs Avg Views",
+            labels={'video_count': 'Number of Videos', 'avg_views_per_video': 'Avg Views per Video'},
+            color_continuous_scale='Plasma'
+        ).update_layout(height=500))
+        st.plotly_chart(fig_channel_scatter, use_container_width=True)
+
+def render_gallery_tab(df, aggregates):
+    """Video cards, sorted by the chosen column"""
+    st.subheader("Video Gallery")
     
-    # Fetch data
-    with st.spinner("Fetching live YouTube data..."):
-        if data_source == "Trending Videos":
-            category_id = None
-            if selected_category != 'All Categories':
-                category_id = [k for k, v in categories.items() if v == selected_category]
-                category_id = category_id[0] if category_id else None
-            
-            df = analytics.get_trending_videos(selected_region, category_id, max_results)
-        else:
-            df = analytics.search_videos(search_query, selected_region, max_results)
+    # Display options
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        gallery_sort = st.selectbox("Sort by", ['views', 'likes', 'engagement_rate', 'published_at'], key="gallery_sort")
+    with col2:
+        gallery_order = st.selectbox("Order", ['Descending', 'Ascending'], key="gallery_order")
+    with col3:
+        gallery_limit = st.slider("Videos to show", 5, 20, 10, key="gallery_limit")
+    
+    # Sort and display videos
+    ascending = gallery_order == 'Ascending'
+    gallery_df = aggregates.top_videos(df, gallery_sort, gallery_limit, ascending=ascending)
+    
+    for idx, video in gallery_df.iterrows():
+        with st.container():
+            st.markdown('<div class="video-card">', unsafe_allow_html=True)
+            display_video_card(video)
+            st.markdown('</div>', unsafe_allow_html=True)
+            st.markdown("---")
+
+def live_dashboard(analytics, store, selection, run_every=None):
+    """Everything drawn from the fetched data: KPIs, charts, tables and exports
+    
+    Runs as a fragment, so the auto-refresh timer (every run_every seconds)
+    reruns only this part and the sidebar and its widget state stay as they
+    are. Figures are rebuilt only when the data's content hash changes; an
+    unchanged cycle just draws them again. Only the open tab runs, and
+    exports are written only when a download is clicked.
+    """
+    started = time.thread_time()
+    # main() counts full runs; seeing the same count again means this fragment reran alone
+    app_runs = st.session_state.get('app_runs', 0)
+    fragment_rerun = st.session_state.get('dashboard_app_runs') == app_runs
+    st.session_state['dashboard_app_runs'] = app_runs
+    # Widgets inside the fragment (tabs, gallery sort) rerun it too, but only the timer
+    # does so a full interval after the last tick; their reruns don't move the timer
+    now = time.monotonic()
+    last_tick = st.session_state.get('dashboard_tick_at')
+    timer_rerun = (fragment_rerun and run_every is not None and last_tick is not None
+                   and now - last_tick >= run_every - TIMER_SLACK_SECONDS)
+    if timer_rerun or not fragment_rerun:
+        st.session_state['dashboard_tick_at'] = now
+    analytics.set_thread_priority(PRIORITY_BACKGROUND if timer_rerun else PRIORITY_INTERACTIVE)
+    
+    with REGISTRY.span('dashboard.load'):
+        df, last_updated, region_errors, fetch_timings = load_dashboard_data(analytics, store, selection)
+    region_label = selection['region_label']
+    data_source = selection['data_source']
+    
+    for region_code, error in region_errors.items():
+        st.warning(f"{analytics.regions.get(region_code, region_code)}: {error}")
     
     if df.empty:
         st.error("No data available. Please check your filters or try again.")
         return
     
+    # The API failed and the fetcher fell back to cached responses (merging below drops attrs)
+    stale_since = df.attrs.get('stale_since')
+    if stale_since is not None:
+        stale_regions = fetch_timings.get('stale_regions', {})
+        scope = f" for {', '.join(analytics.regions.get(code, code) for code in stale_regions)}" if stale_regions else ""
+        st.warning(
+            f"The YouTube API is not responding; showing cached data{scope} from "
+            f"{datetime.fromtimestamp(stale_since).strftime('%H:%M')}"
+        )
+    
+    # Merged, filtered and crawled frames lose their categoricals or keep unused ones
+    df = compact_frame(df)
+    
+    # Counts, totals and rankings for this dataset version; its fingerprint keys the figures too
+    with REGISTRY.span('dashboard.aggregates'):
+        aggregates = get_aggregate_cache().get(df)
+    data_hash = aggregates.fingerprint
+    data_changed = st.session_state.get('dashboard_hash') != data_hash
+    if data_changed:
+        st.session_state['dashboard_hash'] = data_hash
+        st.session_state['dashboard_memo'] = {}
+        # The gallery then reads every thumbnail it can show from disk
+        get_thumbnail_cache().prefetch(aggregates.gallery_rows(df)['thumbnail'])
+    
+    if fetch_timings:
+        with st.expander("Fetch Timing"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Concurrent Wall Time", f"{fetch_timings['wall_seconds']:.2f}s")
+            with col2:
+                st.metric("Serial Loop Estimate", f"{fetch_timings['serial_seconds']:.2f}s")
+            with col3:
+                st.metric("Speedup", f"{fetch_timings['speedup']:.1f}x")
+            
+            region_counts = df['region'].value_counts()
+            timing_df = pd.DataFrame({
+                'region': list(fetch_timings['regions'].keys()),
+                'seconds': list(fetch_timings['regions'].values()),
+            })
+            timing_df['videos'] = timing_df['region'].map(region_counts).fillna(0).astype(int)
+            timing_df['status'] = timing_df['region'].map(lambda code: 'failed' if code in region_errors else 'ok')
+            st.caption(f"{len(fetch_timings['regions'])} regions fetched with {fetch_timings['workers']} workers")
+            st.dataframe(timing_df, use_container_width=True, hide_index=True)
+    
+    if data_source == "Collected Snapshots":
+        render_velocity(df)
+        render_snapshot_history(store, selection['snapshot_regions'], selection['category'])
+    
+    with st.expander("Memory Footprint"):
+        footprint = memoized('footprint', lambda: memory_footprint(df))
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Bytes per Row", f"{footprint['compact_bytes_per_row']:,.0f}",
+                      delta=f"{footprint['compact_bytes_per_row'] - footprint['loose_bytes_per_row']:,.0f}",
+                      delta_color="inverse")
+        with col2:
+            st.metric("Frame Size", f"{footprint['compact_bytes'] / 1024:,.1f} KB")
+        with col3:
+            st.metric("Saved vs Plain Layout", f"{footprint['saving']:.0%}")
+        st.caption(
+            f"{footprint['rows']:,} rows; {footprint['loose_bytes_per_row']:,.0f} bytes per row with plain strings, "
+            "64-bit numbers and stored URLs"
+        )
+    
     # Display last update time and stats
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.info(f"**Last Updated**: {datetime.now().strftime('%H:%M:%S')}")
+        st.info(f"**Last Updated**: {last_updated.strftime('%H:%M:%S')}")
     with col2:
-        st.info(f"**Region**: {analytics.regions[selected_region]}")
+        st.info(f"**Region**: {region_label}")
     with col3:
         st.info(f"**Videos Found**: {len(df)}")
     
@@ -553,7 +1115,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_views = df['views'].mean()
+        avg_views = aggregates.avg_views
         st.markdown(f"""
         <div class="metric-container">
             <h3>Average Views</h3>
@@ -562,7 +1124,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col3:
-        avg_engagement = df['engagement_rate'].mean()
+        avg_engagement = aggregates.avg_engagement
         st.markdown(f"""
         <div class="metric-container">
             <h3>Avg Engagement</h3>
@@ -571,7 +1133,7 @@ def main():
         """, unsafe_allow_html=True)
     
     with col4:
-        top_category = df['category_name'].mode().iloc[0] if not df.empty else 'N/A'
+        top_category = aggregates.top_category
         st.markdown(f"""
         <div class="metric-container">
             <h3>Top Category</h3>
@@ -582,191 +1144,14 @@ def main():
     # Visualizations
     st.header("Live Analytics & Insights")
     
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Categories", "Top Videos", "Engagement", "Channels", "Video Gallery"])
-    
-    with tab1:
-        st.subheader("Video Categories Distribution")
-        category_counts = df['category_name'].value_counts().head(10)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_bar = px.bar(
-                x=category_counts.values,
-                y=category_counts.index,
-                orientation='h',
-                title="Top Categories by Video Count",
-                labels={'x': 'Number of Videos', 'y': 'Category'},
-                color=category_counts.values,
-                color_continuous_scale='Reds'
-            )
-            fig_bar.update_layout(height=500, showlegend=False)
-            st.plotly_chart(fig_bar, use_container_width=True)
-        
-        with col2:
-            fig_pie = px.pie(
-                values=category_counts.values,
-                names=category_counts.index,
-                title="Category Distribution"
-            )
-            fig_pie.update_layout(height=500)
-            st.plotly_chart(fig_pie, use_container_width=True)
-    
-    with tab2:
-        st.subheader("Top Performing Videos")
-        
-        # Performance scatter plot
-        top_videos = df.nlargest(20, 'views')
-        
-        fig_scatter = px.scatter(
-            top_videos,
-            x='views',
-            y='likes',
-            size='comments',
-            color='engagement_rate',
-            hover_name='title',
-            hover_data=['channel_title', 'category_name'],
-            title="Views vs Likes (Size = Comments, Color = Engagement Rate)",
-            labels={'views': 'Views', 'likes': 'Likes'},
-            color_continuous_scale='Viridis'
-        )
-        fig_scatter.update_layout(height=600)
-        st.plotly_chart(fig_scatter, use_container_width=True)
-        
-        # Top videos table
-        st.subheader("Top 10 Videos by Views")
-        top_10 = df.nlargest(10, 'views')[['title', 'channel_title', 'views', 'likes', 'engagement_rate', 'category_name']]
-        top_10['views'] = top_10['views'].apply(format_number)
-        top_10['likes'] = top_10['likes'].apply(format_number)
-        top_10['engagement_rate'] = top_10['engagement_rate'].apply(lambda x: f"{x:.2f}%")
-        
-        st.dataframe(
-            top_10,
-            use_container_width=True,
-            column_config={
-                "title": "Video Title",
-                "channel_title": "Channel",
-                "views": "Views",
-                "likes": "Likes",
-                "engagement_rate": "Engagement",
-                "category_name": "Category"
-            }
-        )
-    
-    with tab3:
-        st.subheader("Engagement Analysis")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Engagement by category
-            engagement_by_category = df.groupby('category_name')['engagement_rate'].mean().sort_values(ascending=False).head(8)
-            fig_eng = px.bar(
-                x=engagement_by_category.values,
-                y=engagement_by_category.index,
-                orientation='h',
-                title="Average Engagement Rate by Category",
-                labels={'x': 'Engagement Rate (%)', 'y': 'Category'},
-                color=engagement_by_category.values,
-                color_continuous_scale='Blues'
-            )
-            fig_eng.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig_eng, use_container_width=True)
-        
-        with col2:
-            # Views vs Engagement scatter
-            fig_views_eng = px.scatter(
-                df,
-                x='views',
-                y='engagement_rate',
-                color='category_name',
-                title="Views vs Engagement Rate",
-                labels={'views': 'Views', 'engagement_rate': 'Engagement Rate (%)'},
-                hover_data=['title', 'channel_title']
-            )
-            fig_views_eng.update_layout(height=400)
-            st.plotly_chart(fig_views_eng, use_container_width=True)
-        
-        # Engagement insights
-        st.subheader("Engagement Insights")
-        high_engagement = df[df['engagement_rate'] > df['engagement_rate'].quantile(0.8)]
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("High Engagement Videos", len(high_engagement))
-        with col2:
-            best_category = engagement_by_category.index[0] if len(engagement_by_category) > 0 else "N/A"
-            st.metric("Best Performing Category", best_category)
-        with col3:
-            avg_time_to_trend = df['hours_since_published'].mean()
-            st.metric("Avg Hours to Trend", f"{avg_time_to_trend:.1f}h")
-    
-    with tab4:
-        st.subheader("Top Channels Analysis")
-        
-        channel_stats = df.groupby('channel_title').agg({
-            'views': 'sum',
-            'likes': 'sum',
-            'comments': 'sum',
-            'video_id': 'count'
-        }).rename(columns={'video_id': 'video_count'})
-        
-        channel_stats['avg_views_per_video'] = channel_stats['views'] / channel_stats['video_count']
-        channel_stats = channel_stats.sort_values('views', ascending=False).head(15)
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            fig_channels = px.bar(
-                channel_stats.reset_index(),
-                x='views',
-                y='channel_title',
-                orientation='h',
-                title="Top Channels by Total Views",
-                labels={'views': 'Total Views', 'channel_title': 'Channel'},
-                color='views',
-                color_continuous_scale='Oranges'
-            )
-            fig_channels.update_layout(height=500, showlegend=False)
-            st.plotly_chart(fig_channels, use_container_width=True)
-        
-        with col2:
-            fig_channel_scatter = px.scatter(
-                channel_stats.reset_index(),
-                x='video_count',
-                y='avg_views_per_video',
-                size='views',
-                color='likes',
-                hover_name='channel_title',
-                title="Channel Performance: Videos vs Avg Views",
-                labels={'video_count': 'Number of Videos', 'avg_views_per_video': 'Avg Views per Video'},
-                color_continuous_scale='Plasma'
-            )
-            fig_channel_scatter.update_layout(height=500)
-            st.plotly_chart(fig_channel_scatter, use_container_width=True)
-    
-    with tab5:
-        st.subheader("Video Gallery")
-        
-        # Display options
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            gallery_sort = st.selectbox("Sort by", ['views', 'likes', 'engagement_rate', 'published_at'], key="gallery_sort")
-        with col2:
-            gallery_order = st.selectbox("Order", ['Descending', 'Ascending'], key="gallery_order")
-        with col3:
-            gallery_limit = st.slider("Videos to show", 5, 20, 10, key="gallery_limit")
-        
-        # Sort and display videos
-        ascending = gallery_order == 'Ascending'
-        gallery_df = df.sort_values(gallery_sort, ascending=ascending).head(gallery_limit)
-        
-        for idx, video in gallery_df.iterrows():
-            with st.container():
-                st.markdown('<div class="video-card">', unsafe_allow_html=True)
-                display_video_card(video)
-                st.markdown('</div>', unsafe_allow_html=True)
-                st.markdown("---")
+    tabs = st.tabs(DASHBOARD_TABS, key="dashboard_tab", on_change="rerun")
+    renderers = [render_categories_tab, render_top_videos_tab, render_engagement_tab, render_channels_tab, render_gallery_tab]
+    for label, tab, render in zip(DASHBOARD_TABS, tabs, renderers):
+        with tab:
+            # Only the open tab runs, so closed tabs build no figures
+            if tab.open:
+                with REGISTRY.span(f'tab.{label}'):
+                    render(df, aggregates)
     
     # Data Export Section
     st.header("Export Live Data")
@@ -774,36 +1159,29 @@ def main():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        # CSV Export
-        csv = df.to_csv(index=False)
-        st.download_button(
-            label="Download as CSV",
-            data=csv,
-            file_name=f"youtube_live_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            type="primary"
-        )
+        export_format = st.selectbox("Export format", list(EXPORT_FORMATS), key="export_format")
     
     with col2:
-        # JSON Export
-        json_data = df.to_json(orient='records', date_format='iso')
+        # Written only when clicked, in chunks, on the download's own thread
         st.download_button(
-            label="Download as JSON",
-            data=json_data,
-            file_name=f"youtube_live_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            mime="application/json"
+            label=f"Download as {export_format}",
+            data=lambda: export_file(df, export_format),
+            file_name=export_name("youtube_live_data", export_format, datetime.now()),
+            mime=EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+            type="primary"
         )
     
     with col3:
         # Summary Report
         summary = {
             'export_time': datetime.now().isoformat(),
-            'region': analytics.regions[selected_region],
+            'region': region_label,
             'data_source': data_source,
             'total_videos': len(df),
-            'avg_views': float(df['views'].mean()),
-            'avg_engagement': float(df['engagement_rate'].mean()),
-            'top_category': df['category_name'].mode().iloc[0] if not df.empty else 'N/A'
+            'avg_views': aggregates.avg_views,
+            'avg_engagement': aggregates.avg_engagement,
+            'top_category': aggregates.top_category
         }
         summary_json = json.dumps(summary, indent=2)
         st.download_button(
@@ -813,25 +1191,186 @@ def main():
             mime="application/json"
         )
     
-    # Auto-refresh logic
-    if auto_refresh:
-        with refresh_placeholder:
-            for i in range(30, 0, -1):
-                st.info(f"Auto-refresh in {i} seconds...")
-                time.sleep(1)
-        st.rerun()
-    
     # Footer
     st.markdown("---")
     st.markdown(
         f"""
         <div style='text-align: center; color: #666; padding: 20px;'>
             <p><span class="live-indicator">🔴 LIVE</span> YouTube Analytics Dashboard | Last Updated: {datetime.now().strftime('%H:%M:%S')}</p>
-            <p>Data source: YouTube Data API v3 | Region: {analytics.regions[selected_region]} | Videos: {len(df)}</p>
+            <p>Data source: YouTube Data API v3 | Region: {region_label} | Videos: {len(df)}</p>
         </div>
         """, 
         unsafe_allow_html=True
     )
+    
+    st.session_state['dashboard_cpu'] = time.thread_time() - started
+    st.caption(
+        f"Server CPU this cycle: {st.session_state['dashboard_cpu'] * 1000:.0f} ms "
+        f"({'data changed, charts rebuilt' if data_changed else 'data unchanged, charts reused'})"
+    )
+
+
+def main():
+    st.markdown('<h1 class="main-header">📺 <span class="live-indicator">🔴 LIVE</span> YouTube Analytics Dashboard</h1>', unsafe_allow_html=True)
+    
+    # One fetcher per API key for the whole process, on the pooled session and disk cache, so
+    # sessions share its validation, held charts and in-flight requests
+    daily_budget = get_secret('QUOTA_DAILY_BUDGET', DEFAULT_DAILY_BUDGET, int)
+    minute_budget = get_secret('QUOTA_MINUTE_BUDGET', DEFAULT_MINUTE_BUDGET, int)
+    snapshot_dir = get_secret('SNAPSHOT_DIR', str(DEFAULT_SNAPSHOT_DIR))
+    scheduler = get_quota_scheduler(daily_budget, minute_budget)
+    store = get_snapshot_store(snapshot_dir)
+    base_url = get_secret('YOUTUBE_API_BASE_URL', default_base_url())
+    pool_size = get_secret('HTTP_POOL_SIZE', DEFAULT_POOL_SIZE, int)
+    # A trends service (youtube-trends-service) to read from instead of calling YouTube
+    service_url = get_secret('TRENDS_SERVICE_URL')
+    
+    def connect(api_key=None):
+        return get_analytics(api_key, base_url, pool_size, daily_budget, minute_budget, snapshot_dir, service_url)
+    
+    analytics = connect()
+    
+    # Prometheus endpoint for this process's request counters and stage timings
+    metrics_port = get_secret('METRICS_PORT', DEFAULT_METRICS_PORT, int)
+    metrics_url, metrics_error = None, None
+    if metrics_port:
+        metrics_server, metrics_error = get_metrics_server(metrics_port)
+        if metrics_server is not None:
+            metrics_url = f"http://127.0.0.1:{metrics_port}/metrics"
+    
+    # Data source selection
+    st.sidebar.header("Data Source")
+    data_source = st.sidebar.radio(
+        "Data Source",
+        ["Trending Videos", "Search Videos", "Collected Snapshots"],
+        help="Choose between trending videos, search results or snapshots saved by the background collector"
+    )
+    
+    # Snapshots are read from local storage and need no API key
+    use_snapshots = data_source == "Collected Snapshots"
+    if not use_snapshots:
+        analytics = configure_service(analytics) if service_url else configure_api_key(connect)
+        if analytics is None:
+            return
+    analytics.set_thread_priority(PRIORITY_INTERACTIVE)
+    
+    # Every region's categories in one concurrent round; later runs find them loaded
+    category_errors = {} if use_snapshots else analytics.load_categories()
+    
+    # Sidebar controls
+    st.sidebar.header("Live Controls")
+    
+    # Region selection (the combined view is not available for search)
+    if use_snapshots:
+        regions = store.regions()
+        if not regions:
+            st.info("No snapshots collected yet. Start the collector with `youtube-trends-collector` (or `python collector.py`).")
+            return
+    else:
+        regions = list(analytics.regions.keys())
+    if data_source != "Search Videos":
+        regions.append(ALL_REGIONS)
+    selected_region = st.sidebar.selectbox(
+        "Select Region",
+        regions,
+        index=0,
+        format_func=lambda code: "All Regions" if code == ALL_REGIONS else code,
+        help="Choose a country/region for data"
+    )
+    region_label = "All Regions" if selected_region == ALL_REGIONS else analytics.regions.get(selected_region, selected_region)
+    
+    # Search query (if search mode)
+    search_query = None
+    if data_source == "Search Videos":
+        search_query = st.sidebar.text_input(
+            "Search Query",
+            placeholder="e.g., 'python tutorial', 'music video'",
+            help="Enter keywords to search for videos"
+        )
+        
+        if not search_query:
+            st.info("Enter a search query to find specific videos on YouTube")
+            return
+    
+    # Category filter (snapshot categories come from the stored frames, not the API)
+    if use_snapshots:
+        snapshot_regions = regions[:-1] if selected_region == ALL_REGIONS else [selected_region]
+        snapshot_df, _ = load_latest_snapshots(store, tuple(snapshot_regions))
+        category_options = ['All Categories']
+        if not snapshot_df.empty:
+            category_options += sorted(snapshot_df['category_name'].unique())
+    else:
+        category_region = 'US' if selected_region == ALL_REGIONS else selected_region
+        categories = analytics.categories.names(category_region)
+        if category_region in category_errors:
+            st.sidebar.warning(f"Categories unavailable for {category_region}: {category_errors[category_region]}")
+        category_options = ['All Categories'] + list(categories.values())
+    selected_category = st.sidebar.selectbox("Category Filter", category_options)
+    
+    # Deep crawl follows page tokens past the 50-result cap for a single region
+    deep_crawl = False
+    if data_source == "Trending Videos" and selected_region != ALL_REGIONS and analytics.service is None:
+        deep_crawl = st.sidebar.checkbox(
+            "Deep Crawl",
+            value=False,
+            help="Page through the whole trending chart instead of stopping at 50 videos"
+        )
+    
+    # Results limit
+    if use_snapshots:
+        max_results = None
+    elif deep_crawl:
+        crawl_rows = st.sidebar.slider("Crawl Row Limit", 50, 1000, 200, step=50)
+        crawl_units = st.sidebar.slider("Crawl Quota Limit (units)", 1, 50, 20)
+        split_by_category = st.sidebar.checkbox(
+            "Split by Category",
+            value=True,
+            help="Crawl each category chart separately to reach beyond the head of the combined chart"
+        )
+        max_results = crawl_rows
+    else:
+        max_results = st.sidebar.slider("Max Results", 10, 50, 25)
+    
+    # Auto-refresh
+    auto_refresh = st.sidebar.checkbox(
+        f"Auto Refresh ({AUTO_REFRESH_SECONDS}s)",
+        value=False,
+        help="Re-check the data on a timer; charts are only redrawn when it changed"
+    )
+    
+    # Manual refresh button
+    if st.sidebar.button("Refresh Data Now", type="primary"):
+        st.cache_data.clear()
+        # Stale entries keep their ETags, so unchanged responses come back as cheap 304s
+        get_response_cache().expire_all()
+        st.session_state.pop('deep_crawl', None)
+        st.rerun()
+    
+    # Counted so the dashboard fragment can tell a timer rerun from a full one
+    st.session_state['app_runs'] = st.session_state.get('app_runs', 0) + 1
+    
+    selection = {
+        'data_source': data_source,
+        'region': selected_region,
+        'region_label': region_label,
+        'category': selected_category,
+        'category_region': None if use_snapshots else category_region,
+        'search_query': search_query,
+        'max_results': max_results,
+        'deep_crawl': deep_crawl,
+        'crawl_rows': crawl_rows if deep_crawl else None,
+        'crawl_units': crawl_units if deep_crawl else None,
+        'split_by_category': deep_crawl and split_by_category,
+        'snapshot_regions': snapshot_regions if use_snapshots else None,
+    }
+    # Auto-refresh reruns only the dashboard on a timer instead of sleeping in this thread
+    run_every = AUTO_REFRESH_SECONDS if auto_refresh else None
+    dashboard = st.fragment(live_dashboard, run_every=run_every)
+    dashboard(analytics, store, selection, run_every)
+    
+    render_quota_panel(scheduler)
+    render_detail_cache_panel(analytics.details)
+    render_performance_panel(REGISTRY, metrics_url, metrics_error, get_circuit_breakers())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard aggregates on a large history frame
+
+Times the aggregates a dashboard rerun needs on a 100k-row frame three
+ways: recomputed from the frame as every rerun used to (category counts,
+channel totals, engagement by category, the engagement quantile, nlargest
+and the gallery sort), served by AggregateCache for an unchanged frame,
+and extended after APPENDED_SHARE new rows (which fingerprints the frame
+and the prefix it grew from). The cached and extended aggregates are
+checked against the recomputed ones.
+
+Usage: python benchmarks/bench_aggregates.py [ROWS]
+"""
+
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregates import AggregateCache, DatasetAggregates
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import compact_frame, content_hash
+from youtube_fetcher import videos_to_frame
+
+# Share of rows added to the frame for the append case
+APPENDED_SHARE = 0.01
+
+REPEAT = 5
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def recompute(df):
+    """The aggregates live_dashboard computed from the frame on every rerun"""
+    channel_stats = df.groupby('channel_title', observed=True).agg({
+        'views': 'sum',
+        'likes': 'sum',
+        'comments': 'sum',
+        'video_id': 'count'
+    }).rename(columns={'video_id': 'video_count'})
+    channel_stats['avg_views_per_video'] = channel_stats['views'] / channel_stats['video_count']
+    return {
+        'avg_views': df['views'].mean(),
+        'avg_engagement': df['engagement_rate'].mean(),
+        'top_category': df['category_name'].mode().iloc[0],
+        'category_counts': df['category_name'].value_counts().head(10),
+        'top_videos': df.nlargest(20, 'views'),
+        'top_10': df.nlargest(10, 'views'),
+        'engagement_by_category': df.groupby('category_name', observed=True)['engagement_rate'].mean().sort_values(ascending=False).head(8),
+        'high_engagement': df[df['engagement_rate'] > df['engagement_rate'].quantile(0.8)],
+        'channel_stats': channel_stats.sort_values('views', ascending=False).head(15),
+        'gallery': df.sort_values('views', ascending=False).head(10),
+    }
+
+def check(df, expected, aggregates):
+    """Fail loudly if the aggregates disagree with a recompute of df"""
+    assert aggregates.top_category == expected['top_category']
+    assert abs(aggregates.avg_views - expected['avg_views']) < 1e-6 * expected['avg_views']
+    assert sorted(aggregates.top_categories(10).tolist()) == sorted(expected['category_counts'].tolist())
+    assert list(aggregates.engagement_by_category(8).index) == list(expected['engagement_by_category'].index)
+    assert aggregates.high_engagement_count == len(expected['high_engagement'])
+    assert list(aggregates.top_channels(15)['views']) == list(expected['channel_stats']['views'])
+    assert list(aggregates.top_videos(df, 'views', 20)['video_id']) == list(expected['top_videos']['video_id'])
+    assert list(aggregates.top_videos(df, 'views', 10)['video_id']) == list(expected['gallery']['video_id'])
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    appended = max(1, int(rows * APPENDED_SHARE))
+    items = json.loads(synthetic_payload(rows + appended))['items']
+    full = videos_to_frame(items, 'US', 'United States', CATEGORY_NAMES)
+    del items
+    base = compact_frame(full.iloc[:rows].reset_index(drop=True))
+    grown = compact_frame(full)
+    
+    recompute_seconds, expected = best_of(lambda: recompute(base), REPEAT)
+    build_seconds, built = best_of(lambda: DatasetAggregates(base), REPEAT)
+    check(base, expected, built)
+    
+    hash_seconds, _ = best_of(lambda: content_hash(base), REPEAT)
+    
+    cache = AggregateCache()
+    cache.get(base)
+    hit_seconds, cached = best_of(lambda: cache.get(base), REPEAT)
+    check(base, expected, cached)
+    
+    extend_seconds = float('inf')
+    for _ in range(REPEAT):
+        cache.clear()
+        cache.get(base)
+        seconds, extended = best_of(lambda: cache.get(grown), 1)
+        extend_seconds = min(extend_seconds, seconds)
+    check(grown, recompute(grown), extended)
+    assert cache.stats()['extends'] == REPEAT
+    
+    print(f"{rows:,}-row frame, {appended:,} rows appended")
+    print(f"{'rerun':<34}{'ms':>10}")
+    print(f"{'recompute every rerun (before)':<34}{recompute_seconds * 1000:>10.1f}")
+    print(f"{'build aggregates once':<34}{build_seconds * 1000:>10.1f}")
+    print(f"{'same data, served from cache':<34}{hit_seconds * 1000:>10.1f}")
+    print(f"{'rows appended, extended':<34}{extend_seconds * 1000:>10.1f}")
+    print(f"{'  of which one fingerprint':<34}{hash_seconds * 1000:>10.1f}")
+    print(f"Unchanged rerun: {recompute_seconds / hit_seconds:.1f}x faster")
+
+if __name__ == "__main__":
+    main()
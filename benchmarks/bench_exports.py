@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: data exports on a large frame
+
+Compares what every rerun used to pay for the two download buttons
+(to_csv and to_json of the whole frame, held as text) with the chunked
+export of each EXPORT_FORMATS format, which now only runs when a download
+is clicked. Reports seconds, output size and peak memory above the frame
+itself (from the process's peak RSS, reset before each case), and checks
+that every export passes Streamlit's download conversion (what a deferred
+st.download_button does with it) and reads back with the frame's row count.
+
+Usage: python benchmarks/bench_exports.py [ROWS]
+"""
+
+import gzip
+import io
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from exports import EXPORT_FORMATS, export_file
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import with_video_urls
+from youtube_fetcher import videos_to_frame
+
+def peak_rss():
+    """Peak resident memory of this process since the last reset_peak() (bytes)"""
+    with open('/proc/self/status') as status:
+        return int(re.search(r'VmHWM:\s+(\d+)', status.read()).group(1)) * 1024
+
+def current_rss():
+    with open('/proc/self/status') as status:
+        return int(re.search(r'VmRSS:\s+(\d+)', status.read()).group(1)) * 1024
+
+def reset_peak():
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')
+
+def measured(func):
+    """(seconds, peak bytes above the starting RSS, result)"""
+    reset_peak()
+    baseline = current_rss()
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, peak_rss() - baseline, result
+
+def eager_exports(df):
+    """The CSV and JSON text every rerun built for the download buttons"""
+    urls = with_video_urls(df)
+    return len(urls.to_csv(index=False)) + len(urls.to_json(orient='records', date_format='iso'))
+
+def rows_in(fmt, data):
+    if fmt == 'Parquet':
+        return pq.ParquetFile(io.BytesIO(data)).metadata.num_rows
+    if fmt == 'Arrow IPC':
+        return pa.ipc.open_file(pa.BufferReader(data)).read_all().num_rows
+    if fmt == 'JSON':
+        return len(json.loads(data))
+    if fmt == 'CSV (gzip)':
+        data = gzip.decompress(data)
+    elif fmt == 'CSV (zstd)':
+        data = pa.input_stream(pa.BufferReader(data), compression='zstd').read()
+    return data.count(b'\n') - 1
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    items = json.loads(synthetic_payload(rows))['items']
+    df = videos_to_frame(items, 'US', 'United States', CATEGORY_NAMES)
+    del items
+    frame_bytes = df.memory_usage(deep=True).sum()
+    
+    print(f"{rows:,}-row frame, {frame_bytes / 1e6:,.0f} MB in memory")
+    print(f"{'export':<34}{'seconds':>9}{'output MB':>11}{'peak MB':>9}")
+    seconds, peak, size = measured(lambda: eager_exports(df))
+    print(f"{'CSV + JSON on every rerun (before)':<34}{seconds:>9.2f}{size / 1e6:>11.0f}{peak / 1e6:>9.0f}")
+    print(f"{'every rerun now':<34}{0:>9.2f}{0:>11.0f}{0:>9.0f}")
+    
+    for fmt in EXPORT_FORMATS:
+        seconds, peak, export = measured(lambda: export_file(df, fmt))
+        data, _ = convert_data_to_bytes_and_infer_mime(export, TypeError(f"{fmt}: {type(export)} is not downloadable"))
+        export.close()
+        assert rows_in(fmt, data) == rows, fmt
+        print(f"{fmt + ' on click':<34}{seconds:>9.2f}{len(data) / 1e6:>11.1f}{peak / 1e6:>9.0f}")
+        del data
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark: chart time-to-interactive on a large frame
+
+Builds the dashboard's charts for a 500k-row frame and serializes them the
+way st.plotly_chart does, comparing the old run (every tab's figures, with
+the two full-frame scatters drawn point by point) against the lazy one (the
+open tab only, scatters as sampled WebGL traces) cold, from another
+session's cached specs, and for the heaviest tab. Also reports the bytes of
+figure JSON sent to the browser.
+
+Usage: python benchmarks/bench_figures.py [ROWS]
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import plotly.express as px
+import plotly.io as pio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregates import DatasetAggregates
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from figures import FigureCache, scatter
+from youtube_fetcher import videos_to_frame
+
+def send(figure):
+    """What st.plotly_chart does with a figure before it goes to the browser; returns its bytes"""
+    return len(pio.to_json(figure.to_dict(), validate=False))
+
+def old_figures(df, aggregates):
+    """Every tab's figures as each rerun built them before tabs were lazy"""
+    category_counts = aggregates.top_categories(10)
+    engagement = aggregates.engagement_by_category(8)
+    channels = aggregates.top_channels(15).reset_index()
+    top_videos = aggregates.top_videos(df, 'views', 20)
+    return [
+        px.bar(x=category_counts.values, y=category_counts.index, orientation='h'),
+        px.pie(values=category_counts.values, names=category_counts.index),
+        px.scatter(top_videos, x='views', y='likes', size='comments', color='engagement_rate', hover_name='title'),
+        px.bar(x=engagement.values, y=engagement.index, orientation='h'),
+        px.scatter(df, x='views', y='engagement_rate', color='category_name', hover_data=['title', 'channel_title']),
+        px.scatter(df, x='duration_seconds', y='views', log_x=True, log_y=True, hover_data=['title', 'channel_title']),
+        px.bar(channels, x='views', y='channel_title', orientation='h'),
+        px.scatter(channels, x='video_count', y='avg_views_per_video', size='views', color='likes'),
+    ]
+
+def tab_builders(df, aggregates):
+    """Builders for the figures of the default tab and of the Engagement tab, as the dashboard now draws them"""
+    category_counts = aggregates.top_categories(10)
+    engagement = aggregates.engagement_by_category(8)
+    categories = {
+        'bar': lambda: px.bar(x=category_counts.values, y=category_counts.index, orientation='h'),
+        'pie': lambda: px.pie(values=category_counts.values, names=category_counts.index),
+    }
+    engagement_tab = {
+        'eng': lambda: px.bar(x=engagement.values, y=engagement.index, orientation='h'),
+        'views_eng': lambda: scatter(df, x='views', y='engagement_rate', title="Views vs Engagement Rate",
+                                     color='category_name', hover_data=['title', 'channel_title']),
+        'duration': lambda: scatter(df, x='duration_seconds', y='views', title="Views vs Duration",
+                                    log_x=True, log_y=True, hover_data=['title', 'channel_title']),
+    }
+    return categories, engagement_tab
+
+def draw(cache, fingerprint, builders):
+    """(seconds, bytes sent) to draw one tab through the figure cache"""
+    started = time.perf_counter()
+    sent = sum(send(cache.get((fingerprint, name), build)) for name, build in builders.items())
+    return time.perf_counter() - started, sent
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    items = json.loads(synthetic_payload(rows))['items']
+    df = videos_to_frame(items, 'US', 'United States', CATEGORY_NAMES)
+    del items
+    aggregates = DatasetAggregates(df)
+    
+    started = time.perf_counter()
+    old_sent = sum(send(figure) for figure in old_figures(df, aggregates))
+    old_seconds = time.perf_counter() - started
+    
+    cache = FigureCache()
+    categories, engagement_tab = tab_builders(df, aggregates)
+    cold_seconds, cold_sent = draw(cache, aggregates.fingerprint, categories)
+    shared_seconds, _ = draw(cache, aggregates.fingerprint, categories)
+    heavy_seconds, heavy_sent = draw(cache, aggregates.fingerprint, engagement_tab)
+    heavy_shared_seconds, _ = draw(cache, aggregates.fingerprint, engagement_tab)
+    
+    print(f"{rows:,}-row frame")
+    print(f"{'charts drawn':<46}{'seconds':>10}{'JSON MB':>10}")
+    print(f"{'every tab, full scatters (before)':<46}{old_seconds:>10.2f}{old_sent / 1e6:>10.2f}")
+    print(f"{'open tab only, first session':<46}{cold_seconds:>10.2f}{cold_sent / 1e6:>10.2f}")
+    print(f"{'open tab only, spec cached by another session':<46}{shared_seconds:>10.2f}{cold_sent / 1e6:>10.2f}")
+    print(f"{'Engagement tab, sampled WebGL scatters':<46}{heavy_seconds:>10.2f}{heavy_sent / 1e6:>10.2f}")
+    print(f"{'Engagement tab, spec cached by another session':<46}{heavy_shared_seconds:>10.2f}{heavy_sent / 1e6:>10.2f}")
+    print(f"Time to interactive: {old_seconds / cold_seconds:.0f}x faster on the default tab, "
+          f"{old_seconds / heavy_seconds:.0f}x on the Engagement tab")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: bare requests.get vs the pooled keep-alive session
+
+Starts a local HTTPS stand-in (self-signed certificate made with the
+openssl CLI) that serves a gzip'd videos.list-sized payload, then times
+sequential requests with and without connection reuse.
+
+Usage: python benchmarks/bench_http_session.py [REQUESTS]
+"""
+
+import gzip
+import json
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from youtube_client import create_http_session
+
+PAYLOAD = json.dumps({
+    'items': [
+        {'id': f'video{i:03d}', 'snippet': {'title': f'Video {i}', 'description': 'x' * 200}}
+        for i in range(50)
+    ]
+}).encode()
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Allow keep-alive
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = PAYLOAD
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_certificate(directory):
+    """Create a throwaway self-signed certificate for 127.0.0.1"""
+    cert = Path(directory) / 'cert.pem'
+    key = Path(directory) / 'key.pem'
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+         '-keyout', str(key), '-out', str(cert), '-days', '1',
+         '-subj', '/CN=localhost', '-addext', 'subjectAltName=IP:127.0.0.1,DNS:localhost',
+         '-addext', 'basicConstraints=critical,CA:TRUE'],
+        check=True, capture_output=True
+    )
+    return cert, key
+
+def time_requests(get, url, count):
+    """Return per-request latencies in milliseconds"""
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = get(url)
+        response.raise_for_status()
+        response.json()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_certificate(tmp)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"https://127.0.0.1:{server.server_address[1]}/youtube/v3/videos"
+
+        # Pass verify per call: REQUESTS_CA_BUNDLE would override session.verify
+        session = create_http_session()
+
+        results = {
+            'bare requests.get': time_requests(lambda u: requests.get(u, verify=str(cert), timeout=10), url, count),
+            'pooled session': time_requests(lambda u: session.get(u, verify=str(cert), timeout=10), url, count),
+        }
+        server.shutdown()
+
+    print(f"HTTPS stand-in, {count} sequential requests, {len(PAYLOAD):,} byte payload")
+    print(f"{'client':<20}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, latencies in results.items():
+        p95 = statistics.quantiles(latencies, n=20)[-1]
+        print(f"{name:<20}{statistics.mean(latencies):>10.2f}{statistics.median(latencies):>10.2f}{p95:>10.2f}")
+
+    saved = statistics.mean(results['bare requests.get']) - statistics.mean(results['pooled session'])
+    print(f"\nSaved per request by connection reuse: {saved:.2f} ms")
+
+if __name__ == "__main__":
+    main()
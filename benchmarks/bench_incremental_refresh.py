@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark: statistics-only refresh against a full refetch
+
+For a chart of N videos where a share are new since the last fetch,
+compares the bytes downloaded and the decode-plus-transform time of a
+full part=snippet,statistics,contentDetails refresh with the incremental
+one: part=statistics for the whole chart, merged into the held frame,
+plus full details for the new IDs only. Both are checked to produce the
+same frame. Payload sizes are for the synthetic items; real snippets
+carry longer descriptions, tags and five thumbnails, so the saving
+there is larger.
+
+The payload always shrinks, but CPU time only does on large charts or
+when no videos are new: new videos mean a second transform plus a merge,
+a fixed pandas cost of about 10 ms that outweighs one full transform
+below a few thousand videos.
+
+Usage: python benchmarks/bench_incremental_refresh.py [NEW_SHARE] [SIZES...]
+"""
+
+import gc
+import json
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import synthetic_payload
+from youtube_client import decode_json
+from youtube_fetcher import YouTubeFetcher, statistics_to_frame, videos_to_frame
+
+class PayloadFetcher(YouTubeFetcher):
+    """Answers videos.list by id from an in-memory response instead of the API"""
+    
+    def __init__(self, payload):
+        super().__init__(session=object())
+        self.payload = payload
+    
+    def _fetch_videos_by_id(self, video_ids, part='snippet,statistics,contentDetails'):
+        return decode_json(self.payload)['items']
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def main():
+    new_share = float(sys.argv[1]) if len(sys.argv) > 1 else 0.1
+    sizes = [int(arg) for arg in sys.argv[2:]] or [50, 750, 10_000]
+    
+    print(f"{new_share:.0%} of each chart is new since the previous fetch")
+    print(f"{'videos':>8}{'full KB':>10}{'incr KB':>10}{'saved':>8}{'full ms':>10}{'incr ms':>10}{'speedup':>9}")
+    for count in sizes:
+        items = json.loads(synthetic_payload(count))['items']
+        new = int(count * new_share)
+        full_payload = json.dumps({'items': items}).encode()
+        stats_payload = json.dumps({'items': [
+            {'id': item['id'], 'statistics': item['statistics']} for item in items
+        ]}).encode()
+        new_payload = json.dumps({'items': items[:new]}).encode()
+        held = videos_to_frame(items[new:], 'US', 'United States')
+        fetcher = PayloadFetcher(new_payload)
+        repeat = 20 if count <= 1_000 else 3
+        
+        full_seconds, expected = best_of(
+            lambda: videos_to_frame(decode_json(full_payload)['items'], 'US', 'United States'), repeat
+        )
+        
+        def incremental():
+            # New videos have to be fetched, not found in the detail cache from the previous repeat
+            fetcher.details.clear()
+            return fetcher._merge_held(held, statistics_to_frame(decode_json(stats_payload)['items']), 'US')
+        
+        incremental_seconds, actual = best_of(incremental, repeat)
+        columns = [column for column in expected.columns if column not in ('fetch_time', 'hours_since_published')]
+        pd.testing.assert_frame_equal(expected[columns], actual[columns])
+        
+        full_bytes = len(full_payload)
+        incremental_bytes = len(stats_payload) + len(new_payload)
+        print(f"{count:>8,}{full_bytes / 1024:>10.1f}{incremental_bytes / 1024:>10.1f}"
+              f"{1 - incremental_bytes / full_bytes:>8.0%}{full_seconds * 1000:>10.2f}"
+              f"{incremental_seconds * 1000:>10.2f}{full_seconds / incremental_seconds:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of the metrics instrumentation
+
+Times one counter increment, one span and one Prometheus scrape, then
+fetches every region's chart from the local fake API (no added latency)
+and compares the instrumentation calls that fetch made, at their
+measured cost, with the fetch itself.
+
+Usage: python benchmarks/bench_metrics.py [CALLS]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import FakeYouTubeServer
+from metrics import API_CACHE, API_REQUESTS, MetricsRegistry
+from quota import QuotaScheduler
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import YouTubeFetcher
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    registry = MetricsRegistry()
+    
+    def timed_span():
+        with registry.span('bench'):
+            pass
+    
+    inc = per_call(lambda: registry.inc(API_REQUESTS, endpoint='videos', status='200'), calls)
+    span = per_call(timed_span, calls)
+    print(f"counter increment   {inc * 1e6:8.2f} us")
+    print(f"span                {span * 1e6:8.2f} us")
+    
+    with tempfile.TemporaryDirectory() as root, FakeYouTubeServer() as server:
+        metrics = MetricsRegistry()
+        fetcher = YouTubeFetcher(create_http_session(), ResponseCache(Path(root) / 'responses.sqlite'),
+                                 QuotaScheduler(Path(root) / 'quota.sqlite'), server.base_url, metrics=metrics)
+        fetcher.set_api_key('offline')
+        started = time.perf_counter()
+        fetcher.fetch_all_regions()
+        fetch = time.perf_counter() - started
+    spans = sum(stage['calls'] for stage in metrics.stages())
+    # Each network request bumps four counters, each cache lookup one
+    increments = metrics.total(API_REQUESTS) * 4 + metrics.total(API_CACHE)
+    scrape = per_call(metrics.prometheus_text, 200)
+    overhead = spans * span + increments * inc
+    print(f"scrape              {scrape * 1e3:8.2f} ms ({len(metrics.prometheus_text().splitlines())} lines)")
+    print(f"\nAll-regions fetch: {fetch * 1000:.0f} ms with {spans} spans and {increments} increments, "
+          f"about {overhead * 1e6:.0f} us ({overhead / fetch:.3%}) of it instrumentation")
+
+if __name__ == "__main__":
+    main()
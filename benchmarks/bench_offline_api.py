@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: trending fetches against the local fake API, offline
+
+Starts fake_youtube.FakeYouTubeServer with a fixed per-request latency and
+fetches every region's chart through YouTubeFetcher three ways: cold
+(every request reaches the server), warm (fresh response-cache hits) and
+revalidated (stale entries answered 304 by ETag). Then repeats the cold
+fetch with injected 5xx, quota and timeout faults, twice with the same
+seed, to show that failure runs reproduce exactly; transient faults are
+retried, so most of them cost time rather than regions.
+
+Usage: python benchmarks/bench_offline_api.py [LATENCY_MS]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import FakeYouTubeServer
+from quota import QuotaScheduler
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import YouTubeFetcher
+
+MAX_RESULTS = 50
+
+def fetch_round(server, cache, timeout=None):
+    """(seconds, rows, {region: error}, server stats) for one fetch of every region's chart"""
+    fetcher = YouTubeFetcher(create_http_session(), cache, QuotaScheduler(), server.base_url)
+    fetcher.set_api_key('offline')
+    server.api.reset_stats()
+    started = time.perf_counter()
+    df, errors, timings = fetcher.fetch_all_regions(None, MAX_RESULTS)
+    return time.perf_counter() - started, len(df), errors, server.api.stats()
+
+def main():
+    latency = (int(sys.argv[1]) if len(sys.argv) > 1 else 100) / 1000
+    print(f"{'run':<28}{'seconds':>9}{'rows':>7}{'requests':>10}{'304s':>6}{'errors':>8}")
+    
+    with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(latency=latency) as server:
+        cache = ResponseCache(Path(root) / 'responses.sqlite')
+        runs = [('cold', lambda: fetch_round(server, cache)), ('warm (fresh cache)', lambda: fetch_round(server, cache))]
+        for name, run in runs:
+            seconds, rows, errors, stats = run()
+            print(f"{name:<28}{seconds:>9.2f}{rows:>7}{sum(stats['requests'].values()):>10}{stats['not_modified']:>6}{len(errors):>8}")
+        cache.expire_all()
+        seconds, rows, errors, stats = fetch_round(server, cache)
+        print(f"{'revalidated (ETag, 304)':<28}{seconds:>9.2f}{rows:>7}{sum(stats['requests'].values()):>10}{stats['not_modified']:>6}{len(errors):>8}")
+    
+    faults = dict(latency=latency, server_error_rate=0.15, quota_error_rate=0.05, timeout_rate=0.05, hang_seconds=20, seed=7)
+    outcomes = []
+    for attempt in (1, 2):
+        with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(**faults) as server:
+            seconds, rows, errors, stats = fetch_round(server, ResponseCache(Path(root) / 'responses.sqlite'))
+            print(f"{f'faults, seed 7, run {attempt}':<28}{seconds:>9.2f}{rows:>7}{sum(stats['requests'].values()):>10}{stats['not_modified']:>6}{len(errors):>8}")
+            outcomes.append((sorted(errors), stats['injected']))
+    print(f"\nInjected faults: {outcomes[0][1]}; failing regions {', '.join(outcomes[0][0]) or 'none'}")
+    print(f"Both fault runs failed the same regions the same way: {outcomes[0] == outcomes[1]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: server CPU per auto-refresh cycle
+
+Fills a temporary snapshot store with synthetic trending frames and runs
+the dashboard on "Collected Snapshots" under AppTest, so no API key or
+network is needed. Compares the script thread's CPU for the old cycle (a
+full rerun that rebuilds every chart and export) with the dashboard
+fragment's own CPU when the timer finds the data unchanged, and checks
+that the content hash notices a changed count.
+
+Usage: python benchmarks/bench_refresh_cpu.py [ITEMS_PER_REGION] [CYCLES]
+"""
+
+import json
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from streamlit.testing.v1 import AppTest
+
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import content_hash
+from snapshots import SOURCE_TRENDING, SnapshotStore
+from youtube_fetcher import REGIONS, videos_to_frame
+
+def dashboard_script(app_path):
+    """Run app.py the way Streamlit does, timing the script thread"""
+    import runpy
+    import time
+    import streamlit as st
+    started = time.thread_time()
+    runpy.run_path(app_path, run_name='__main__')
+    st.session_state['script_cpu'] = time.thread_time() - started
+
+def fill_store(root, per_region):
+    items = json.loads(synthetic_payload(per_region))['items']
+    store = SnapshotStore(root)
+    frames = []
+    for code, name in list(REGIONS.items())[:4]:
+        df = videos_to_frame(items, code, name, CATEGORY_NAMES)
+        store.append(df, SOURCE_TRENDING)
+        frames.append(df)
+    return frames
+
+def main():
+    per_region = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    
+    with tempfile.TemporaryDirectory() as root:
+        frames = fill_store(root, per_region)
+        at = AppTest.from_function(dashboard_script, args=(str(ROOT / 'app.py'),), default_timeout=120)
+        at.secrets['SNAPSHOT_DIR'] = root
+        at.run()
+        at.sidebar.radio[0].set_value("Collected Snapshots")
+        at.run()
+        if at.exception:
+            raise SystemExit(at.exception[0].value)
+        
+        full_rerun = []
+        for _ in range(cycles):
+            # Forgetting the hash makes the dashboard rebuild everything, as every old cycle did
+            at.session_state['dashboard_hash'] = None
+            at.run()
+            full_rerun.append(at.session_state['script_cpu'])
+        
+        unchanged = []
+        for _ in range(cycles):
+            at.run()
+            unchanged.append(at.session_state['dashboard_cpu'])
+    
+    rows = sum(len(df) for df in frames)
+    changed = frames[0].copy()
+    changed.loc[0, 'views'] += 1
+    print(f"{rows:,} rows, median of {cycles} cycles")
+    print(f"{'cycle':<44}{'CPU ms':>10}")
+    print(f"{'full rerun, charts rebuilt (before)':<44}{statistics.median(full_rerun) * 1000:>10.1f}")
+    print(f"{'dashboard fragment, data unchanged (after)':<44}{statistics.median(unchanged) * 1000:>10.1f}")
+    print(f"\nContent hash notices a changed count: {content_hash(changed) != content_hash(frames[0])}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Load test: upstream API calls per minute with N dashboard sessions
+
+Simulates N sessions watching the same US trending page against the local
+fake API. Every session reruns on the auto-refresh interval, and each rerun
+does what the dashboard does: check the API key, then fetch the chart
+through the response cache. Two setups are compared:
+
+- per-session: a new fetcher every rerun, as the dashboard used to build
+  one. The key is checked on every rerun, and identical requests from
+  different sessions each go upstream.
+- shared: one process-wide fetcher. Key checks are remembered, and
+  identical requests in flight at once share one call.
+
+Sessions either rerun spread across the interval ("staggered") or all at
+once ("aligned"), e.g. when a deploy reconnects everyone. Time runs
+--speedup times faster than real: the refresh interval (30 s), the chart's
+cache TTL (300 s) and the API latency are all scaled, so the simulated
+minutes take seconds. Calls are reported per simulated minute.
+
+Usage: python benchmarks/bench_sessions.py [--sessions 1,10,30] [--minutes 10] [--speedup 60] [--latency-ms 150]
+"""
+
+import argparse
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from categories import CategoryRegistry
+from fake_youtube import FakeYouTubeServer
+from metrics import API_COALESCED, MetricsRegistry
+from quota import QuotaScheduler
+from singleflight import SingleFlight
+from video_details import VideoDetailCache
+from youtube_client import DEFAULT_TTLS, ResponseCache, create_http_session
+from youtube_fetcher import YouTubeFetcher
+
+# The dashboard's auto-refresh interval (seconds, real time)
+REFRESH_SECONDS = 30
+
+MAX_RESULTS = 50
+
+def run(server, sessions, setup, aligned, minutes, speedup):
+    """(upstream calls, calls shared with one in flight) for one simulated run"""
+    interval = REFRESH_SECONDS / speedup
+    with tempfile.TemporaryDirectory() as root:
+        session = create_http_session()
+        cache = ResponseCache(Path(root) / 'responses.sqlite', ttls={'videos': DEFAULT_TTLS['videos'] / speedup})
+        scheduler = QuotaScheduler(Path(root) / 'quota.sqlite', daily_budget=10 ** 9, minute_budget=10 ** 9)
+        metrics = MetricsRegistry()
+        # What the dashboard already shared between sessions before
+        shared = dict(categories=CategoryRegistry(), held_frames={}, details=VideoDetailCache(), metrics=metrics)
+        
+        def new_fetcher(flights=None):
+            fetcher = YouTubeFetcher(session, cache, scheduler, server.base_url, flights=flights, **shared)
+            fetcher.set_api_key('offline')
+            return fetcher
+        
+        process_fetcher = new_fetcher(SingleFlight())
+        get_fetcher = (lambda: process_fetcher) if setup == 'shared' else new_fetcher
+        
+        server.api.reset_stats()
+        started = time.monotonic()
+        deadline = started + minutes * 60 / speedup
+        
+        def watch(index):
+            next_run = started + (0 if aligned else interval * index / sessions)
+            while next_run < deadline:
+                time.sleep(max(0.0, next_run - time.monotonic()))
+                fetcher = get_fetcher()
+                fetcher.test_api_connection()
+                fetcher.fetch_trending_videos('US', None, MAX_RESULTS)
+                next_run += interval
+        
+        threads = [threading.Thread(target=watch, args=(index,)) for index in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sum(server.api.stats()['requests'].values()), metrics.total(API_COALESCED)
+
+def main():
+    parser = argparse.ArgumentParser(description="Upstream API calls per minute with N simulated dashboard sessions")
+    parser.add_argument('--sessions', default='1,10,30', help="Comma-separated session counts")
+    parser.add_argument('--minutes', type=float, default=10, help="Simulated minutes per run")
+    parser.add_argument('--speedup', type=float, default=60, help="How much faster than real time the simulation runs")
+    parser.add_argument('--latency-ms', type=float, default=150, help="Real API latency, scaled like the clock")
+    args = parser.parse_args()
+    
+    print(f"{'sessions':>8}  {'reruns':<10}{'setup':<13}{'calls/min':>10}{'coalesced':>11}")
+    with FakeYouTubeServer(latency=args.latency_ms / 1000 / args.speedup) as server:
+        for sessions in [int(count) for count in args.sessions.split(',') if count]:
+            for aligned in (False, True):
+                for setup in ('per-session', 'shared'):
+                    calls, coalesced = run(server, sessions, setup, aligned, args.minutes, args.speedup)
+                    print(f"{sessions:>8}  {'aligned' if aligned else 'staggered':<10}{setup:<13}"
+                          f"{calls / args.minutes:>10.1f}{coalesced:>11}")
+
+if __name__ == "__main__":
+    main()
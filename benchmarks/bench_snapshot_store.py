@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: snapshot store read latency at a million rows
+
+Builds a synthetic ~1M-row history (every region, one snapshot every 30
+minutes, 100 videos each, two weeks) through SnapshotStore.append, then
+times the dashboard's typical query - "US, last 7 days, views+likes only" - with partition
+pruning, pushdown and projection against a naive read-everything-then-
+filter, before and after compaction.
+
+Usage: python benchmarks/bench_snapshot_store.py [DAYS] [ROWS_PER_SNAPSHOT]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from snapshots import SOURCE_TRENDING, SnapshotStore
+from youtube_fetcher import REGIONS
+
+SNAPSHOTS_PER_DAY = 48
+
+def make_frame(rng, snapshot_index, rows):
+    """One fetch of every region, with counters that grow between snapshots"""
+    frames = []
+    for region_code in REGIONS:
+        ids = rng.choice(rows * 4, rows, replace=False)
+        views = (ids + 1) * 1_000 + snapshot_index * rng.integers(50, 500, rows)
+        frames.append(pd.DataFrame({
+            'video_id': [f'{region_code}{i:06d}' for i in ids],
+            'title': [f'Video {i}' for i in ids],
+            'channel_title': [f'Channel {i % 97}' for i in ids],
+            'category_id': (ids % 10).astype(str),
+            'category_name': [f'Category {i % 10}' for i in ids],
+            'published_at': pd.Timestamp('2024-01-01', tz='UTC'),
+            'views': views,
+            'likes': views // 40,
+            'comments': views // 400,
+            'duration': 'PT4M13S',
+            'region': region_code,
+            'region_name': REGIONS[region_code],
+            'thumbnail': '',
+            'description': '',
+            'video_url': [f'https://www.youtube.com/watch?v={region_code}{i:06d}' for i in ids],
+            'fetch_time': pd.Timestamp.now(),
+            'engagement_rate': 2.75,
+            'comment_rate': 0.25,
+            'hours_since_published': 12.0,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+def build_history(store, days, rows):
+    rng = np.random.default_rng(7)
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    for index in range(days * SNAPSHOTS_PER_DAY):
+        snapshot_time = start + timedelta(minutes=30 * index)
+        store.append(make_frame(rng, index, rows), SOURCE_TRENDING, snapshot_time=snapshot_time)
+
+def time_call(func, repeat=5):
+    """Return (median seconds, last result)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+def run_queries(store):
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+
+    def pushdown():
+        return store.read(['US'], start=since, columns=['snapshot_time', 'video_id', 'views', 'likes'])
+
+    def naive():
+        df = store.read()
+        df = df[(df['region'] == 'US') & (df['snapshot_time'] >= since)]
+        return df[['snapshot_time', 'video_id', 'views', 'likes']]
+
+    results = {}
+    # Scanning thousands of small files is slow enough that one run tells the story
+    results['full scan (all columns)'] = time_call(store.read, repeat=1)
+    results['naive read-all then filter'] = time_call(naive, repeat=1)
+    results['US, 7 days, views+likes'] = time_call(pushdown)
+    return results
+
+def report(title, results, files):
+    print(f"\n{title} ({files:,} files)")
+    print(f"{'query':<30}{'rows':>12}{'median s':>12}")
+    for name, (seconds, df) in results.items():
+        print(f"{name:<30}{len(df):>12,}{seconds:>12.3f}")
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 14
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SnapshotStore(tmp)
+
+        started = time.perf_counter()
+        build_history(store, days, rows)
+        total = days * SNAPSHOTS_PER_DAY * len(REGIONS) * rows
+        print(f"Wrote {total:,} rows ({days} days x {SNAPSHOTS_PER_DAY} snapshots x "
+              f"{len(REGIONS)} regions x {rows} videos) in {time.perf_counter() - started:.1f}s")
+
+        report("Before compaction", run_queries(store), store.file_count())
+
+        started = time.perf_counter()
+        partitions, removed = store.compact(include_today=True)
+        print(f"\nCompacted {partitions:,} partitions ({removed:,} files) in {time.perf_counter() - started:.1f}s")
+
+        report("After compaction", run_queries(store), store.file_count())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: the dashboard's data path at 50 to 1M rows
+
+Builds seeded synthetic videos.list and search.list payloads with
+fake_youtube.synthetic_payload (same seed and clock, same bytes), then
+times every stage a dashboard render goes through: response decoding,
+the transform to a frame, hours since published, category labels across
+regions, the content hash, the tab aggregates (channel totals, category
+counts, engagement by category, top-video rankings) and each export
+format. Results go to a JSON file per commit so runs can be compared:
+
+    python benchmarks/bench_suite.py                    # writes benchmarks/results/<commit>.json
+    python benchmarks/bench_suite.py --compare benchmarks/results/abc1234.json
+    python benchmarks/bench_suite.py --compare OLD.json NEW.json   # compare two files, no run
+
+The full run takes about ten minutes on one core, and the 1M scale needs
+about 6 GB of memory, most of it the decoded response.
+
+A case is a regression when it is more than --tolerance slower than the
+baseline and took at least MIN_COMPARED_SECONDS there; comparing exits
+with status 1 if any case regressed.
+
+Usage: python benchmarks/bench_suite.py [--scales 50,10000] [--cases transform,aggregates] [--output FILE]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregates import DatasetAggregates
+from categories import CategoryRegistry
+from exports import EXPORT_FORMATS, export_file
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import content_hash
+from youtube_client import decode_json, orjson
+from youtube_fetcher import REGIONS, calculate_hours_since_published, videos_to_frame
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_SCALES = [50, 1_000, 10_000, 100_000, 1_000_000]
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# Fixed generator inputs, so every run times the same payloads
+SEED = 0
+CLOCK = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+DEFAULT_TOLERANCE = 0.25
+
+# Cases faster than this in the baseline are too noisy to call regressions
+MIN_COMPARED_SECONDS = 0.001
+
+def repeats_for(rows):
+    """Timed runs per case; the best one is the result"""
+    return 7 if rows <= 10_000 else 3 if rows <= 100_000 else 1
+
+def timed(func, repeat):
+    """(best seconds, median seconds, last result) over repeat runs"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        result = None  # Only one run's output is alive at a time
+        gc.collect()
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+    return min(times), statistics.median(times), result
+
+def labelled_regions(df):
+    """df with its rows spread across every region, and a registry with their categories"""
+    registry = CategoryRegistry()
+    registry.load(lambda code: dict(CATEGORY_NAMES), list(REGIONS))
+    df = df.copy()
+    df['region'] = pd.Categorical(np.resize(np.array(list(REGIONS)), len(df)))
+    return df, registry
+
+def run_scale(rows, cases):
+    """{case: (best, median, repeat)} for one scale; cases filters by name prefix"""
+    repeat = repeats_for(rows)
+    results = {}
+    
+    def measure(name, func):
+        if cases and not any(name.startswith(case) for case in cases):
+            return None
+        best, median, result = timed(func, repeat)
+        results[name] = (best, median, repeat)
+        return result
+    
+    search = synthetic_payload(rows, 'search', SEED, CLOCK)
+    measure('search_parse', lambda: [item['id']['videoId'] for item in decode_json(search)['items']])
+    del search
+    payload = synthetic_payload(rows, 'videos', SEED, CLOCK)
+    decoded = measure('decode', lambda: decode_json(payload))
+    items = (decoded or decode_json(payload))['items']
+    del payload, decoded
+    
+    df = videos_to_frame(items, 'US', 'United States')
+    measure('transform', lambda: videos_to_frame(items, 'US', 'United States'))
+    del items
+    measure('hours_since_published', lambda: calculate_hours_since_published(df['published_at']))
+    regional, registry = labelled_regions(df)
+    measure('category_labels', lambda: registry.label(regional.copy()))
+    df = registry.label(regional)
+    del regional
+    
+    measure('content_hash', lambda: content_hash(df))
+    aggregates = DatasetAggregates(df)
+    measure('aggregates_build', lambda: DatasetAggregates(df, aggregates.fingerprint))
+    measure('aggregates_channels', lambda: aggregates.top_channels())
+    measure('aggregates_categories', lambda: (aggregates.top_categories(), aggregates.engagement_by_category()))
+    measure('aggregates_top_videos', lambda: [
+        aggregates.top_videos(df, column, ascending=ascending)
+        for column in ('views', 'likes', 'engagement_rate') for ascending in (False, True)
+    ])
+    
+    for fmt in EXPORT_FORMATS:
+        name = 'export_' + fmt.lower().replace(' ', '_').replace('(', '').replace(')', '')
+        export = measure(name, lambda: export_file(df, fmt))
+        if export is not None:
+            export.close()
+    return results
+
+def git_revision():
+    """Short commit of the tree being measured, marked -dirty with local changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pa.__version__,
+        'orjson': getattr(orjson, '__version__', None) if orjson is not None else None,
+    }
+
+def load_results(path):
+    """{(case, rows): best seconds} from a results file"""
+    with open(path) as fh:
+        data = json.load(fh)
+    return data, {(result['case'], result['rows']): result['seconds'] for result in data['results']}
+
+def compare(baseline_path, current_path, tolerance):
+    """Print current vs baseline per case; returns the number of regressions"""
+    baseline_data, baseline = load_results(baseline_path)
+    current_data, current = load_results(current_path)
+    print(f"\n{baseline_data['revision']} -> {current_data['revision']} (regression: > {tolerance:.0%} slower)")
+    print(f"{'case':<26}{'rows':>10}{'before s':>11}{'after s':>11}{'change':>9}")
+    regressions = 0
+    for key in sorted(current, key=lambda key: (key[1], key[0])):
+        if key not in baseline:
+            continue
+        before, after = baseline[key], current[key]
+        change = after / before - 1 if before else 0.0
+        regressed = before >= MIN_COMPARED_SECONDS and change > tolerance
+        regressions += regressed
+        print(f"{key[0]:<26}{key[1]:>10,}{before:>11.4f}{after:>11.4f}{change:>+9.0%}{'  REGRESSION' if regressed else ''}")
+    print(f"\n{regressions} regression(s)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the dashboard's data path at several scales")
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help="Comma-separated row counts")
+    parser.add_argument('--cases', default='', help="Comma-separated case name prefixes to run (default: all)")
+    parser.add_argument('--output', help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument('--compare', nargs='+', metavar='RESULTS', help="Baseline file, and optionally a second file instead of running")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+    
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one more results file")
+    if args.compare and len(args.compare) == 2:
+        return 1 if compare(args.compare[0], args.compare[1], args.tolerance) else 0
+    
+    scales = [int(scale) for scale in args.scales.split(',') if scale]
+    cases = [case for case in args.cases.split(',') if case]
+    revision = git_revision()
+    results = []
+    print(f"{'case':<26}{'rows':>10}{'best s':>11}{'median s':>11}{'runs':>6}")
+    for rows in scales:
+        for case, (best, median, repeat) in run_scale(rows, cases).items():
+            results.append({'case': case, 'rows': rows, 'seconds': best, 'median_seconds': median, 'repeat': repeat})
+            print(f"{case:<26}{rows:>10,}{best:>11.4f}{median:>11.4f}{repeat:>6}")
+    
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{revision}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump({
+            'revision': revision,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'seed': SEED,
+            'environment': environment(),
+            'results': results,
+        }, fh, indent=1)
+    print(f"\nWrote {output}")
+    
+    if args.compare:
+        return 1 if compare(args.compare[0], output, args.tolerance) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
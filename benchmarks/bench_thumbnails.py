@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Video Gallery thumbnails, remote URLs vs the local cache
+
+Serves 320x180 JPEG thumbnails (the size of YouTube's mqdefault) from a
+local stand-in that adds a fixed latency per request, then compares, at
+several latencies, getting the 20 images of one gallery render from the
+remote host (six at a time, like a browser) with reading them from a
+ThumbnailCache that prefetched the gallery's candidates in the background.
+The first render, right after the prefetch starts, is timed too: it must
+not wait on the network, so images not stored yet come back as their URLs.
+Also reports the bytes per image before and after resizing.
+
+Usage: python benchmarks/bench_thumbnails.py [LATENCY_MS...]
+"""
+
+import io
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from thumbnails import Image, ThumbnailCache
+from youtube_client import create_http_session
+
+# Images in one gallery render and candidates prefetched for every sort order
+GALLERY_IMAGES = 20
+CANDIDATES = 160
+
+# Connections a browser opens to one host
+BROWSER_CONNECTIONS = 6
+
+def make_jpeg():
+    """A noisy 320x180 JPEG, or stand-in bytes of a typical size without Pillow"""
+    if Image is None:
+        return bytes(range(256)) * 64
+    image = Image.effect_noise((320, 180), 64).convert('RGB')
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=90)
+    return output.getvalue()
+
+JPEG = make_jpeg()
+
+class ThumbnailHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(JPEG)))
+        self.end_headers()
+        self.wfile.write(JPEG)
+    
+    def log_message(self, format, *args):
+        pass
+
+def remote_gallery(session, urls):
+    """Seconds to pull one gallery's images from the host, BROWSER_CONNECTIONS at a time"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS) as executor:
+        list(executor.map(lambda url: session.get(url, timeout=10).content, urls))
+    return time.perf_counter() - started
+
+def cached_gallery(cache, urls):
+    """(seconds, images served from local bytes) for one gallery render from the cache"""
+    started = time.perf_counter()
+    images = [cache.image(url) for url in urls]
+    return time.perf_counter() - started, sum(isinstance(image, bytes) for image in images)
+
+def local_gallery(cache, urls):
+    seconds, local = cached_gallery(cache, urls)
+    assert local == len(urls)
+    return seconds
+
+def main():
+    latencies = [int(arg) for arg in sys.argv[1:]] or [0, 50, 200]
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThumbnailHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}/vi"
+    session = create_http_session()
+    
+    print(f"{'latency ms':>10}{'remote ms':>11}{'first render ms':>17}{'prefetch ms':>13}{'local ms':>10}")
+    for latency in latencies:
+        ThumbnailHandler.latency = latency / 1000
+        urls = [f"{base}/{latency}-{i:04d}/mqdefault.jpg" for i in range(CANDIDATES)]
+        gallery = urls[:GALLERY_IMAGES]
+        remote = statistics.median(remote_gallery(session, gallery) for _ in range(3))
+        
+        with tempfile.TemporaryDirectory() as root:
+            cache = ThumbnailCache(session, root=root)
+            started = time.perf_counter()
+            futures = cache.prefetch(urls)
+            first, first_local = cached_gallery(cache, gallery)
+            wait(futures)
+            prefetch = time.perf_counter() - started
+            local = statistics.median(local_gallery(cache, gallery) for _ in range(3))
+            stats = cache.stats()
+        first_label = f"{first * 1000:.1f} ({first_local}/{len(gallery)})"
+        print(f"{latency:>10}{remote * 1000:>11.1f}{first_label:>17}{prefetch * 1000:>13.0f}{local * 1000:>10.1f}")
+    
+    server.shutdown()
+    resized = 'resized to 120px' if Image is not None else 'stored as served, Pillow is not installed'
+    # The stand-in serves one image under every URL, so the cache holds a single file
+    print(f"\nBytes per image: {len(JPEG):,} as served, {stats['bytes']:,} stored ({resized})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark: videos.list response to DataFrame
+
+Compares the previous per-item loop (one dict per video, fixed up
+afterwards, compacted for comparison only) with the columnar
+videos_to_frame at 50, 10k and 1M items from fake_youtube.synthetic_payload,
+the payload every benchmark uses, and response decoding with json and
+(when installed) orjson. Both transforms are checked to produce the same
+frame.
+
+Usage: python benchmarks/bench_transform.py [SIZES...]
+"""
+
+import gc
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import compact_frame
+from youtube_client import orjson
+from youtube_fetcher import calculate_hours_since_published, videos_to_frame
+
+def loop_transform(items, region_code, region_name, categories):
+    """The per-item loop the fetcher used before videos_to_frame"""
+    videos = []
+    for item in items:
+        video_data = {
+            'video_id': item['id'],
+            'title': item['snippet']['title'],
+            'channel_title': item['snippet']['channelTitle'],
+            'category_id': item['snippet']['categoryId'],
+            'published_at': item['snippet']['publishedAt'],
+            'views': int(item['statistics'].get('viewCount', 0)),
+            'likes': int(item['statistics'].get('likeCount', 0)),
+            'comments': int(item['statistics'].get('commentCount', 0)),
+            'duration': item['contentDetails']['duration'],
+            'region': region_code,
+            'region_name': region_name,
+            'thumbnail': item['snippet']['thumbnails']['medium']['url'],
+            'description': item['snippet']['description'][:200] + '...' if len(item['snippet']['description']) > 200 else item['snippet']['description'],
+            'video_url': f"https://www.youtube.com/watch?v={item['id']}"
+        }
+        videos.append(video_data)
+
+    df = pd.DataFrame(videos)
+    if not df.empty:
+        df['published_at'] = pd.to_datetime(df['published_at'], utc=True)
+        df['fetch_time'] = datetime.now()
+        df['category_name'] = df['category_id'].map(categories).fillna('Unknown')
+        df['engagement_rate'] = (df['likes'] / df['views'] * 100).fillna(0)
+        df['comment_rate'] = (df['comments'] / df['views'] * 100).fillna(0)
+        df['hours_since_published'] = calculate_hours_since_published(df['published_at'])
+    return df
+
+def timed(func, *args, repeat=1):
+    """Return (best seconds, last result)"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+def same_frame(a, b):
+    """Compare the loop's columns; videos_to_frame has added some since"""
+    a = compact_frame(a)
+    columns = [column for column in a.columns if column not in ('fetch_time', 'hours_since_published')]
+    pd.testing.assert_frame_equal(a[columns], b[columns], check_dtype=False)
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 10_000, 1_000_000]
+    decoders = {'json': json.loads}
+    if orjson is not None:
+        decoders['orjson'] = orjson.loads
+
+    header = ''.join(f"{name + ' s':>10}" for name in decoders)
+    print(f"{'items':>10}{header}{'loop s':>10}{'columnar s':>12}{'speedup':>9}")
+    for count in sizes:
+        payload = synthetic_payload(count)
+        repeat = 5 if count <= 100_000 else 1
+        decode_times = []
+        data = None
+        for loads in decoders.values():
+            # Drop the previous decode first; at 1M items each copy is gigabytes
+            data = None
+            seconds, data = timed(loads, payload, repeat=repeat)
+            decode_times.append(seconds)
+        items = data['items']
+        del payload, data
+
+        loop_seconds, expected = timed(loop_transform, items, 'US', 'United States', CATEGORY_NAMES, repeat=repeat)
+        columnar_seconds, actual = timed(videos_to_frame, items, 'US', 'United States', CATEGORY_NAMES, repeat=repeat)
+        same_frame(expected, actual)
+        del items, expected, actual
+
+        decode_columns = ''.join(f"{seconds:>10.4f}" for seconds in decode_times)
+        print(f"{count:>10,}{decode_columns}{loop_seconds:>10.4f}"
+              f"{columnar_seconds:>12.4f}{loop_seconds / columnar_seconds:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
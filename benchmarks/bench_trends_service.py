@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the trends service as a shared cache for many consumers
+
+Starts the fake YouTube API with a fixed latency and a trends service on
+top of it, then:
+
+- has N consumers ask for every region's chart at the same moment, cold,
+  and counts the requests that reached YouTube (one fetch's worth, however
+  many consumers)
+- times warm reads of that chart in each encoding: JSON and Arrow IPC,
+  plain and gzipped, from request to DataFrame on the consumer's side
+- times a paged read (100 rows per page) through TrendsServiceClient
+
+Usage: python benchmarks/bench_trends_service.py [CONSUMERS] [LATENCY_MS]
+"""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import FakeYouTubeServer
+from quota import QuotaScheduler
+from trends_service import ARROW_TYPE, TrendsServer, TrendsService, TrendsServiceClient
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import YouTubeFetcher
+
+READS = 20
+
+def best_of(func, repeat=READS):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+def main():
+    consumers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+    
+    with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(latency=latency) as youtube:
+        fetcher = YouTubeFetcher(create_http_session(), ResponseCache(Path(root) / 'responses.sqlite'),
+                                 QuotaScheduler(Path(root) / 'quota.sqlite'), youtube.base_url)
+        fetcher.set_api_key('offline')
+        with TrendsServer(TrendsService(fetcher), port=0) as service:
+            url = f"{service.base_url}/trending"
+            params = {'region': 'ALL'}
+            results = [None] * consumers
+            
+            def consume(index):
+                results[index] = requests.get(url, params=params).status_code
+            
+            threads = [threading.Thread(target=consume, args=(index,)) for index in range(consumers)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            cold = time.perf_counter() - started
+            upstream = sum(youtube.api.stats()['requests'].values())
+            print(f"{consumers} consumers at once, cold: {cold:.2f} s, {results.count(200)} answered, "
+                  f"{upstream} requests reached YouTube\n")
+            
+            session = requests.Session()
+            print(f"{'encoding':<16}{'bytes':>10}{'ms to frame':>13}")
+            encodings = [
+                ('JSON', {'Accept-Encoding': 'identity'}, 'json'),
+                ('JSON gzip', {'Accept-Encoding': 'gzip'}, 'json'),
+                ('Arrow', {'Accept-Encoding': 'identity', 'Accept': ARROW_TYPE}, 'arrow'),
+                ('Arrow gzip', {'Accept-Encoding': 'gzip', 'Accept': ARROW_TYPE}, 'arrow'),
+            ]
+            for name, headers, fmt in encodings:
+                def read():
+                    response = session.get(url, params=params, headers=headers)
+                    if fmt == 'arrow':
+                        return response, pa.ipc.open_stream(response.content).read_all().to_pandas()
+                    return response, pd.DataFrame(response.json()['items'])
+                
+                seconds, (response, frame) = best_of(read)
+                size = int(response.raw.headers.get('Content-Length', len(response.content)))
+                print(f"{name:<16}{size:>10,}{seconds * 1000:>13.1f}   ({len(frame)} rows)")
+            
+            client = TrendsServiceClient(service.base_url, page_size=100)
+            seconds, (frame, errors, timings) = best_of(lambda: client.fetch_all_regions())
+            print(f"\nPaged Arrow read through TrendsServiceClient: {seconds * 1000:.1f} ms for {len(frame)} rows "
+                  f"in {-(-len(frame) // 100)} pages")
+            print(f"Requests that reached YouTube in total: {sum(youtube.api.stats()['requests'].values())}")
+
+if __name__ == "__main__":
+    main()
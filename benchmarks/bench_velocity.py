@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: view velocity over millions of snapshot rows
+
+Times compute_velocity over a full synthetic history, an incremental
+VelocityTracker update for one new snapshot, and a per-video Python loop
+on a sample (extrapolated), and checks that the incremental rates match
+a full recompute.
+
+Usage: python benchmarks/bench_velocity.py [VIDEOS] [SNAPSHOTS]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from velocity import KEY_COLUMNS, VELOCITY_COLUMNS, VelocityTracker, compute_velocity
+
+def make_history(videos, snapshots):
+    """Every video in every half-hourly snapshot, with growth that speeds up"""
+    rng = np.random.default_rng(7)
+    times = pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(np.arange(snapshots) * 30, unit='min')
+    video = np.tile(np.arange(videos), snapshots)
+    step = np.repeat(np.arange(snapshots), videos)
+    growth = rng.integers(10, 1_000, videos)[video]
+    views = video * 1_000 + step * growth + step ** 2 * (growth // 10)
+    return pd.DataFrame({
+        'region': np.where(video % 2, 'US', 'GB'),
+        'video_id': pd.Series(video).map('v{:07d}'.format),
+        'snapshot_time': np.repeat(times, videos),
+        'views': views,
+        'likes': views // 40,
+    })
+
+def loop_velocity(history):
+    """Reference: one Python loop per video"""
+    rows = []
+    for key, group in history.groupby(KEY_COLUMNS, observed=True):
+        group = group.sort_values('snapshot_time')
+        previous = None
+        for row in group.itertuples():
+            if previous is not None:
+                hours = (row.snapshot_time - previous.snapshot_time).total_seconds() / 3600
+                rows.append((key, (row.views - previous.views) / hours))
+            previous = row
+    return rows
+
+def main():
+    videos = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    snapshots = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    history = make_history(videos, snapshots)
+    last_time = history['snapshot_time'].max()
+    print(f"{len(history):,} snapshot rows ({videos:,} videos x {snapshots} snapshots)")
+
+    started = time.perf_counter()
+    full = compute_velocity(history)
+    full_seconds = time.perf_counter() - started
+
+    tracker = VelocityTracker()
+    tracker.update(history[history['snapshot_time'] < last_time])
+    started = time.perf_counter()
+    tracker.update(history[history['snapshot_time'] == last_time])
+    incremental_seconds = time.perf_counter() - started
+
+    sample = history[history['video_id'].isin(history['video_id'].unique()[:200])]
+    started = time.perf_counter()
+    loop_velocity(sample)
+    loop_seconds = (time.perf_counter() - started) * videos / 200
+
+    print(f"{'method':<36}{'seconds':>10}")
+    print(f"{'vectorized full history':<36}{full_seconds:>10.3f}")
+    print(f"{'incremental, one new snapshot':<36}{incremental_seconds:>10.3f}")
+    print(f"{'per-video loop (extrapolated)':<36}{loop_seconds:>10.1f}")
+
+    expected = full.groupby(KEY_COLUMNS, observed=True).tail(1).set_index(KEY_COLUMNS)[VELOCITY_COLUMNS].sort_index()
+    actual = tracker.rates().set_index(KEY_COLUMNS)[VELOCITY_COLUMNS].sort_index()
+    matches = np.allclose(expected.to_numpy(dtype='float64'), actual.to_numpy(dtype='float64'), equal_nan=True)
+    print(f"\nIncremental rates match full recompute: {matches}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Check: compact frame layout stays well under the plain layout
+
+Builds frames with videos_to_frame for every region, combines them the
+way the All Regions view does, and reports bytes per row for the compact
+layout against plain strings, 64-bit numbers and stored URLs. Exits
+non-zero if the compact layout is not at least MIN_SAVING smaller or a
+column lost its compact dtype.
+
+Usage: python benchmarks/check_memory_footprint.py [ITEMS_PER_REGION]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import CATEGORY_NAMES, synthetic_payload
+from frames import CATEGORICAL_COLUMNS, NUMERIC_DTYPES, compact_frame, memory_footprint
+from youtube_fetcher import REGIONS, videos_to_frame
+
+# Smallest acceptable reduction against the plain layout
+MIN_SAVING = 0.3
+
+def main():
+    per_region = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    items = json.loads(synthetic_payload(per_region))['items']
+    frames = [videos_to_frame(items, code, name, CATEGORY_NAMES) for code, name in REGIONS.items()]
+    df = compact_frame(pd.concat(frames, ignore_index=True))
+
+    failures = []
+    for column in CATEGORICAL_COLUMNS:
+        if not isinstance(df[column].dtype, pd.CategoricalDtype):
+            failures.append(f"{column} is {df[column].dtype}, expected category")
+    for column, dtype in NUMERIC_DTYPES.items():
+        if str(df[column].dtype) != dtype:
+            failures.append(f"{column} is {df[column].dtype}, expected {dtype}")
+    if 'video_url' in df:
+        failures.append("video_url is stored")
+
+    footprint = memory_footprint(df)
+    print(f"{footprint['rows']:,} rows")
+    print(f"{'layout':<10}{'bytes':>14}{'bytes/row':>12}")
+    print(f"{'plain':<10}{footprint['loose_bytes']:>14,}{footprint['loose_bytes_per_row']:>12,.0f}")
+    print(f"{'compact':<10}{footprint['compact_bytes']:>14,}{footprint['compact_bytes_per_row']:>12,.0f}")
+    print(f"Saving: {footprint['saving']:.0%}")
+
+    if footprint['saving'] < MIN_SAVING:
+        failures.append(f"saving {footprint['saving']:.0%} is below {MIN_SAVING:.0%}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Check: the fetch, collect and serve paths on the installed pandas
+
+requirements.txt allows pandas back to 1.5, while development happens on
+the newest release. Against fake_youtube.FakeYouTubeServer this runs:
+
+- an all-regions fetch (category labels, compact frame, rates)
+- one collector round into a SnapshotStore, and reading it back
+- velocity across that round and a later one
+- the trends service's region=ALL chart as JSON and Arrow
+- every export format
+
+and fails on any exception or on a FutureWarning/DeprecationWarning raised
+from pandas. Run it in an environment holding the lowest versions
+requirements.txt allows, e.g.
+
+    pip install "pandas==1.5.3" "numpy==1.24.0" "pyarrow==10.0.1"
+
+Exits with status 1 if any check fails.
+
+Usage: python benchmarks/check_pandas_compat.py
+"""
+
+import json
+import sys
+import tempfile
+import traceback
+import warnings
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from collector import collect_once
+from exports import EXPORT_FORMATS, export_file
+from fake_youtube import FakeYouTubeServer
+from metrics import MetricsRegistry
+from quota import QuotaScheduler
+from snapshots import SnapshotStore
+from trends_service import ARROW_TYPE, TrendsService
+from velocity import VelocityTracker
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import REGIONS, YouTubeFetcher
+
+MAX_RESULTS = 50
+
+failed = []
+
+def check(name, func):
+    """Run one check; it fails on an exception, a falsy result or a pandas deprecation"""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        try:
+            ok, detail = func()
+        except Exception:
+            ok, detail = False, traceback.format_exc().strip().splitlines()[-1]
+    deprecations = [w for w in caught if issubclass(w.category, (FutureWarning, DeprecationWarning))
+                    and 'pandas' in str(w.filename) + str(w.message)]
+    if deprecations:
+        ok = False
+        detail = f"{deprecations[0].category.__name__}: {deprecations[0].message}"
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failed.append(name)
+
+def main():
+    print(f"pandas {pd.__version__}, numpy {np.__version__}, pyarrow {pa.__version__}\n")
+    with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(seed=1) as server:
+        fetcher = YouTubeFetcher(create_http_session(), ResponseCache(Path(root) / 'responses.sqlite'),
+                                 QuotaScheduler(Path(root) / 'quota.sqlite'), server.base_url,
+                                 metrics=MetricsRegistry())
+        fetcher.set_api_key('offline')
+        store = SnapshotStore(Path(root) / 'snapshots')
+        frames = {}
+        
+        def all_regions():
+            df, errors, timings = fetcher.fetch_all_regions(None, MAX_RESULTS)
+            frames['all'] = df
+            return not errors and set(df['region']) == set(REGIONS), f"{len(df)} rows"
+        
+        def collect():
+            fetcher.set_revalidate(True)
+            written, failures = collect_once(fetcher, store, list(REGIONS), [None], MAX_RESULTS)
+            latest, _ = store.latest()
+            frames['latest'] = latest
+            return not failures and len(latest) == len(frames['all']), f"{written} files, {len(latest)} latest rows"
+        
+        def velocity():
+            # A second round an hour later, with every video gaining views
+            later = frames['latest'].assign(views=frames['latest']['views'] + 100)
+            store.append(later, snapshot_time=datetime.now(timezone.utc) + timedelta(hours=1))
+            tracker = VelocityTracker()
+            tracker.update(store.read(columns=['region', 'video_id', 'snapshot_time', 'views', 'likes']))
+            rates = tracker.rates()['views_per_hour']
+            return bool(np.isclose(rates, 100, rtol=0.01).all()), f"{len(rates)} videos"
+        
+        def service():
+            service = TrendsService(fetcher, metrics=MetricsRegistry())
+            status, _, body = service.handle('/v1/trending', {'region': 'ALL'}, accept_encoding='identity')
+            rows = len(json.loads(body)['items']) if status == 200 else 0
+            arrow_status, _, arrow_body = service.handle('/v1/trending', {'region': 'ALL'}, ARROW_TYPE, 'identity')
+            table = pa.ipc.open_stream(arrow_body).read_all() if arrow_status == 200 else None
+            return status == 200 and arrow_status == 200 and table.num_rows > 0, f"{rows} rows, HTTP {status}/{arrow_status}"
+        
+        def exports():
+            sizes = {fmt: len(export_file(frames['all'], fmt).getvalue()) for fmt in EXPORT_FORMATS}
+            return all(sizes.values()), ', '.join(f"{fmt} {size:,} B" for fmt, size in sizes.items())
+        
+        check("all-regions fetch", all_regions)
+        if 'all' in frames:
+            check("collector rounds into the snapshot store", collect)
+            if 'latest' in frames:
+                check("velocity across two rounds", velocity)
+            check("trends service region=ALL, JSON and Arrow", service)
+            check("exports", exports)
+    
+    print(f"\n{len(failed)} check(s) failed" if failed else "\nAll checks passed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check: retries, circuit breakers and stale serving against injected faults
+
+Runs YouTubeFetcher against fake_youtube.FakeYouTubeServer with seeded
+faults and checks that:
+
+- transient 5xx responses fail regions without retries, and retries
+  recover most of them
+- dropped connections are retried the same way
+- an exhausted quota is not retried, opens the videos breaker, and every
+  region is then served from stale cached responses, marked as such,
+  without further requests reaching the server
+- once the cooldown passes, one probe closes the breaker and fetches are
+  fresh again
+
+Backoff delays are shrunk and the breakers run on a fake clock, so the
+whole check takes a few seconds. Exits with status 1 if any check fails.
+
+Usage: python benchmarks/check_resilience.py [SEED]
+"""
+
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_youtube import FakeYouTubeServer
+from metrics import API_RETRIES, API_STALE, MetricsRegistry
+from quota import QuotaScheduler
+from resilience import CLOSED, OPEN, CircuitBreakers, RetryPolicy
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import REGIONS, YouTubeFetcher
+
+MAX_RESULTS = 50
+
+failed = []
+
+def check(name, ok, detail=''):
+    print(f"{'ok  ' if ok else 'FAIL'} {name}{f' ({detail})' if detail else ''}")
+    if not ok:
+        failed.append(name)
+
+def make_fetcher(server, root, seed, attempts=3, breakers=None):
+    """Fetcher on its own cache and metrics, with millisecond backoff"""
+    retry = RetryPolicy(attempts, base_delay=0.01, max_delay=0.05, rng=random.Random(seed))
+    fetcher = YouTubeFetcher(create_http_session(), ResponseCache(Path(root) / 'responses.sqlite'),
+                             QuotaScheduler(Path(root) / 'quota.sqlite'), server.base_url,
+                             metrics=MetricsRegistry(), breakers=breakers or CircuitBreakers(), retry=retry)
+    fetcher.set_api_key('offline')
+    return fetcher
+
+def transient_faults(seed, **faults):
+    """{region: error} for an all-regions fetch without and with retries"""
+    outcomes = []
+    for attempts in (1, 3):
+        with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(seed=seed, hang_seconds=0.05, **faults) as server:
+            fetcher = make_fetcher(server, root, seed, attempts)
+            df, errors, timings = fetcher.fetch_all_regions(None, MAX_RESULTS)
+            outcomes.append((errors, fetcher.metrics.total(API_RETRIES)))
+    return outcomes
+
+def main():
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    
+    (plain, _), (retried, retries) = transient_faults(seed, server_error_rate=0.4)
+    check("5xx fail regions without retries", len(plain) > 0, f"{len(plain)} failed")
+    check("5xx are retried", len(retried) < len(plain) and retries > 0, f"{len(retried)} failed after {retries} retries")
+    
+    (plain, _), (retried, retries) = transient_faults(seed, timeout_rate=0.4)
+    check("dropped connections fail regions without retries", len(plain) > 0, f"{len(plain)} failed")
+    check("dropped connections are retried", len(retried) < len(plain) and retries > 0, f"{len(retried)} failed after {retries} retries")
+    
+    now = [0.0]
+    breakers = CircuitBreakers(clock=lambda: now[0])
+    with tempfile.TemporaryDirectory() as root, FakeYouTubeServer(seed=seed) as server:
+        fetcher = make_fetcher(server, root, seed, breakers=breakers)
+        fetcher.fetch_all_regions(None, MAX_RESULTS)
+        # The second fetch only refreshes statistics, and caches those responses too
+        fresh, errors, _ = fetcher.fetch_all_regions(None, MAX_RESULTS)
+        check("fault-free fetch is fresh", not errors and 'stale_since' not in fresh.attrs, f"{len(fresh)} rows")
+        
+        # Every cached chart is due for revalidation, and the quota is gone
+        fetcher.client.cache.expire_all()
+        server.api.reset_stats()
+        server.api.quota_units = 0
+        stale, errors, timings = fetcher.fetch_all_regions(None, MAX_RESULTS)
+        sent = server.api.stats()['requests'].get('videos', 0)
+        check("quota errors are not retried", fetcher.metrics.total(API_RETRIES, reason='403') == 0)
+        check("exhausted quota opens the breaker", breakers.get('videos').state == OPEN,
+              f"{sent} of {len(REGIONS)} regions reached the server")
+        check("every region is served stale", not errors and set(timings['stale_regions']) == set(REGIONS)
+              and fetcher.metrics.total(API_STALE) == len(REGIONS), f"{fetcher.metrics.total(API_STALE)} stale responses")
+        check("stale frame is marked and matches the cache", 'stale_since' in stale.attrs and len(stale) == len(fresh))
+        
+        server.api.reset_stats()
+        fetcher.fetch_all_regions(None, MAX_RESULTS)
+        check("open breaker keeps requests off the server", not server.api.stats()['requests'])
+        
+        # Quota is back and the cooldown has passed: one probe, then fresh fetches
+        server.api.quota_units = None
+        now[0] += breakers.get('videos').retry_in() + 1
+        probe = fetcher.fetch_trending_videos('US', None, MAX_RESULTS)
+        recovered, errors, timings = fetcher.fetch_all_regions(None, MAX_RESULTS)
+        check("probe closes the breaker", breakers.get('videos').state == CLOSED and 'stale_since' not in probe.attrs)
+        check("fetches are fresh again", not errors and not timings['stale_regions'] and 'stale_since' not in recovered.attrs)
+    
+    print(f"\n{len(failed)} check(s) failed" if failed else "\nAll checks passed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Process-wide registry of video categories for every region
+
+videoCategories barely ever changes, so each region is fetched once (all
+regions concurrently) and kept for CATEGORY_TTL. Lookups in either
+direction are dictionary hits, and frames are labelled with a single
+merge against one (region, category_id, category_name) table.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# Categories are re-fetched after a week; the response cache keeps them as long
+CATEGORY_TTL = 7 * 24 * 3600
+
+# A region that failed to load is not retried for this long (seconds)
+FAILED_RETRY_AFTER = 300
+
+UNKNOWN_CATEGORY = 'Unknown'
+
+# Upper bound on concurrent videoCategories requests
+MAX_CATEGORY_WORKERS = 8
+
+class CategoryRegistry:
+    """id -> name and name -> id maps per region, loaded concurrently and shared across sessions"""
+    
+    def __init__(self, ttl=CATEGORY_TTL):
+        self.ttl = ttl
+        self._names = {}
+        self._ids = {}
+        self._loaded_at = {}
+        self._failed_at = {}
+        self._table = None
+        self._lock = threading.Lock()
+    
+    def load(self, fetch, regions, max_workers=MAX_CATEGORY_WORKERS):
+        """Fetch every region that is missing or expired, concurrently
+        
+        fetch(region_code) returns {category_id: name} or raises. Failed
+        regions are left out and retried after FAILED_RETRY_AFTER. Returns
+        {region: error message}.
+        """
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                code for code in regions
+                if now - self._loaded_at.get(code, -self.ttl) >= self.ttl
+                and now - self._failed_at.get(code, -FAILED_RETRY_AFTER) >= FAILED_RETRY_AFTER
+            ]
+        if not stale:
+            return {}
+        
+        def fetch_region(region_code):
+            try:
+                return region_code, fetch(region_code), None
+            except Exception as e:
+                return region_code, None, str(e)
+        
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stale)))) as executor:
+            results = list(executor.map(fetch_region, stale))
+        
+        with self._lock:
+            for region_code, names, error in results:
+                if error:
+                    errors[region_code] = error
+                    self._failed_at[region_code] = now
+                    continue
+                self._names[region_code] = dict(names)
+                self._ids[region_code] = {name: category_id for category_id, name in names.items()}
+                self._loaded_at[region_code] = now
+            self._table = None
+        return errors
+    
+    def names(self, region_code):
+        """{category_id: name} for a region, empty if it is not loaded"""
+        return dict(self._names.get(region_code, {}))
+    
+    def name_of(self, region_code, category_id, default=UNKNOWN_CATEGORY):
+        return self._names.get(region_code, {}).get(category_id, default)
+    
+    def id_of(self, region_code, name):
+        """Category id for a name in a region, or None"""
+        return self._ids.get(region_code, {}).get(name)
+    
+    def is_loaded(self, region_code):
+        return region_code in self._names
+    
+    def table(self):
+        """All loaded categories as one (region, category_id, category_name) frame"""
+        with self._lock:
+            if self._table is None:
+                rows = [
+                    (region_code, category_id, name)
+                    for region_code, names in self._names.items()
+                    for category_id, name in names.items()
+                ]
+                self._table = pd.DataFrame(rows, columns=['region', 'category_id', 'category_name'])
+            return self._table
+    
+    def label(self, df):
+        """Add category_name to a frame of any mix of regions with one merge"""
+        if df.empty:
+            return df
+        df = df.drop(columns='category_name', errors='ignore')
+        table = self.table()
+        keys = df[['region', 'category_id']].astype(str)
+        names = keys.merge(table, on=['region', 'category_id'], how='left')['category_name']
+        df['category_name'] = names.fillna(UNKNOWN_CATEGORY).to_numpy()
+        return df
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Headless trending snapshot collector
+
+Polls the trending chart for a set of regions and categories on a fixed
+schedule and writes timestamped snapshots that the dashboard reads from
+its "Collected Snapshots" source without touching the network.
+
+Usage:
+    youtube-trends-collector --regions US,GB,IN --categories all,10 --interval 900
+    python collector.py --once
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: the same parser as a package (a requirement there)
+    import tomli as tomllib
+
+from metrics import start_metrics_server
+from quota import PRIORITY_BACKGROUND, QuotaScheduler
+from snapshots import ALL_CATEGORIES, DEFAULT_SNAPSHOT_DIR, SOURCE_TRENDING, SnapshotStore
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import REGIONS, YouTubeFetcher
+
+logger = logging.getLogger('collector')
+
+# Seconds between collection rounds
+DEFAULT_INTERVAL = 900
+
+SECRETS_PATH = Path(__file__).resolve().parent / '.streamlit' / 'secrets.toml'
+
+def load_api_key(cli_key=None):
+    """API key from the command line, YOUTUBE_API_KEY or .streamlit/secrets.toml"""
+    if cli_key:
+        return cli_key
+    if os.environ.get('YOUTUBE_API_KEY'):
+        return os.environ['YOUTUBE_API_KEY']
+    try:
+        with open(SECRETS_PATH, 'rb') as fh:
+            return tomllib.load(fh).get('YOUTUBE_API_KEY')
+    except (OSError, ValueError):
+        return None
+
+def collect_once(fetcher, store, regions, categories, max_results):
+    """Fetch every region for each category and append one snapshot per pair
+    
+    Returns (snapshot files written, {(region, category): error message}).
+    The fetcher should revalidate (set_revalidate), so counts are never
+    served from the response cache under a new snapshot time; regions only
+    available from stale cached responses count as failures and are not
+    written, so a snapshot never repeats an older one's counts.
+    """
+    written = 0
+    failures = {}
+    for category_id in categories:
+        df, errors, timings = fetcher.fetch_all_regions(category_id, max_results, regions=regions)
+        for region_code, error in errors.items():
+            failures[(region_code, category_id or ALL_CATEGORIES)] = error
+        stale_regions = timings.get('stale_regions', {})
+        for region_code in stale_regions:
+            failures[(region_code, category_id or ALL_CATEGORIES)] = "API unavailable, only stale cached data"
+        if stale_regions:
+            df = df[~df['region'].isin(list(stale_regions))]
+        paths = store.append(df, SOURCE_TRENDING, category_id)
+        for path in paths:
+            logger.debug("Wrote %s", path)
+        written += len(paths)
+    return written, failures
+
+def run(fetcher, store, regions, categories, max_results, interval, stop_event, once=False):
+    """Collect on a fixed schedule until stop_event is set"""
+    while not stop_event.is_set():
+        started = time.monotonic()
+        # Yesterday's many small files become one sorted file per partition
+        partitions, removed = store.compact()
+        if partitions:
+            logger.info("Compacted %d partitions (%d files merged)", partitions, removed)
+        written, failures = collect_once(fetcher, store, regions, categories, max_results)
+        for (region_code, category), error in failures.items():
+            logger.warning("%s/%s failed: %s", region_code, category, error)
+        logger.info(
+            "Round finished in %.1fs: %d snapshots written, %d failed",
+            time.monotonic() - started, written, len(failures)
+        )
+        if once:
+            break
+        stop_event.wait(max(interval - (time.monotonic() - started), 0))
+
+def parse_list(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect YouTube trending snapshots in the background")
+    parser.add_argument('--regions', default=','.join(REGIONS), help="Comma-separated region codes (default: all)")
+    parser.add_argument('--categories', default=ALL_CATEGORIES,
+                        help="Comma-separated videoCategoryIds; 'all' is the unfiltered chart (default: all)")
+    parser.add_argument('--max-results', type=int, default=50, help="Videos per region/category (max 50)")
+    parser.add_argument('--interval', type=int, default=DEFAULT_INTERVAL, help="Seconds between rounds")
+    parser.add_argument('--output-dir', default=str(DEFAULT_SNAPSHOT_DIR), help="Snapshot directory")
+    parser.add_argument('--api-key', help="YouTube Data API key (default: YOUTUBE_API_KEY or secrets.toml)")
+    parser.add_argument('--base-url', help="API base URL (default: YOUTUBE_API_BASE_URL or Google's)")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this local port")
+    parser.add_argument('--once', action='store_true', help="Run a single round and exit")
+    parser.add_argument('--verbose', action='store_true', help="Log every snapshot written")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    
+    api_key = load_api_key(args.api_key)
+    if not api_key:
+        parser.error("no API key: pass --api-key, set YOUTUBE_API_KEY or add it to .streamlit/secrets.toml")
+    
+    regions = [code.upper() for code in parse_list(args.regions)]
+    unknown = [code for code in regions if code not in REGIONS]
+    if unknown:
+        parser.error(f"unknown region codes: {', '.join(unknown)}")
+    categories = [None if c == ALL_CATEGORIES else c for c in parse_list(args.categories)]
+    
+    # Shares the dashboard's response cache and quota ledger, at background priority; every
+    # round asks the API, since a cached chart from the last few minutes is not a new snapshot
+    fetcher = YouTubeFetcher(create_http_session(), ResponseCache(), QuotaScheduler(), args.base_url)
+    fetcher.set_api_key(api_key)
+    fetcher.set_priority(PRIORITY_BACKGROUND)
+    fetcher.set_revalidate(True)
+    store = SnapshotStore(args.output_dir)
+    if args.metrics_port:
+        start_metrics_server(port=args.metrics_port)
+        logger.info("Serving metrics at http://127.0.0.1:%d/metrics", args.metrics_port)
+    
+    stop_event = threading.Event()
+    
+    def request_stop(signum, frame):
+        logger.info("Stopping after the current round")
+        stop_event.set()
+    
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    
+    logger.info(
+        "Collecting %d regions x %d categories every %ds into %s",
+        len(regions), len(categories), args.interval, store.root
+    )
+    run(fetcher, store, regions, categories, args.max_results, args.interval, stop_event, once=args.once)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Data exports, written on demand in chunks
+
+Nothing is serialized until a download is clicked. Each format is then
+written EXPORT_CHUNK_ROWS rows at a time into an in-memory buffer, the form
+Streamlit's deferred download accepts, so a multi-million-row history never
+exists as one text copy besides the file itself: CSV and JSON are rendered
+chunk by chunk (optionally through a gzip or zstd stream), and Parquet and
+Arrow IPC are written batch by batch from an Arrow table that shares the
+frame's buffers where it can.
+"""
+
+import io
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from frames import VIDEO_URL_PREFIX, with_video_urls
+
+# Rows rendered per chunk
+EXPORT_CHUNK_ROWS = 50_000
+
+# Format label: (file extension, MIME type, compression codec or None)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv', None),
+    'CSV (gzip)': ('csv.gz', 'application/gzip', 'gzip'),
+    'CSV (zstd)': ('csv.zst', 'application/zstd', 'zstd'),
+    'JSON': ('json', 'application/json', None),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet', 'zstd'),
+    'Arrow IPC': ('arrow', 'application/vnd.apache.arrow.file', None),
+}
+
+def write_export(df, fmt, sink):
+    """Write df in an EXPORT_FORMATS format to a binary file object"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    _, _, codec = EXPORT_FORMATS[fmt]
+    if fmt == 'Parquet':
+        pq.write_table(arrow_table(df), sink, row_group_size=EXPORT_CHUNK_ROWS, compression=codec)
+    elif fmt == 'Arrow IPC':
+        table = arrow_table(df)
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            for batch in table.to_batches(max_chunksize=EXPORT_CHUNK_ROWS):
+                writer.write_batch(batch)
+    elif codec:
+        with pa.CompressedOutputStream(pa.PythonFile(_KeepOpen(sink), mode='w'), codec) as stream:
+            _write_text(df, fmt, stream)
+    else:
+        _write_text(df, fmt, sink)
+
+class _KeepOpen:
+    """File wrapper whose close() only flushes, so a compressed stream can finish without closing the sink"""
+    
+    closed = False
+    
+    def __init__(self, sink):
+        self._sink = sink
+    
+    def write(self, data):
+        return self._sink.write(data)
+    
+    def flush(self):
+        self._sink.flush()
+    
+    def close(self):
+        self._sink.flush()
+
+def _write_text(df, fmt, sink):
+    """CSV or JSON records, one chunk of rows at a time, encoded straight into sink"""
+    is_json = fmt == 'JSON'
+    # Detached rather than closed at the end, which would close sink too
+    text = io.TextIOWrapper(sink, encoding='utf-8', newline='', write_through=True)
+    try:
+        if is_json:
+            text.write('[')
+        for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+            chunk = with_video_urls(df.iloc[start:start + EXPORT_CHUNK_ROWS])
+            if is_json:
+                if chunk.empty:
+                    continue
+                records = chunk.to_json(orient='records', date_format='iso')
+                # Each chunk is a JSON array; keep its records and join them with the next chunk's
+                text.write((',' if start else '') + records[1:-1])
+            else:
+                chunk.to_csv(text, index=False, header=start == 0)
+        if is_json:
+            text.write(']')
+    finally:
+        text.detach()
+
+def arrow_table(df):
+    """df as an Arrow table with the video_url column the other exports carry"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    if 'video_id' in df and 'video_url' not in df:
+        video_ids = table['video_id']
+        prefix, separator = pa.scalar(VIDEO_URL_PREFIX, video_ids.type), pa.scalar('', video_ids.type)
+        table = table.append_column('video_url', pc.binary_join_element_wise(prefix, video_ids, separator))
+    return table
+
+def export_file(df, fmt):
+    """df written in fmt to a BytesIO, rewound for reading (a type st.download_button accepts)"""
+    buffer = io.BytesIO()
+    write_export(df, fmt, buffer)
+    buffer.seek(0)
+    return buffer
+
+def export_name(prefix, fmt, timestamp):
+    """File name for an export, e.g. youtube_live_data_20240101_120000.csv.gz"""
+    return f"{prefix}_{timestamp.strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][0]}"
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the YouTube Data API v3, for offline load testing
+
+Serves videos (chart and id modes, with paging), search and
+videoCategories from synthetic or recorded fixtures, in the API's own
+response shapes. Every response carries an ETag and honours
+If-None-Match, and the server can add latency and inject 403
+quotaExceeded, 5xx and hanging responses. Injected faults are decided
+from a hash of the seed, the request and how often that request was
+made, so a run is reproducible however its requests interleave, and a
+retried request can succeed.
+
+Usage:
+    python fake_youtube.py --port 8765 --latency-ms 80 --server-error-rate 0.05
+    YOUTUBE_API_BASE_URL=http://127.0.0.1:8765/youtube/v3 streamlit run app.py
+    python fake_youtube.py --record fixtures.json --api-key KEY   # record real charts
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from quota import ENDPOINT_COSTS
+from youtube_fetcher import DEFAULT_BASE_URL, REGIONS
+
+API_PREFIX = '/youtube/v3'
+
+DEFAULT_PORT = 8765
+
+# Assignable categories every synthetic region offers
+CATEGORY_NAMES = {
+    '1': 'Film & Animation', '2': 'Autos & Vehicles', '10': 'Music', '15': 'Pets & Animals',
+    '17': 'Sports', '20': 'Gaming', '22': 'People & Blogs', '23': 'Comedy', '24': 'Entertainment',
+    '25': 'News & Politics', '26': 'Howto & Style', '27': 'Education', '28': 'Science & Technology',
+}
+
+# The real mostPopular chart stops at 200 videos
+CHART_LIMIT = 200
+
+MAX_PAGE_SIZE = 50
+
+def synthetic_videos(count, seed=0, channels=None, now=None):
+    """count realistic videos.list items from a seeded generator: lognormal views, hidden likes, Shorts and long-form"""
+    return list(iter_synthetic_videos(count, seed, channels, now))
+
+def iter_synthetic_videos(count, seed=0, channels=None, now=None):
+    """synthetic_videos one item at a time, for payloads too large to hold twice"""
+    rng = random.Random(seed)
+    channels = channels or max(1, count // 5)
+    now = now or datetime.now(timezone.utc).replace(microsecond=0)
+    category_ids = list(CATEGORY_NAMES)
+    for i in range(count):
+        video_id = f'fake{i:07d}'
+        views = int(rng.lognormvariate(12, 1.5))
+        statistics = {'viewCount': str(views), 'commentCount': str(int(views * rng.uniform(0, 0.005)))}
+        if rng.random() > 0.1:
+            statistics['likeCount'] = str(int(views * rng.uniform(0.005, 0.08)))  # Hidden likes leave the key out
+        seconds = rng.choice([rng.randint(15, 180), rng.randint(181, 3600)])
+        category_id = rng.choice(category_ids)
+        channel = rng.randrange(channels)
+        yield {
+            'kind': 'youtube#video',
+            'id': video_id,
+            'snippet': {
+                'publishedAt': (now - timedelta(hours=rng.uniform(1, 240))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                'channelId': f'UCfake{channel:07d}',
+                'title': f"Synthetic video {i} about {CATEGORY_NAMES[category_id].lower()}" + (' 🔥' if rng.random() < 0.2 else ''),
+                'description': 'Synthetic fixture. ' * rng.randint(1, 30),
+                'thumbnails': {'medium': {'url': f'https://i.ytimg.com/vi/{video_id}/mqdefault.jpg', 'width': 320, 'height': 180}},
+                'channelTitle': f'Channel {channel}',
+                'categoryId': category_id,
+            },
+            'statistics': statistics,
+            'contentDetails': {'duration': f'PT{seconds // 60}M{seconds % 60}S'},
+        }
+
+def search_result(item):
+    """The search.list item for a videos.list item"""
+    return {
+        'kind': 'youtube#searchResult',
+        'id': {'kind': 'youtube#video', 'videoId': item['id']},
+        'snippet': {key: item['snippet'][key] for key in ('publishedAt', 'channelId', 'title', 'description', 'thumbnails', 'channelTitle')},
+    }
+
+def synthetic_payload(count, endpoint='videos', seed=0, now=None):
+    """JSON body of one videos.list or search.list response with count synthetic items"""
+    items = iter_synthetic_videos(count, seed, now=now)
+    if endpoint == 'search':
+        items = map(search_result, items)
+    kind = 'youtube#searchListResponse' if endpoint == 'search' else 'youtube#videoListResponse'
+    # Encoded item by item, so a 1M-item payload never exists as dicts
+    encoded = ','.join(json.dumps(item, separators=(',', ':')) for item in items)
+    page_info = json.dumps({'totalResults': count, 'resultsPerPage': count}, separators=(',', ':'))
+    return f'{{"kind":"{kind}","items":[{encoded}],"pageInfo":{page_info}}}'.encode()
+
+def synthetic_fixtures(videos_per_region=CHART_LIMIT, regions=None, seed=0):
+    """Charts for every region drawn from one shared pool of videos, in recorded-fixture form"""
+    rng = random.Random(seed)
+    regions = list(regions or REGIONS)
+    pool = synthetic_videos(videos_per_region * 2, seed)
+    charts = {}
+    for code in regions:
+        chart = rng.sample(pool, min(videos_per_region, len(pool)))
+        charts[code] = sorted(chart, key=lambda item: -int(item['statistics']['viewCount']))
+    return {'categories': {code: dict(CATEGORY_NAMES) for code in regions}, 'charts': charts, 'videos': pool}
+
+def record_fixtures(api_key, regions=None, max_results=CHART_LIMIT, base_url=DEFAULT_BASE_URL):
+    """Fixtures recorded from a live API: every region's categories and trending chart"""
+    session = requests.Session()
+    fixtures = {'categories': {}, 'charts': {}}
+    for code in regions or REGIONS:
+        response = session.get(f"{base_url}/videoCategories",
+                               params={'part': 'snippet', 'regionCode': code, 'key': api_key}, timeout=15)
+        response.raise_for_status()
+        fixtures['categories'][code] = {
+            item['id']: item['snippet']['title'] for item in response.json().get('items', []) if item['snippet']['assignable']
+        }
+        chart, page_token = [], None
+        while len(chart) < max_results:
+            params = {'part': 'snippet,statistics,contentDetails', 'chart': 'mostPopular', 'regionCode': code,
+                      'maxResults': MAX_PAGE_SIZE, 'key': api_key}
+            if page_token:
+                params['pageToken'] = page_token
+            response = session.get(f"{base_url}/videos", params=params, timeout=15)
+            response.raise_for_status()
+            data = response.json()
+            chart.extend(data.get('items', []))
+            page_token = data.get('nextPageToken')
+            if not page_token:
+                break
+        fixtures['charts'][code] = chart[:max_results]
+    return fixtures
+
+def api_error(status, reason, message):
+    """(status, body) in the API's error format"""
+    return status, {'error': {'code': status, 'message': message, 'errors': [{'reason': reason, 'message': message}]}}
+
+class FakeYouTubeAPI:
+    """The API's request handling, fault injection and counters, independent of the HTTP server"""
+    
+    def __init__(self, fixtures=None, latency=0.0, jitter=0.0, quota_error_rate=0.0, server_error_rate=0.0,
+                 timeout_rate=0.0, hang_seconds=30.0, quota_units=None, seed=0):
+        fixtures = fixtures or synthetic_fixtures(seed=seed)
+        self.categories = fixtures['categories']
+        self.charts = fixtures['charts']
+        self.videos = {}
+        for item in fixtures.get('videos', []) + [item for chart in self.charts.values() for item in chart]:
+            self.videos.setdefault(item['id'], item)
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_error_rate = quota_error_rate
+        self.server_error_rate = server_error_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.quota_units = quota_units
+        self.seed = seed
+        self._attempts = Counter()
+        self._lock = threading.Lock()
+        self.reset_stats()
+    
+    def reset_stats(self):
+        with self._lock:
+            self.requests = Counter()
+            self.responses = Counter()
+            self.injected = Counter()
+            self.not_modified = 0
+            self.units_used = 0
+    
+    def stats(self):
+        """Requests per endpoint, responses per status, injected faults, 304s and units charged"""
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'responses': {str(status): count for status, count in self.responses.items()},
+                'injected': dict(self.injected),
+                'not_modified': self.not_modified,
+                'units_used': self.units_used,
+            }
+    
+    def _draw(self, endpoint, params):
+        """Two reproducible uniforms for this request and attempt: fault and latency"""
+        request = json.dumps([endpoint, sorted((k, v) for k, v in params.items() if k != 'key')])
+        with self._lock:
+            self._attempts[request] += 1
+            attempt = self._attempts[request]
+        digest = hashlib.blake2b(f"{self.seed}|{request}|{attempt}".encode(), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'big') / 2 ** 64, int.from_bytes(digest[8:], 'big') / 2 ** 64
+    
+    def handle(self, path, params, if_none_match=None):
+        """Answer one GET: returns (status, body bytes, ETag or None, seconds to wait first)"""
+        endpoint = path[len(API_PREFIX):].strip('/') if path.startswith(API_PREFIX) else None
+        fault, spread = self._draw(endpoint, params)
+        delay = self.latency + self.jitter * spread
+        with self._lock:
+            self.requests[endpoint] += 1
+        
+        status, body = self._respond(endpoint, params, fault)
+        if status == 0:
+            return 0, b'', None, delay + self.hang_seconds
+        content = json.dumps(body, separators=(',', ':')).encode()
+        etag = None
+        if status == 200:
+            etag = '"' + hashlib.blake2b(content, digest_size=12).hexdigest() + '"'
+            if if_none_match == etag:
+                status, content = 304, b''
+        with self._lock:
+            self.responses[status] += 1
+            self.not_modified += status == 304
+        return status, content, etag, delay
+    
+    def _respond(self, endpoint, params, fault):
+        """(status, body) for a request; status 0 means hang without answering"""
+        handlers = {'videos': self._videos, 'search': self._search, 'videoCategories': self._video_categories}
+        if endpoint not in handlers:
+            return api_error(404, 'notFound', f"Unknown endpoint: {endpoint}")
+        if not params.get('key'):
+            return api_error(403, 'forbidden', "The request is missing a valid API key.")
+        
+        # Faults stack in one draw: quota, then 5xx, then hangs
+        with self._lock:
+            units_left = None if self.quota_units is None else self.quota_units - self.units_used
+        if fault < self.quota_error_rate or (units_left is not None and units_left < ENDPOINT_COSTS[endpoint]):
+            self._count_fault('quotaExceeded')
+            return api_error(403, 'quotaExceeded', "The request cannot be completed because you have exceeded your quota.")
+        fault -= self.quota_error_rate
+        if 0 <= fault < self.server_error_rate:
+            self._count_fault('serverError')
+            return api_error(503, 'backendError', "Backend Error") if fault < self.server_error_rate / 2 \
+                else api_error(500, 'internalError', "Internal Error")
+        fault -= self.server_error_rate
+        if 0 <= fault < self.timeout_rate:
+            self._count_fault('timeout')
+            return 0, None
+        
+        with self._lock:
+            self.units_used += ENDPOINT_COSTS[endpoint]
+        return handlers[endpoint](params)
+    
+    def _count_fault(self, kind):
+        with self._lock:
+            self.injected[kind] += 1
+    
+    @staticmethod
+    def _page(items, params, kind):
+        """One page of items with the API's paging fields; page tokens are offsets"""
+        size = max(0, min(int(params.get('maxResults', 5)), MAX_PAGE_SIZE))
+        start = int(params.get('pageToken') or 0)
+        page = {
+            'kind': kind,
+            'items': items[start:start + size],
+            'pageInfo': {'totalResults': len(items), 'resultsPerPage': size},
+        }
+        if start + size < len(items):
+            page['nextPageToken'] = str(start + size)
+        return page
+    
+    @staticmethod
+    def _parts(item, params):
+        """item reduced to the requested parts"""
+        parts = {part.strip() for part in params.get('part', 'snippet').split(',')}
+        return {key: value for key, value in item.items() if key in ('kind', 'id') or key in parts}
+    
+    def _videos(self, params):
+        if params.get('id'):
+            ids = params['id'].split(',')[:MAX_PAGE_SIZE]
+            items = [self._parts(self.videos[video_id], params) for video_id in ids if video_id in self.videos]
+            return 200, {'kind': 'youtube#videoListResponse', 'items': items,
+                         'pageInfo': {'totalResults': len(items), 'resultsPerPage': len(items)}}
+        if params.get('chart') != 'mostPopular':
+            return api_error(400, 'missingRequiredParameter', "No filter selected. Expected one of: chart, id")
+        region = params.get('regionCode', 'US')
+        if region not in self.charts:
+            return api_error(400, 'invalidRegionCode', f"Invalid region code: {region}")
+        chart = self.charts[region]
+        category = params.get('videoCategoryId')
+        if category:
+            if category not in self.categories.get(region, {}):
+                return api_error(404, 'videoChartNotFound', "The requested video chart is not supported or is not available.")
+            chart = [item for item in chart if item['snippet']['categoryId'] == category]
+        items = [self._parts(item, params) for item in chart]
+        return 200, self._page(items, params, 'youtube#videoListResponse')
+    
+    def _search(self, params):
+        query = params.get('q', '').lower()
+        words = [word for word in query.split() if word]
+        matches = [item for item in self.videos.values() if all(word in item['snippet']['title'].lower() for word in words)]
+        if not matches:
+            # Real searches always find something; fall back to a fixed pick per query
+            rng = random.Random(f"{self.seed}|{query}")
+            matches = rng.sample(list(self.videos.values()), min(len(self.videos), MAX_PAGE_SIZE))
+        return 200, self._page([search_result(item) for item in matches], params, 'youtube#searchListResponse')
+    
+    def _video_categories(self, params):
+        region = params.get('regionCode', 'US')
+        if region not in self.categories:
+            return api_error(400, 'invalidRegionCode', f"Invalid region code: {region}")
+        items = [
+            {'kind': 'youtube#videoCategory', 'id': category_id,
+             'snippet': {'title': title, 'assignable': True, 'channelId': 'UCBR8-60-B28hp2BmDPdntcQ'}}
+            for category_id, title in self.categories[region].items()
+        ]
+        return 200, {'kind': 'youtube#videoCategoryListResponse', 'items': items}
+
+class FakeYouTubeServer:
+    """FakeYouTubeAPI behind a threaded local HTTP server; use as a context manager"""
+    
+    def __init__(self, api=None, host='127.0.0.1', port=0, **options):
+        self.api = api or FakeYouTubeAPI(**options)
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(self.api))
+        self._httpd.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def serve_forever(self):
+        self._httpd.serve_forever()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def _handler_for(api):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+        disable_nagle_algorithm = True
+        
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/_stats':
+                self._send(200, json.dumps(api.stats()).encode(), None)
+                return
+            status, content, etag, delay = api.handle(url.path, dict(parse_qsl(url.query)), self.headers.get('If-None-Match'))
+            time.sleep(delay)
+            if status == 0:
+                self.close_connection = True
+                return
+            self._send(status, content, etag)
+        
+        def _send(self, status, content, etag):
+            gzipped = bool(content) and 'gzip' in self.headers.get('Accept-Encoding', '')
+            if gzipped:
+                content = gzip.compress(content, compresslevel=5)
+            self.send_response(status)
+            if status != 304:
+                self.send_header('Content-Type', 'application/json; charset=UTF-8')
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the YouTube Data API v3")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--fixtures', help="Recorded fixtures JSON (default: synthetic)")
+    parser.add_argument('--videos-per-region', type=int, default=CHART_LIMIT, help="Synthetic chart length")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for synthetic fixtures and injected faults")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added to every response")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Up to this much more, per request")
+    parser.add_argument('--quota-error-rate', type=float, default=0.0, help="Share of requests answered 403 quotaExceeded")
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help="Share of requests answered 500 or 503")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Share of requests that hang unanswered")
+    parser.add_argument('--hang-seconds', type=float, default=30.0, help="How long a hanging request waits")
+    parser.add_argument('--quota-units', type=int, help="Units before every request gets quotaExceeded")
+    parser.add_argument('--dump-fixtures', help="Write the synthetic fixtures to this file and exit")
+    parser.add_argument('--record', help="Record live charts and categories to this file and exit")
+    parser.add_argument('--api-key', help="API key for --record")
+    args = parser.parse_args(argv)
+    
+    if args.record:
+        if not args.api_key:
+            parser.error("--record needs --api-key")
+        with open(args.record, 'w') as fh:
+            json.dump(record_fixtures(args.api_key), fh)
+        return 0
+    if args.fixtures:
+        with open(args.fixtures) as fh:
+            fixtures = json.load(fh)
+    else:
+        fixtures = synthetic_fixtures(args.videos_per_region, seed=args.seed)
+    if args.dump_fixtures:
+        with open(args.dump_fixtures, 'w') as fh:
+            json.dump(fixtures, fh)
+        return 0
+    
+    api = FakeYouTubeAPI(
+        fixtures, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+        quota_error_rate=args.quota_error_rate, server_error_rate=args.server_error_rate,
+        timeout_rate=args.timeout_rate, hang_seconds=args.hang_seconds,
+        quota_units=args.quota_units, seed=args.seed
+    )
+    server = FakeYouTubeServer(api, args.host, args.port)
+    print(f"Serving the fake YouTube Data API at {server.base_url} (stats at /_stats)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Plotly figures for the dashboard, built once per dataset version and chart
+
+Built figures are kept as serialized specs in a process-wide FigureCache,
+keyed on the dataset fingerprint plus the chart's name and parameters, so
+a session opening data another session has already drawn only parses the
+spec. Scatter plots of large frames switch to WebGL traces over a seeded
+sample of the rows that always keeps the extremes of both axes.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.express as px
+import plotly.io as pio
+
+# Above this many points scatter plots use WebGL (scattergl) traces
+WEBGL_MIN_POINTS = 1_000
+
+# Scatter plots of larger frames are drawn from a sample this size
+MAX_SCATTER_POINTS = 5_000
+
+# Rows with the highest and lowest values of each axis, always kept in a sample
+EXTREME_POINTS = 50
+
+# Same seed every time, so a dataset version always samples the same rows
+SAMPLE_SEED = 0
+
+DEFAULT_MAX_FIGURES = 64
+
+def downsample(df, max_points=MAX_SCATTER_POINTS, keep=()):
+    """df, or max_points of its rows in their original order, including the extremes of the keep columns"""
+    if len(df) <= max_points:
+        return df
+    extremes = []
+    for column in keep:
+        values = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        values = np.nan_to_num(values, nan=np.nanmedian(values))
+        order = np.argpartition(values, [EXTREME_POINTS, len(values) - EXTREME_POINTS - 1])
+        extremes.append(order[:EXTREME_POINTS])
+        extremes.append(order[-EXTREME_POINTS:])
+    positions = np.unique(np.concatenate(extremes)) if extremes else np.empty(0, dtype='int64')
+    rest = np.setdiff1d(np.arange(len(df)), positions, assume_unique=True)
+    sample = np.random.default_rng(SAMPLE_SEED).choice(rest, max(0, max_points - len(positions)), replace=False)
+    return df.iloc[np.sort(np.concatenate([positions, sample]))]
+
+def scatter(df, x, y, title, max_points=MAX_SCATTER_POINTS, **kwargs):
+    """px.scatter that draws large frames with WebGL from a downsampled set of points"""
+    points = downsample(df, max_points, keep=[x, y])
+    if len(points) < len(df):
+        title = f"{title} ({len(points):,} of {len(df):,} videos shown)"
+    render_mode = 'webgl' if len(points) > WEBGL_MIN_POINTS else 'svg'
+    return px.scatter(points, x=x, y=y, title=title, render_mode=render_mode, **kwargs)
+
+class FigureCache:
+    """LRU of serialized figure specs, shared by every session in the process"""
+    
+    def __init__(self, max_figures=DEFAULT_MAX_FIGURES):
+        self.max_figures = max_figures
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+    
+    def get(self, key, build):
+        """The figure cached under key, or build() which is then cached"""
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+        if spec is not None:
+            return pio.from_json(spec)
+        
+        figure = build()
+        spec = figure.to_json()
+        with self._lock:
+            self.builds += 1
+            self._specs[key] = spec
+            while len(self._specs) > self.max_figures:
+                self._specs.popitem(last=False)
+        return figure
+    
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+    
+    def stats(self):
+        """Specs held, their size and how lookups were answered"""
+        with self._lock:
+            return {
+                'figures': len(self._specs),
+                'bytes': sum(len(spec) for spec in self._specs.values()),
+                'hits': self.hits,
+                'builds': self.builds,
+            }
@@ -0,0 +1,154 @@
+"""
+Memory layout of the dashboard's video frames
+
+Columns repeated on every row (region, channel, category, duration) are
+categoricals, counters and ratios use the narrowest dtype that fits, and
+the watch URL is derived from video_id when needed instead of stored.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+VIDEO_URL_PREFIX = "https://www.youtube.com/watch?v="
+
+# Few distinct values per frame, so codes plus one copy of each value beat a string per row
+CATEGORICAL_COLUMNS = ['region', 'region_name', 'channel_title', 'category_id', 'category_name', 'duration']
+
+NUMERIC_DTYPES = {
+    'views': 'int64',  # Top videos are past four billion views
+    'likes': 'uint32',
+    'comments': 'uint32',
+    'duration_seconds': 'int32',
+    'engagement_rate': 'float32',
+    'comment_rate': 'float32',
+    'hours_since_published': 'float32',
+}
+
+# Recomputed on every fetch, so they differ even when the videos and counts do not
+VOLATILE_COLUMNS = ['fetch_time', 'hours_since_published']
+
+# Left out of content_hash: the thumbnail URL is built from video_id and the description
+# is long free text that nothing aggregates; together they are most of a frame's bytes
+UNHASHED_COLUMNS = ['thumbnail', 'description']
+
+def compact_frame(df):
+    """Apply the compact schema, dropping stored URLs and unused categories"""
+    if df.empty:
+        return df
+    dtypes = {column: 'category' for column in CATEGORICAL_COLUMNS if column in df}
+    dtypes.update({column: dtype for column, dtype in NUMERIC_DTYPES.items() if column in df})
+    # astype costs milliseconds even for columns it leaves as they are
+    dtypes = {column: dtype for column, dtype in dtypes.items() if df[column].dtype != dtype}
+    df = df.drop(columns='video_url', errors='ignore')
+    if dtypes:
+        df = df.astype(dtypes)
+    # A filtered or concatenated frame can carry categories it no longer uses
+    for column in CATEGORICAL_COLUMNS:
+        if column in df:
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+def categorical(values):
+    """A sequence as the Categorical compact_frame would make of it (sorted categories)
+    
+    Builds it from codes directly, skipping the Series round trip and
+    astype, which dominate on the 50-row frames of one chart.
+    """
+    codes, categories = pd.factorize(np.asarray(values, dtype=object), sort=True)
+    return pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=str))
+
+def concat_frames(frames):
+    """Concatenate compact frames into one compact frame
+    
+    pd.concat turns categoricals whose categories differ into strings, and
+    casting them back costs more than the rows on small frames, so each
+    frame's categoricals are first given the union of the categories.
+    """
+    frames = [frame for frame in frames if not frame.empty]
+    if len(frames) <= 1:
+        return frames[0] if frames else pd.DataFrame()
+    shared = [
+        column for column in CATEGORICAL_COLUMNS
+        if all(column in frame and isinstance(frame[column].dtype, pd.CategoricalDtype) for frame in frames)
+    ]
+    categories = {column: frames[0][column].cat.categories for column in shared}
+    for frame in frames[1:]:
+        for column in shared:
+            categories[column] = categories[column].union(frame[column].cat.categories)
+    frames = [
+        frame.assign(**{column: frame[column].cat.set_categories(categories[column]) for column in shared})
+        for frame in frames
+    ]
+    return compact_frame(pd.concat(frames, ignore_index=True))
+
+def video_url(video_id):
+    """Watch page URL for one video"""
+    return VIDEO_URL_PREFIX + str(video_id)
+
+def with_video_urls(df):
+    """Copy of df with a video_url column, for exports and links"""
+    if df.empty or 'video_id' not in df:
+        return df
+    return df.assign(video_url=VIDEO_URL_PREFIX + df['video_id'].astype(str))
+
+def loose_frame(df):
+    """The layout frames had before compact_frame: plain strings, 64-bit numbers, stored URLs"""
+    if df.empty:
+        return df
+    # str is what a frame built from per-row dicts infers (object before pandas 3)
+    dtypes = {column: str for column in CATEGORICAL_COLUMNS if column in df}
+    dtypes.update({
+        column: 'float64' if dtype.startswith('float') else 'int64'
+        for column, dtype in NUMERIC_DTYPES.items() if column in df
+    })
+    return with_video_urls(df).astype(dtypes)
+
+def memory_footprint(df):
+    """Bytes used by df against its loose layout, in total and per row"""
+    rows = len(df)
+    compact_bytes = int(df.memory_usage(deep=True, index=False).sum())
+    loose_bytes = int(loose_frame(df).memory_usage(deep=True, index=False).sum()) if rows else 0
+    return {
+        'rows': rows,
+        'compact_bytes': compact_bytes,
+        'loose_bytes': loose_bytes,
+        'compact_bytes_per_row': compact_bytes / rows if rows else 0.0,
+        'loose_bytes_per_row': loose_bytes / rows if rows else 0.0,
+        'saving': 1 - compact_bytes / loose_bytes if loose_bytes else 0.0,
+    }
+
+def content_hash(df, rows=None):
+    """Digest of a frame's columns and values, ignoring VOLATILE_COLUMNS and UNHASHED_COLUMNS
+    
+    A refetch that returns the same videos and counts keeps the same hash,
+    whatever the frame's categories or row index. String columns are
+    digested straight from their Arrow buffers, which is an order of
+    magnitude faster than hashing them row by row. rows limits the digest
+    to the first rows, to recognise a frame that was appended to.
+    """
+    columns = sorted(column for column in df.columns if column not in VOLATILE_COLUMNS + UNHASHED_COLUMNS)
+    digest = hashlib.blake2b(repr(columns).encode(), digest_size=16)
+    if rows is not None:
+        df = df.iloc[:rows]
+    digest.update(str(len(df)).encode())
+    strings = [column for column in columns if isinstance(df[column].array, pd.arrays.ArrowStringArray)]
+    others = [column for column in columns if column not in strings]
+    if others and len(df):
+        digest.update(pd.util.hash_pandas_object(df[others], index=False).to_numpy().data)
+    for column in strings:
+        values = pa.array(df[column].array)
+        for chunk in getattr(values, 'chunks', [values]):
+            _digest_string_array(chunk, digest)
+    return digest.hexdigest()
+
+def _digest_string_array(chunk, digest):
+    """Offsets and bytes of an Arrow string array, rebased so slices of equal values match"""
+    if chunk.null_count:
+        digest.update(np.asarray(chunk.is_null()).data)
+    offsets_type = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+    offsets = np.frombuffer(chunk.buffers()[1], dtype=offsets_type)[chunk.offset:chunk.offset + len(chunk) + 1]
+    digest.update(np.ascontiguousarray(offsets - offsets[0]).data)
+    digest.update(memoryview(chunk.buffers()[2])[offsets[0]:offsets[-1]])
@@ -0,0 +1,174 @@
+"""
+In-process counters and stage timings, served in Prometheus text format
+
+A MetricsRegistry keeps counters and timing histograms keyed on a metric
+name plus labels; recording one is a dict update under a lock, so it can
+sit on every request and render. Fetchers record to the process-wide
+REGISTRY unless given their own, and the dashboard and the collector
+serve it on a local port for Prometheus to scrape.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Port the metrics endpoint listens on (the Prometheus exporter default)
+DEFAULT_METRICS_PORT = 9464
+
+# Upper bounds of the timing histogram buckets (seconds)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+API_REQUESTS = 'youtube_api_requests_total'
+API_RESPONSE_BYTES = 'youtube_api_response_bytes_total'
+API_QUOTA_UNITS = 'youtube_api_quota_units_total'
+API_CACHE = 'youtube_api_cache_total'
+API_ERRORS = 'youtube_api_errors_total'
+API_RETRIES = 'youtube_api_retries_total'
+API_STALE = 'youtube_api_stale_responses_total'
+API_COALESCED = 'youtube_api_coalesced_total'
+SERVICE_REQUESTS = 'youtube_trends_service_requests_total'
+STAGE_SECONDS = 'youtube_analytics_stage_seconds'
+
+# Type and help text per metric, for the exposition
+METRICS = {
+    API_REQUESTS: ('counter', "API requests sent over the network, by endpoint and status"),
+    API_RESPONSE_BYTES: ('counter', "Bytes of API response bodies after decompression, by endpoint"),
+    API_QUOTA_UNITS: ('counter', "Quota units charged, by endpoint"),
+    API_CACHE: ('counter', "Response cache lookups, by endpoint and result (hit, revalidated, miss)"),
+    API_ERRORS: ('counter', "Failed API requests, by endpoint and error"),
+    API_RETRIES: ('counter', "Requests retried after a transient failure, by endpoint and reason"),
+    API_STALE: ('counter', "Failed requests answered with the last cached body, by endpoint"),
+    API_COALESCED: ('counter', "Requests that shared an identical request already in flight, by endpoint"),
+    SERVICE_REQUESTS: ('counter', "Requests the trends service answered, by endpoint and status"),
+    STAGE_SECONDS: ('histogram', "Seconds spent per stage of fetching and rendering, by stage"),
+}
+
+class Span:
+    """Times a with-block into the registry's stage histogram"""
+    
+    __slots__ = ('registry', 'stage', 'started')
+    
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.registry.observe(STAGE_SECONDS, time.perf_counter() - self.started, stage=self.stage)
+
+class MetricsRegistry:
+    """Labelled counters and histograms, safe to record to from any thread"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        # {key: [count per bucket..., +Inf count, sum, max]}
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0.0]
+            series[bucket] += 1
+            series[-2] += value
+            series[-1] = max(series[-1], value)
+    
+    def span(self, stage):
+        """Context manager recording the seconds its block takes under stage"""
+        return Span(self, stage)
+    
+    def total(self, name, **labels):
+        """Sum of a counter over every series whose labels include labels"""
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (metric, series), value in self._counters.items() if metric == name and wanted <= set(series))
+    
+    def stages(self):
+        """Calls, total, mean and max seconds per timed stage, slowest total first"""
+        with self._lock:
+            rows = [
+                {'stage': dict(labels).get('stage', ''), 'calls': sum(series[:-2]), 'total_s': series[-2], 'max_s': series[-1]}
+                for (name, labels), series in self._histograms.items() if name == STAGE_SECONDS
+            ]
+        for row in rows:
+            row['mean_s'] = row['total_s'] / row['calls']
+        return sorted(rows, key=lambda row: -row['total_s'])
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def prometheus_text(self):
+        """Every metric in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(series)) for key, series in self._histograms.items())
+        lines = []
+        described = set()
+        
+        def describe(name, default_type):
+            if name not in described:
+                described.add(name)
+                kind, help_text = METRICS.get(name, (default_type, None))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+        
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), series in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series[:-2]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {series[-2]}")
+            lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return '\n'.join(lines) + '\n'
+
+def _labels(labels):
+    """Prometheus label set for a tuple of (name, value) pairs"""
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+# Process-wide registry; fetchers record to it unless given their own
+REGISTRY = MetricsRegistry()
+
+def start_metrics_server(registry=REGISTRY, port=DEFAULT_METRICS_PORT, host='127.0.0.1'):
+    """Serve registry at http://host:port/metrics from a daemon thread; raises OSError if the port is taken"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            content = registry.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name='metrics').start()
+    return server
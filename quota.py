@@ -0,0 +1,180 @@
+"""
+Quota accounting and request scheduling for the YouTube Data API
+
+Every request that reaches the network is charged its documented unit
+cost against a daily budget and a per-minute token bucket. Usage is
+persisted in SQLite so restarts (and other processes sharing the file)
+see the same running total; rows from earlier days are deleted once they
+fall out of the hour the burn rate is measured over.
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from dateutil import tz
+
+# Unit cost per list call, from the YouTube Data API quota calculator
+ENDPOINT_COSTS = {
+    'videos': 1,
+    'videoCategories': 1,
+    'search': 100,
+}
+
+DEFAULT_DAILY_BUDGET = 10_000
+DEFAULT_MINUTE_BUDGET = 300
+
+# Share of the daily budget that background refreshes may not touch
+BACKGROUND_RESERVE = 0.2
+
+# Interactive requests are always admitted before queued background ones
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Longest a request will wait for per-minute tokens before giving up (seconds)
+DEFAULT_MAX_WAIT = 30
+
+# Usage feeding the burn rate, and how often older rows are deleted (seconds)
+BURN_WINDOW = 3600
+PRUNE_INTERVAL = 3600
+
+# The daily quota resets at midnight Pacific Time
+QUOTA_TIMEZONE = tz.gettz('America/Los_Angeles')
+
+DEFAULT_QUOTA_PATH = Path(__file__).resolve().parent / '.cache' / 'quota.sqlite'
+
+class QuotaExceededError(Exception):
+    """Raised when a request would go over the configured quota budget"""
+
+def quota_day(now=None):
+    """Return (quota day string, seconds until the next reset)"""
+    local = datetime.fromtimestamp(now if now is not None else time.time(), QUOTA_TIMEZONE)
+    midnight = (local + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return local.strftime('%Y-%m-%d'), (midnight - local).total_seconds()
+
+class QuotaScheduler:
+    """Token-bucket admission control over daily and per-minute unit budgets"""
+    
+    def __init__(self, path=DEFAULT_QUOTA_PATH, daily_budget=DEFAULT_DAILY_BUDGET,
+                 minute_budget=DEFAULT_MINUTE_BUDGET, costs=None):
+        self.daily_budget = daily_budget
+        self.costs = dict(ENDPOINT_COSTS, **(costs or {}))
+        # A bucket smaller than the priciest call would never admit it
+        self.capacity = max(minute_budget, max(self.costs.values()))
+        self.refill_rate = minute_budget / 60.0
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._interactive_waiting = 0
+        self._pruned_at = 0.0
+        self._cond = threading.Condition()
+        
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        with self._cond, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS quota_usage (
+                    day TEXT NOT NULL,
+                    ts REAL NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    units INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_quota_usage_day ON quota_usage(day)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_quota_usage_ts ON quota_usage(ts)")
+    
+    def cost_of(self, endpoint):
+        """Unit cost of one call to an endpoint"""
+        return self.costs.get(endpoint, 1)
+    
+    def acquire(self, endpoint, priority=PRIORITY_INTERACTIVE, max_wait=DEFAULT_MAX_WAIT):
+        """Block until a call to endpoint fits the budgets, then charge it
+        
+        Raises QuotaExceededError if the daily budget cannot cover the call
+        (background calls also leave BACKGROUND_RESERVE untouched) or if the
+        per-minute bucket does not refill within max_wait seconds.
+        """
+        cost = self.cost_of(endpoint)
+        interactive = priority == PRIORITY_INTERACTIVE
+        deadline = time.monotonic() + max_wait
+        
+        with self._cond:
+            day, _ = quota_day()
+            used = self._used_on(day)
+            limit = self.daily_budget if interactive else self.daily_budget * (1 - BACKGROUND_RESERVE)
+            if used + cost > limit:
+                raise QuotaExceededError(
+                    f"Daily quota budget exhausted ({used:,}/{self.daily_budget:,} units used)"
+                )
+            
+            if interactive:
+                self._interactive_waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    yielding = not interactive and self._interactive_waiting > 0
+                    if not yielding and self._tokens >= cost:
+                        self._tokens -= cost
+                        break
+                    remaining = deadline - time.monotonic()
+                    refill_wait = max(cost - self._tokens, 0) / self.refill_rate if self.refill_rate else float('inf')
+                    # Fail fast when the bucket cannot refill in time anyway
+                    if remaining <= 0 or refill_wait > remaining:
+                        raise QuotaExceededError("Per-minute quota budget exhausted, try again shortly")
+                    self._cond.wait(min(remaining, max(refill_wait, 0.05)))
+            finally:
+                if interactive:
+                    self._interactive_waiting -= 1
+                    self._cond.notify_all()
+            
+            now = time.time()
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO quota_usage (day, ts, endpoint, units) VALUES (?, ?, ?, ?)",
+                    (day, now, endpoint, cost)
+                )
+                if now - self._pruned_at >= PRUNE_INTERVAL:
+                    self._prune(day, now)
+        return cost
+    
+    def usage(self):
+        """Snapshot of today's usage, remaining units and projected burn"""
+        now = time.time()
+        day, seconds_to_reset = quota_day(now)
+        with self._cond:
+            used = self._used_on(day)
+            last_hour = self._conn.execute(
+                "SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE ts >= ?", (now - BURN_WINDOW,)
+            ).fetchone()[0]
+            by_endpoint = dict(self._conn.execute(
+                "SELECT endpoint, SUM(units) FROM quota_usage WHERE day = ? GROUP BY endpoint", (day,)
+            ).fetchall())
+        hours_to_reset = seconds_to_reset / 3600
+        return {
+            'day': day,
+            'used': used,
+            'remaining': max(self.daily_budget - used, 0),
+            'daily_budget': self.daily_budget,
+            'burn_rate_per_hour': last_hour,
+            'projected_total': used + last_hour * hours_to_reset,
+            'hours_to_reset': hours_to_reset,
+            'by_endpoint': by_endpoint,
+        }
+    
+    def _used_on(self, day):
+        return self._conn.execute(
+            "SELECT COALESCE(SUM(units), 0) FROM quota_usage WHERE day = ?", (day,)
+        ).fetchone()[0]
+    
+    def _prune(self, day, now):
+        # Only today's rows and the burn window are ever read, so the ledger stays about a day long
+        self._conn.execute("DELETE FROM quota_usage WHERE day != ? AND ts < ?", (day, now - BURN_WINDOW))
+        self._pruned_at = now
+    
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
@@ -0,0 +1,181 @@
+"""
+Retries and circuit breakers for YouTube Data API requests
+
+Transient failures (5xx, 429, rate-limit 403s, timeouts, dropped
+connections) are retried with capped exponential backoff and full
+jitter, so a blip costs a second rather than a blank dashboard and
+concurrent retries do not arrive in lockstep. Repeated failures of one
+endpoint open its circuit breaker: calls are refused without touching the
+network until a cooldown passes, then a single probe decides whether it
+closes again. A 403 quotaExceeded is never retried, and its cooldown runs
+to the quota reset (capped), since retrying cannot succeed before then.
+"""
+
+import random
+import threading
+import time
+
+import requests
+
+from quota import quota_day
+
+# Status codes worth retrying; 403 is only retried for rate limits
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+
+# Attempts per request, including the first
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+
+# Consecutive failures that open an endpoint's breaker
+DEFAULT_FAILURE_THRESHOLD = 3
+
+# Seconds an open breaker refuses calls before letting one probe through
+DEFAULT_RESET_TIMEOUT = 30.0
+
+# Longest an exhausted quota keeps a breaker open before probing (seconds)
+QUOTA_COOLDOWN = 900
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpenError(Exception):
+    """Raised instead of a request while an endpoint's circuit breaker is open"""
+    
+    def __init__(self, endpoint, retry_in):
+        super().__init__(f"{endpoint} requests are paused after repeated failures; retrying in {retry_in:.0f}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+def error_reason(response):
+    """The API's error reason (e.g. quotaExceeded) from an error response, or None"""
+    try:
+        return response.json()['error']['errors'][0]['reason']
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+
+def classify(response=None, error=None):
+    """Why a request failed: 'quota', 'retryable' or 'fatal', or None if it succeeded
+    
+    'fatal' failures are the caller's (bad parameters, a bad key) and do not
+    count against the breaker.
+    """
+    if error is not None:
+        return 'retryable' if isinstance(error, (requests.Timeout, requests.ConnectionError)) else 'fatal'
+    status = response.status_code
+    if status < 400:
+        return None
+    if status == 403:
+        reason = error_reason(response)
+        if reason in QUOTA_REASONS:
+            return 'quota'
+        return 'retryable' if reason in RATE_LIMIT_REASONS else 'fatal'
+    return 'retryable' if status in RETRYABLE_STATUS else 'fatal'
+
+def quota_cooldown():
+    """Seconds an exhausted quota keeps a breaker open: until the reset, at most QUOTA_COOLDOWN"""
+    return min(quota_day()[1], QUOTA_COOLDOWN)
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter"""
+    
+    def __init__(self, attempts=DEFAULT_ATTEMPTS, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 rng=None, sleep=time.sleep):
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.rng = rng or random.Random()
+        self.sleep = sleep
+    
+    def delay(self, retry, response=None):
+        """Seconds to wait before retry number retry (1-based); a Retry-After header wins, up to max_delay"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_delay)
+        return self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+class CircuitBreaker:
+    """Closed, open or half-open state of one endpoint"""
+    
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened = 0
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and self.clock() >= self._open_until:
+                return HALF_OPEN
+            return self._state
+    
+    def retry_in(self):
+        """Seconds until an open breaker lets a probe through"""
+        return max(0.0, self._open_until - self.clock())
+    
+    def allow(self):
+        """Whether a call may go out now; past the cooldown only one probe at a time is allowed"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self.clock() < self._open_until or self._probing:
+                return False
+            self._state = HALF_OPEN
+            self._probing = True
+            return True
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._probing = False
+    
+    def cancel(self):
+        """Release a probe that never reached the network"""
+        with self._lock:
+            self._probing = False
+    
+    def record_failure(self, cooldown=None):
+        """Count a failure; opens the breaker at the threshold, or at once if the probe failed"""
+        with self._lock:
+            self.failures += 1
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.opened += 1
+                self._state = OPEN
+                self._open_until = self.clock() + (cooldown if cooldown is not None else self.reset_timeout)
+            self._probing = False
+
+class CircuitBreakers:
+    """One CircuitBreaker per endpoint, created on first use; share one per process"""
+    
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    def get(self, endpoint):
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(self.failure_threshold, self.reset_timeout, self.clock)
+            return breaker
+    
+    def open_endpoints(self):
+        """{endpoint: seconds until it is probed again} for every breaker that is not closed"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.retry_in() for endpoint, breaker in breakers.items() if breaker.state != CLOSED}
@@ -21,6 +21,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/saawezali/youtube-trends-analyser",
     packages=find_packages(),
+    py_modules=["aggregates", "app", "categories", "collector", "exports", "fake_youtube", "figures", "frames", "metrics", "quota", "resilience", "singleflight", "snapshots", "thumbnails", "trends_service", "velocity", "video_details", "youtube_client", "youtube_fetcher"],
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
@@ -28,8 +29,6 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.8",
-        "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
         "Topic :: Internet :: WWW/HTTP :: Dynamic Content",
@@ -37,7 +36,7 @@ setup(
         "Topic :: Scientific/Engineering :: Visualization",
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
-    python_requires=">=3.8",
+    python_requires=">=3.10",
     install_requires=requirements,
     extras_require={
         "dev": [
@@ -47,10 +46,19 @@ setup(
             "bandit>=1.7.0",
             "safety>=1.10.0",
         ],
+        "fast": [
+            "orjson>=3.9.0",
+        ],
+        "thumbnails": [
+            "Pillow>=9.0.0",
+        ],
     },
     entry_points={
         "console_scripts": [
             "youtube-analytics=app:main",
+            "youtube-trends-collector=collector:main",
+            "youtube-fake-api=fake_youtube:main",
+            "youtube-trends-service=trends_service:main",
         ],
     },
     keywords="youtube analytics dashboard streamlit data-visualization api",
@@ -0,0 +1,64 @@
+"""
+Single-flight coalescing of identical concurrent calls
+
+When several threads ask for the same thing at once (every dashboard
+session refreshing the same chart as its cache expires), only the first
+makes the call; the rest wait for it and get the same result, or the same
+exception. Nothing is kept afterwards: a call arriving after the first
+finished starts a new one.
+"""
+
+import threading
+
+class _Call:
+    """One call in flight and its outcome"""
+    
+    __slots__ = ('done', 'result', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """At most one call per key in flight; callers arriving meanwhile share its outcome"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, func):
+        """Return (func(), whether it came from a call already in flight); re-raises the call's exception"""
+        with self._lock:
+            call = self._flights.get(key)
+            leader = call is None
+            if leader:
+                call = self._flights[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            call.done.set()
+        return call.result, False
+    
+    def stats(self):
+        """Calls made, callers that shared one, and the share of callers that did"""
+        with self._lock:
+            callers = self.calls + self.shared
+            return {'calls': self.calls, 'shared': self.shared, 'shared_ratio': self.shared / callers if callers else 0.0}
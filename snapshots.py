@@ -0,0 +1,225 @@
+"""
+Append-only columnar store for trending and search snapshots
+
+Snapshots are Parquet files in a hive-partitioned layout:
+
+    <root>/source=<trending|search>/region=<code>/date=<YYYY-MM-DD>/<file>.parquet
+
+Reads go through pyarrow.dataset, so region and date filters prune whole
+directories, other predicates are pushed down to row-group statistics and
+only the requested columns are decoded. Every fetch adds small files;
+compact() merges the files of closed partitions into one sorted file.
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+DEFAULT_SNAPSHOT_DIR = Path(__file__).resolve().parent / 'snapshots'
+
+# category_filter value for the unfiltered chart of a region
+ALL_CATEGORIES = 'all'
+
+SOURCE_TRENDING = 'trending'
+SOURCE_SEARCH = 'search'
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('source', pa.string()), ('region', pa.string()), ('date', pa.string())]),
+    flavor='hive'
+)
+
+# Columns stored in every file; source, region and date live in the directory names
+SNAPSHOT_SCHEMA = pa.schema([
+    ('snapshot_time', pa.timestamp('us', tz='UTC')),
+    ('category_filter', pa.string()),
+    ('query', pa.string()),
+    ('video_id', pa.string()),
+    ('title', pa.string()),
+    ('channel_title', pa.string()),
+    ('category_id', pa.string()),
+    ('category_name', pa.string()),
+    ('published_at', pa.timestamp('us', tz='UTC')),
+    ('views', pa.int64()),
+    ('likes', pa.int64()),
+    ('comments', pa.int64()),
+    ('duration', pa.string()),
+    ('duration_seconds', pa.int64()),
+    ('region_name', pa.string()),
+    ('thumbnail', pa.string()),
+    ('description', pa.string()),
+    ('fetch_time', pa.timestamp('us')),
+    ('engagement_rate', pa.float64()),
+    ('comment_rate', pa.float64()),
+    ('hours_since_published', pa.float64()),
+])
+
+# Row groups written by compaction; small enough for statistics to prune well
+COMPACT_ROW_GROUP_SIZE = 128 * 1024
+
+# How far back latest() looks before falling back to the full history (days)
+LATEST_LOOKBACK_DAYS = 7
+
+def _conform(table):
+    """Reorder a table to SNAPSHOT_SCHEMA, filling columns missing from older files with nulls"""
+    columns = []
+    for field in SNAPSHOT_SCHEMA:
+        if field.name in table.column_names:
+            columns.append(table.column(field.name).cast(field.type))
+        else:
+            columns.append(pa.nulls(table.num_rows, field.type))
+    return pa.Table.from_arrays(columns, schema=SNAPSHOT_SCHEMA)
+
+class SnapshotStore:
+    """Partitioned Parquet history of fetched video frames"""
+    
+    def __init__(self, root=DEFAULT_SNAPSHOT_DIR):
+        self.root = Path(root)
+    
+    def append(self, df, source=SOURCE_TRENDING, category_id=None, query=None, snapshot_time=None):
+        """Append one fetched frame as a snapshot, one file per region partition
+        
+        Returns the paths written.
+        """
+        if df.empty:
+            return []
+        snapshot_time = snapshot_time or datetime.now(timezone.utc)
+        date = snapshot_time.astimezone(timezone.utc).strftime('%Y-%m-%d')
+        
+        frame = df.copy()
+        frame['snapshot_time'] = pd.Timestamp(snapshot_time)
+        frame['category_filter'] = category_id or ALL_CATEGORIES
+        frame['query'] = query
+        for name in SNAPSHOT_SCHEMA.names:
+            if name not in frame:
+                frame[name] = None
+        
+        paths = []
+        for region_code, part in frame.groupby('region', sort=False, observed=True):
+            table = pa.Table.from_pandas(
+                part[SNAPSHOT_SCHEMA.names], schema=SNAPSHOT_SCHEMA, preserve_index=False, safe=False
+            )
+            name = f"{snapshot_time:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+            path = self._partition_dir(source, region_code, date) / name
+            self._write_atomic(table, path)
+            paths.append(path)
+        return paths
+    
+    def read(self, regions=None, start=None, end=None, columns=None, source=SOURCE_TRENDING, filter=None):
+        """Load snapshots as a DataFrame with partition pruning, pushdown and projection
+        
+        regions limits the region partitions scanned, start/end (aware
+        datetimes) bound snapshot_time and prune date partitions, columns
+        selects what is decoded (region and date are available as columns),
+        and filter is an optional extra pyarrow.dataset expression.
+        """
+        dataset = self._dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=columns or [])
+        
+        expression = ds.field('source') == source
+        regions = list(regions) if regions is not None else []
+        if regions:
+            expression &= ds.field('region').isin(regions)
+        if start is not None:
+            start = pd.Timestamp(start).tz_convert('UTC')
+            expression &= ds.field('date') >= start.strftime('%Y-%m-%d')
+            expression &= ds.field('snapshot_time') >= pa.scalar(start.to_pydatetime(), SNAPSHOT_SCHEMA.field('snapshot_time').type)
+        if end is not None:
+            end = pd.Timestamp(end).tz_convert('UTC')
+            expression &= ds.field('date') <= end.strftime('%Y-%m-%d')
+            expression &= ds.field('snapshot_time') <= pa.scalar(end.to_pydatetime(), SNAPSHOT_SCHEMA.field('snapshot_time').type)
+        if filter is not None:
+            expression &= filter
+        
+        return dataset.to_table(columns=columns, filter=expression).to_pandas()
+    
+    def latest(self, regions=None, source=SOURCE_TRENDING):
+        """Newest snapshot of every region/category_filter pair
+        
+        Returns (DataFrame, time of the newest snapshot included).
+        """
+        key_columns = ['region', 'category_filter', 'snapshot_time']
+        since = datetime.now(timezone.utc) - timedelta(days=LATEST_LOOKBACK_DAYS)
+        keys = self.read(regions, start=since, columns=key_columns, source=source)
+        if keys.empty:
+            keys = self.read(regions, columns=key_columns, source=source)
+        if keys.empty:
+            return pd.DataFrame(), None
+        
+        newest = keys.groupby(['region', 'category_filter'], as_index=False, observed=True)['snapshot_time'].max()
+        times = pa.array(newest['snapshot_time'].unique(), SNAPSHOT_SCHEMA.field('snapshot_time').type)
+        df = self.read(
+            list(newest['region'].unique()),
+            start=newest['snapshot_time'].min(),
+            source=source,
+            filter=ds.field('snapshot_time').isin(times)
+        )
+        df = df.merge(newest, on=key_columns)
+        return df.drop(columns=['date', 'source'], errors='ignore'), newest['snapshot_time'].max()
+    
+    def regions(self, source=SOURCE_TRENDING):
+        """Region codes that have at least one snapshot"""
+        source_dir = self.root / f'source={source}'
+        if not source_dir.exists():
+            return []
+        return sorted(
+            p.name.split('=', 1)[1] for p in source_dir.iterdir()
+            if p.is_dir() and p.name.startswith('region=') and any(p.glob('*/*.parquet'))
+        )
+    
+    def compact(self, include_today=False):
+        """Merge the small files of each partition into one file sorted by snapshot time
+        
+        Today's partitions are still being appended to and are skipped
+        unless include_today is set. Returns (partitions compacted, files removed).
+        """
+        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        partitions = 0
+        removed = 0
+        for directory in sorted(self.root.glob('source=*/region=*/date=*')):
+            if not include_today and directory.name == f'date={today}':
+                continue
+            files = sorted(directory.glob('*.parquet'))
+            if len(files) < 2:
+                continue
+            
+            table = pa.concat_tables([_conform(pq.ParquetFile(path).read()) for path in files])
+            table = table.sort_by([('snapshot_time', 'ascending'), ('video_id', 'ascending')])
+            self._write_atomic(table, directory / f"compacted-{uuid.uuid4().hex[:12]}.parquet", COMPACT_ROW_GROUP_SIZE)
+            for path in files:
+                path.unlink()
+            partitions += 1
+            removed += len(files)
+        return partitions, removed
+    
+    def file_count(self):
+        """Number of Parquet files currently in the store"""
+        return sum(1 for _ in self.root.glob('source=*/region=*/date=*/*.parquet'))
+    
+    def _partition_dir(self, source, region_code, date):
+        return self.root / f'source={source}' / f'region={region_code}' / f'date={date}'
+    
+    def _dataset(self):
+        if not self.root.exists():
+            return None
+        # Temporary files start with '.', which the dataset scan skips
+        return ds.dataset(
+            str(self.root),
+            format='parquet',
+            partitioning=PARTITIONING,
+            schema=pa.unify_schemas([SNAPSHOT_SCHEMA, PARTITIONING.schema])
+        )
+    
+    @staticmethod
+    def _write_atomic(table, path, row_group_size=None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f'.{path.name}.tmp')
+        pq.write_table(table, tmp_path, compression='zstd', row_group_size=row_group_size)
+        # Readers never see a half-written file
+        os.replace(tmp_path, path)
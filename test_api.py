@@ -3,6 +3,7 @@
 Simple API test script for YouTube Live Analytics Dashboard
 """
 
+import os
 import requests
 import sys
 from datetime import datetime
@@ -20,7 +21,8 @@ def test_youtube_api(api_key):
         print("Usage: python test_api.py YOUR_API_KEY")
         return False
     
-    base_url = "https://www.googleapis.com/youtube/v3"
+    # YOUTUBE_API_BASE_URL points the check at another host, e.g. fake_youtube.py
+    base_url = os.environ.get('YOUTUBE_API_BASE_URL') or "https://www.googleapis.com/youtube/v3"
     
     # Test basic connection
     print("🔍 Testing API connection...")
@@ -0,0 +1,207 @@
+"""
+On-disk cache of gallery thumbnails, served from local bytes
+
+Thumbnails are downloaded once, resized to the gallery's display width
+(when Pillow is installed) and stored content-addressed: each file is
+named by the SHA-256 of its bytes, so identical images are kept once,
+and a small SQLite index maps thumbnail URLs to them. When a frame is
+loaded the thumbnails the gallery can show are prefetched concurrently in
+the background, and once the stored bytes pass max_bytes the least
+recently used images are dropped.
+"""
+
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image
+except ImportError:
+    # Optional: without Pillow thumbnails are stored at their original size
+    Image = None
+
+# Width the gallery shows thumbnails at (pixels)
+THUMBNAIL_WIDTH = 120
+
+# Upper bound on the bytes of stored thumbnails
+DEFAULT_THUMBNAIL_BYTES = 32 * 1024 * 1024
+
+DEFAULT_THUMBNAIL_DIR = Path(__file__).resolve().parent / '.cache' / 'thumbnails'
+
+# Concurrent thumbnail downloads during a prefetch
+MAX_THUMBNAIL_WORKERS = 8
+
+# A thumbnail that failed to download is not retried for this long (seconds)
+FAILED_RETRY_AFTER = 300
+
+JPEG_QUALITY = 85
+
+def resize_thumbnail(content, width=THUMBNAIL_WIDTH):
+    """JPEG bytes of an image scaled down to width, or content unchanged without Pillow or on bad input"""
+    if Image is None:
+        return content
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            if image.width > width:
+                image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            output = io.BytesIO()
+            image.convert('RGB').save(output, format='JPEG', quality=JPEG_QUALITY, optimize=True)
+            return output.getvalue()
+    except (OSError, ValueError):
+        return content
+
+class ThumbnailCache:
+    """Content-addressed thumbnail files with an LRU size bound and background prefetch"""
+    
+    def __init__(self, session, root=DEFAULT_THUMBNAIL_DIR, max_bytes=DEFAULT_THUMBNAIL_BYTES,
+                 width=THUMBNAIL_WIDTH, max_workers=MAX_THUMBNAIL_WORKERS):
+        self.session = session
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.width = width
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbnails')
+        self._pending = set()
+        self._failed_at = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.downloads = 0
+        
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.root / 'index.sqlite'), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    url TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_last_access ON thumbnails(last_access)")
+    
+    def get(self, url):
+        """Stored bytes for a thumbnail URL, or None if it has not been downloaded"""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT digest FROM thumbnails WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE thumbnails SET last_access = ? WHERE url = ?", (time.time(), url))
+        try:
+            content = self._path(row[0]).read_bytes()
+        except OSError:
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+    
+    def fetch(self, url):
+        """Stored bytes for url, downloading and resizing it first if needed; None on failure"""
+        content = self.get(url)
+        if content is not None:
+            return content
+        with self._lock:
+            if time.monotonic() - self._failed_at.get(url, -FAILED_RETRY_AFTER) < FAILED_RETRY_AFTER:
+                return None
+        try:
+            response = self.session.get(url, timeout=10)
+            response.raise_for_status()
+        except Exception:
+            with self._lock:
+                self._failed_at[url] = time.monotonic()
+            return None
+        content = resize_thumbnail(response.content, self.width)
+        self._store(url, content)
+        with self._lock:
+            self.downloads += 1
+        return content
+    
+    def image(self, url):
+        """What the gallery passes to st.image: local bytes when stored, else the URL itself
+        
+        Never downloads in the caller's thread: a miss is queued for the
+        background (unless a prefetch already has it in flight) and the
+        browser loads the remote URL this once.
+        """
+        content = self.get(url)
+        if content is None:
+            self.prefetch([url])
+            return url
+        return content
+    
+    def prefetch(self, urls):
+        """Download the thumbnails of urls that are not stored yet, in the background; returns futures"""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        with self._lock, self._conn:
+            placeholders = ','.join('?' * len(urls))
+            known = {row[0] for row in self._conn.execute(f"SELECT url FROM thumbnails WHERE url IN ({placeholders})", urls)}
+        futures = []
+        for url in urls:
+            if url in known:
+                continue
+            with self._lock:
+                if url in self._pending:
+                    continue
+                self._pending.add(url)
+            futures.append(self._executor.submit(self._prefetch_one, url))
+        return futures
+    
+    def _prefetch_one(self, url):
+        try:
+            return self.fetch(url)
+        finally:
+            with self._lock:
+                self._pending.discard(url)
+    
+    def _path(self, digest):
+        return self.root / digest[:2] / f"{digest}.jpg"
+    
+    def _store(self, url, content):
+        """Write content under its digest (once) and point url at it"""
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_suffix(f'.{threading.get_ident()}.tmp')
+            partial.write_bytes(content)
+            partial.replace(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO thumbnails (url, digest, size, last_access) VALUES (?, ?, ?, ?)",
+                (url, digest, len(content), time.time())
+            )
+            self._evict()
+    
+    def _evict(self):
+        """Drop least recently used images until the distinct stored bytes fit max_bytes"""
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM thumbnails)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT digest, size, MAX(last_access) AS used FROM thumbnails GROUP BY digest ORDER BY used"
+        ).fetchall()
+        for digest, size, _ in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM thumbnails WHERE digest = ?", (digest,))
+            self._path(digest).unlink(missing_ok=True)
+            total -= size
+    
+    def stats(self):
+        """Images stored, their bytes, and lookups served locally vs downloaded"""
+        with self._lock:
+            images, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM (SELECT DISTINCT digest, size FROM thumbnails)"
+            ).fetchone()
+            return {
+                'images': images,
+                'bytes': stored_bytes,
+                'hits': self.hits,
+                'downloads': self.downloads,
+            }
@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+Trends service: trending, search and aggregates over HTTP, from one warm cache
+
+Runs the dashboard's fetch logic (YouTubeFetcher, on the shared response
+cache and quota ledger) behind a small HTTP API, so the dashboard and any
+other tool read the same frames instead of each calling YouTube. Each
+dataset (a chart, a search, a region's categories) is fetched once per
+TTL; concurrent requests for one that is being fetched wait for that
+fetch, and a failed refresh serves the previous frame marked stale,
+trying again after STALE_RETRY_SECONDS.
+
+    GET /v1/trending?region=US&category=10&max_results=50    (region=ALL: every region)
+    GET /v1/search?q=minecraft&region=US&max_results=25
+    GET /v1/aggregates/{summary,categories,engagement,channels,top_videos}?source=trending&region=US
+    GET /v1/categories?region=US
+    GET /v1/regions
+    GET /healthz, /metrics
+
+Every table comes as JSON ({"items": [...], ...}) or, with format=arrow or
+an Accept of application/vnd.apache.arrow.stream, as an Arrow IPC stream
+whose schema metadata (b'trends') carries the same fields. Tables are
+paginated with offset and limit (X-Total-Count and X-Next-Offset headers),
+can be cut down with columns=a,b, carry an ETag for If-None-Match, and are
+gzipped for clients that accept it.
+
+Usage: youtube-trends-service [--port 8780] [--api-key KEY] [--base-url URL]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+import pyarrow as pa
+import requests
+
+from aggregates import RANKED_COLUMNS, RANKED_ROWS, AggregateCache
+from collector import load_api_key
+from exports import arrow_table
+from frames import content_hash, with_video_urls
+from metrics import REGISTRY, SERVICE_REQUESTS
+from quota import QuotaExceededError, QuotaScheduler
+from resilience import CircuitOpenError
+from singleflight import SingleFlight
+from youtube_client import ResponseCache, create_http_session
+from youtube_fetcher import REGIONS, YouTubeAPIError, YouTubeFetcher
+
+logger = logging.getLogger('trends_service')
+
+DEFAULT_SERVICE_PORT = 8780
+
+API_PREFIX = '/v1'
+
+# Region code for every region's chart at once
+ALL_REGIONS = 'ALL'
+
+# Seconds a dataset is served before it is fetched again, as the dashboard caches them
+DATASET_TTLS = {
+    'trending': 300,
+    'search': 600,
+    'categories': 24 * 3600,
+}
+
+# After a failed refresh the stale dataset is served this long before trying again (seconds);
+# longer while the API's circuit breaker is open
+STALE_RETRY_SECONDS = 30
+
+# Datasets held at once; the least recently used go first
+MAX_DATASETS = 64
+
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10_000
+
+# Bodies smaller than this are not worth gzipping (bytes)
+MIN_GZIP_BYTES = 1024
+
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+# First path segment of every endpoint, for metric labels
+ENDPOINTS = {'trending', 'search', 'aggregates', 'categories', 'regions', 'healthz', 'metrics'}
+
+# Column added to video tables, as in exports
+URL_COLUMN = 'video_url'
+
+class ServiceError(Exception):
+    """A request the service answers with an HTTP error status"""
+    
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class Dataset:
+    """One fetched frame and what the service reports with it"""
+    
+    __slots__ = ('frame', 'errors', 'timings', 'version', 'fetched_at', 'stale_since', 'expires')
+    
+    def __init__(self, frame, errors, timings, ttl):
+        self.frame = frame
+        self.errors = errors
+        self.timings = timings
+        self.version = content_hash(frame) if not frame.empty else ''
+        self.fetched_at = time.time()
+        self.stale_since = frame.attrs.get('stale_since')
+        self.expires = time.monotonic() + ttl
+
+class TrendsService:
+    """The HTTP API's datasets, pages and encodings, independent of the HTTP server"""
+    
+    def __init__(self, fetcher, ttls=None, max_datasets=MAX_DATASETS, metrics=None):
+        self.fetcher = fetcher
+        self.ttls = dict(DATASET_TTLS, **(ttls or {}))
+        self.max_datasets = max_datasets
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.aggregates = AggregateCache()
+        self.flights = SingleFlight()
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def dataset(self, key):
+        """The Dataset for key ('trending', region, category, max_results), ('search', ...) or
+        ('categories', region): held, or fetched once however many requests ask at the same time"""
+        with self._lock:
+            held = self._datasets.get(key)
+            if held is not None:
+                self._datasets.move_to_end(key)
+        if held is not None and time.monotonic() < held.expires:
+            return held
+        dataset, _ = self.flights.do(key, lambda: self._refresh(key, held))
+        return dataset
+    
+    def _refresh(self, key, held):
+        try:
+            with self.metrics.span(f'service.fetch.{key[0]}'):
+                frame, errors, timings = self._fetch(key)
+        except (YouTubeAPIError, CircuitOpenError, QuotaExceededError, requests.exceptions.RequestException) as e:
+            if held is None:
+                raise
+            # Keep serving the last frame, marked stale, without going upstream on every request meanwhile
+            retry_in = max(STALE_RETRY_SECONDS, getattr(e, 'retry_in', 0) or 0)
+            logger.warning("Refreshing %s failed, serving the frame from %s for %.0f s: %s",
+                           key, time.ctime(held.fetched_at), retry_in, e)
+            if held.stale_since is None:
+                held.stale_since = held.fetched_at
+            held.expires = time.monotonic() + retry_in
+            return held
+        dataset = Dataset(frame, errors, timings, self.ttls[key[0]])
+        with self._lock:
+            self._datasets[key] = dataset
+            while len(self._datasets) > self.max_datasets:
+                self._datasets.popitem(last=False)
+        return dataset
+    
+    def _fetch(self, key):
+        """(frame, {region: error}, timings) for a dataset key, raising on failure"""
+        kind = key[0]
+        if kind == 'trending':
+            _, region, category_id, max_results = key
+            if region != ALL_REGIONS:
+                return self.fetcher.fetch_trending_videos(region, category_id, max_results), {}, {}
+            frame, errors, timings = self.fetcher.fetch_all_regions(category_id, max_results)
+            if frame.empty and errors:
+                raise YouTubeAPIError(f"Every region failed: {next(iter(errors.values()))}")
+            return frame, errors, timings
+        if kind == 'search':
+            _, query, region, max_results = key
+            return self.fetcher.fetch_search_videos(query, region, max_results), {}, {}
+        _, region = key
+        errors = self.fetcher.load_categories([region])
+        if errors:
+            raise YouTubeAPIError(errors[region])
+        names = self.fetcher.categories.names(region)
+        return pd.DataFrame({'category_id': list(names.keys()), 'category_name': list(names.values())}), {}, {}
+    
+    def handle(self, path, params, accept='', accept_encoding='', if_none_match=None):
+        """Answer one GET: returns (status, headers, body bytes)"""
+        endpoint = path[len(API_PREFIX):].strip('/') if path.startswith(API_PREFIX) else path.strip('/')
+        label = endpoint.split('/')[0] if endpoint.split('/')[0] in ENDPOINTS else 'other'
+        encoding = 'gzip' if 'gzip' in accept_encoding else 'identity'
+        try:
+            with self.metrics.span(f'service.{label}'):
+                status, headers, body = self._handle(endpoint, params, accept, encoding, if_none_match)
+        except ServiceError as e:
+            status, headers, body = self._error(e.status, str(e), e.retry_after)
+        except CircuitOpenError as e:
+            status, headers, body = self._error(503, str(e), e.retry_in)
+        except QuotaExceededError as e:
+            status, headers, body = self._error(429, str(e))
+        except (YouTubeAPIError, requests.exceptions.RequestException) as e:
+            status, headers, body = self._error(502, f"YouTube API request failed: {e}")
+        except Exception:
+            # A bug must still answer with a status code, not a dropped connection
+            logger.exception("Unhandled error answering /%s with %s", endpoint, params)
+            status, headers, body = self._error(500, "Internal server error")
+        self.metrics.inc(SERVICE_REQUESTS, endpoint=label, status=str(status))
+        # Caches must keep JSON and Arrow, gzipped and plain bodies of one URL apart
+        headers['Vary'] = 'Accept, Accept-Encoding'
+        if len(body) >= MIN_GZIP_BYTES and encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=5)
+            headers['Content-Encoding'] = 'gzip'
+        return status, headers, body
+    
+    def _handle(self, endpoint, params, accept, encoding, if_none_match):
+        if endpoint == 'healthz':
+            return 200, {'Content-Type': JSON_TYPE}, b'{"status":"ok"}'
+        if endpoint == 'metrics':
+            return 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}, self.metrics.prometheus_text().encode()
+        
+        if endpoint == 'regions':
+            frame = pd.DataFrame({'region': list(self.fetcher.regions.keys()), 'region_name': list(self.fetcher.regions.values())})
+            return self._table(frame, {'version': content_hash(frame)}, params, accept, encoding, if_none_match)
+        if endpoint == 'categories':
+            dataset = self.dataset(('categories', _region(params)))
+        elif endpoint in ('trending', 'search'):
+            dataset = self.dataset(_dataset_key(endpoint, params))
+        elif endpoint.startswith('aggregates/'):
+            source = params.get('source', 'trending')
+            if source not in ('trending', 'search'):
+                raise ServiceError(400, f"source must be trending or search, not {source!r}")
+            dataset = self.dataset(_dataset_key(source, params))
+            frame = self._aggregate(endpoint.split('/', 1)[1], dataset.frame, params)
+            return self._table(frame, self._meta(dataset), params, accept, encoding, if_none_match)
+        else:
+            raise ServiceError(404, f"Unknown endpoint: /{endpoint}")
+        return self._table(dataset.frame, self._meta(dataset), params, accept, encoding, if_none_match)
+    
+    @staticmethod
+    def _meta(dataset):
+        return {
+            'version': dataset.version,
+            'fetched_at': dataset.fetched_at,
+            'stale_since': dataset.stale_since,
+            'errors': dataset.errors,
+            'timings': dataset.timings,
+        }
+    
+    def _aggregate(self, name, frame, params):
+        """One of the dashboard's aggregates of frame as a table"""
+        if frame.empty:
+            return pd.DataFrame()
+        aggregates = self.aggregates.get(frame)
+        top = _int_param(params, 'top', None, 1, MAX_PAGE_SIZE)
+        if name == 'summary':
+            return pd.DataFrame([{
+                'videos': aggregates.rows,
+                'avg_views': aggregates.avg_views,
+                'avg_engagement': aggregates.avg_engagement,
+                'top_category': aggregates.top_category,
+                'high_engagement_videos': aggregates.high_engagement_count,
+            }])
+        if name == 'categories':
+            return aggregates.top_categories(top or 10).rename_axis('category_name').reset_index(name='videos')
+        if name == 'engagement':
+            return aggregates.engagement_by_category(top or 8).rename_axis('category_name').reset_index(name='avg_engagement_rate')
+        if name == 'channels':
+            return aggregates.top_channels(top or 15).reset_index()
+        if name == 'top_videos':
+            column = params.get('column', 'views')
+            if column not in RANKED_COLUMNS:
+                raise ServiceError(400, f"column must be one of {', '.join(RANKED_COLUMNS)}")
+            ascending = params.get('order', 'desc') == 'asc'
+            return aggregates.top_videos(frame, column, min(top or RANKED_ROWS, RANKED_ROWS), ascending)
+        raise ServiceError(404, f"Unknown aggregate: {name}")
+    
+    def _table(self, frame, meta, params, accept, encoding, if_none_match):
+        """One page of frame as JSON or Arrow IPC, or 304 if the client has it
+        
+        The ETag covers the negotiated format and content encoding as well as
+        the data and parameters: a body's encoding follows from those, so each
+        representation has its own tag.
+        """
+        fmt = params.get('format') or ('arrow' if ARROW_TYPE in accept else 'json')
+        if fmt not in ('json', 'arrow'):
+            raise ServiceError(400, f"format must be json or arrow, not {fmt!r}")
+        offset = _int_param(params, 'offset', 0, 0, None)
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        
+        etag = '"' + hashlib.blake2b(
+            json.dumps([meta['version'], meta.get('stale_since'), sorted(params.items()), fmt, encoding]).encode(),
+            digest_size=12
+        ).hexdigest() + '"'
+        total = len(frame)
+        next_offset = offset + limit if offset + limit < total else None
+        headers = {'ETag': etag, 'X-Total-Count': str(total)}
+        if next_offset is not None:
+            headers['X-Next-Offset'] = str(next_offset)
+        if if_none_match == etag:
+            return 304, headers, b''
+        
+        page = frame.iloc[offset:offset + limit]
+        if params.get('columns'):
+            columns = [column for column in params['columns'].split(',') if column]
+            unknown = [column for column in columns if column not in page and column != URL_COLUMN]
+            if unknown:
+                raise ServiceError(400, f"Unknown columns: {', '.join(unknown)}")
+            page = with_video_urls(page)[columns] if URL_COLUMN in columns else page[columns]
+        meta = dict(meta, total=total, offset=offset, limit=limit, next_offset=next_offset)
+        
+        if fmt == 'arrow':
+            headers['Content-Type'] = ARROW_TYPE
+            return 200, headers, arrow_stream(page, meta)
+        headers['Content-Type'] = JSON_TYPE
+        records = with_video_urls(page).to_json(orient='records', date_format='iso') if not page.empty else '[]'
+        # The records are already JSON; splice them in rather than decoding and re-encoding them
+        return 200, headers, (json.dumps(meta)[:-1] + ',"items":' + records + '}').encode()
+    
+    @staticmethod
+    def _error(status, message, retry_after=None):
+        headers = {'Content-Type': JSON_TYPE}
+        if retry_after is not None:
+            headers['Retry-After'] = str(max(1, int(retry_after)))
+        return status, headers, json.dumps({'error': {'code': status, 'message': message}}).encode()
+
+def arrow_stream(frame, meta):
+    """frame (with video URLs) as Arrow IPC stream bytes, meta in the schema metadata under b'trends'"""
+    table = arrow_table(frame)
+    table = table.replace_schema_metadata(dict(table.schema.metadata or {}, trends=json.dumps(meta)))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _region(params, default='US', allow_all=False):
+    region = params.get('region', default).upper()
+    if region not in REGIONS and not (allow_all and region == ALL_REGIONS):
+        raise ServiceError(400, f"Unknown region: {region}")
+    return region
+
+def _int_param(params, name, default, low, high):
+    if name not in params:
+        return default
+    try:
+        value = int(params[name])
+    except ValueError:
+        raise ServiceError(400, f"{name} must be an integer")
+    if value < low or (high is not None and value > high):
+        raise ServiceError(400, f"{name} must be between {low} and {high}" if high is not None else f"{name} must be at least {low}")
+    return value
+
+def _dataset_key(source, params):
+    """Dataset key of a trending or search request"""
+    if source == 'trending':
+        return ('trending', _region(params, allow_all=True), params.get('category') or None,
+                _int_param(params, 'max_results', 50, 1, 50))
+    query = params.get('q', '').strip()
+    if not query:
+        raise ServiceError(400, "search needs a query (q)")
+    return ('search', query, _region(params), _int_param(params, 'max_results', 25, 1, 50))
+
+class TrendsServer:
+    """TrendsService behind a threaded HTTP server; use as a context manager"""
+    
+    def __init__(self, service, host='127.0.0.1', port=DEFAULT_SERVICE_PORT):
+        self.service = service
+        self._httpd = ThreadingHTTPServer((host, port), _handler_for(service))
+        self._httpd.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name='trends-service')
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def serve_forever(self):
+        self._httpd.serve_forever()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def _handler_for(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        
+        def do_GET(self):
+            url = urlsplit(self.path)
+            status, headers, body = service.handle(
+                url.path, dict(parse_qsl(url.query)), self.headers.get('Accept', ''),
+                self.headers.get('Accept-Encoding', ''), self.headers.get('If-None-Match')
+            )
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            logger.debug("%s %s", self.address_string(), format % args)
+    
+    return Handler
+
+class TrendsServiceClient:
+    """Frames from a trends service, with the YouTubeFetcher methods the dashboard calls
+    
+    Pages are read as Arrow IPC and joined; if the dataset changes between
+    pages the read starts over. Failures raise YouTubeAPIError.
+    """
+    
+    def __init__(self, base_url, session=None, timeout=60, page_size=MAX_PAGE_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.session = session if session is not None else create_http_session()
+        self.timeout = timeout
+        self.page_size = page_size
+    
+    def _get(self, endpoint, params):
+        try:
+            response = self.session.get(f"{self.base_url}/{endpoint}", params=params, timeout=self.timeout,
+                                        headers={'Accept': ARROW_TYPE})
+        except requests.exceptions.RequestException as e:
+            raise YouTubeAPIError(f"Trends service unreachable: {e}")
+        if response.status_code != 200:
+            try:
+                message = response.json()['error']['message']
+            except (ValueError, KeyError, TypeError):
+                message = f"HTTP {response.status_code}"
+            raise YouTubeAPIError(f"Trends service: {message}", status_code=response.status_code)
+        table = pa.ipc.open_stream(response.content).read_all()
+        return table, json.loads(table.schema.metadata[b'trends'])
+    
+    def frame(self, endpoint, params, attempts=3):
+        """(every row of a table endpoint, the last page's metadata)"""
+        for _ in range(attempts):
+            tables = []
+            offset, version = 0, None
+            while offset is not None:
+                table, meta = self._get(endpoint, dict(params, offset=offset, limit=self.page_size))
+                if version is not None and meta['version'] != version:
+                    break
+                version = meta['version']
+                tables.append(table)
+                offset = meta['next_offset']
+            else:
+                frame = pa.concat_tables(tables).to_pandas() if tables else pd.DataFrame()
+                frame = frame.drop(columns=[URL_COLUMN], errors='ignore')
+                if meta.get('stale_since') is not None and not frame.empty:
+                    frame.attrs['stale_since'] = meta['stale_since']
+                return frame, meta
+        raise YouTubeAPIError(f"Trends service: {endpoint} kept changing while it was read")
+    
+    def health(self):
+        """(ok, message) for the service"""
+        try:
+            response = self.session.get(f"{self.base_url}/healthz", timeout=10)
+            return response.status_code == 200, f"Trends service at {self.base_url}"
+        except requests.exceptions.RequestException as e:
+            return False, f"Trends service unreachable: {e}"
+    
+    def fetch_trending_videos(self, region_code='US', category_id=None, max_results=50):
+        params = {'region': region_code, 'max_results': max_results}
+        if category_id:
+            params['category'] = category_id
+        return self.frame('trending', params)[0]
+    
+    def fetch_all_regions(self, category_id=None, max_results=50, max_workers=None, regions=None):
+        """(frame, {region: error}, timings) like YouTubeFetcher.fetch_all_regions; the service picks the regions"""
+        params = {'region': ALL_REGIONS, 'max_results': max_results}
+        if category_id:
+            params['category'] = category_id
+        frame, meta = self.frame('trending', params)
+        return frame, meta['errors'], meta['timings']
+    
+    def fetch_search_videos(self, query, region_code='US', max_results=25):
+        return self.frame('search', {'q': query, 'region': region_code, 'max_results': max_results})[0]
+    
+    def fetch_video_categories(self, region_code='US'):
+        """{category id: name} for a region"""
+        frame = self.frame('categories', {'region': region_code})[0]
+        return dict(zip(frame['category_id'], frame['category_name'])) if not frame.empty else {}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve trending, search and aggregates from one shared cache")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVICE_PORT)
+    parser.add_argument('--api-key', help="YouTube Data API key (default: YOUTUBE_API_KEY or secrets.toml)")
+    parser.add_argument('--base-url', help="API base URL (default: YOUTUBE_API_BASE_URL or Google's)")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    api_key = load_api_key(args.api_key)
+    if not api_key:
+        parser.error("no API key: pass --api-key, set YOUTUBE_API_KEY or add it to .streamlit/secrets.toml")
+    
+    # Shares the dashboard's and collector's response cache and quota ledger
+    fetcher = YouTubeFetcher(create_http_session(), ResponseCache(), QuotaScheduler(), args.base_url)
+    fetcher.set_api_key(api_key)
+    server = TrendsServer(TrendsService(fetcher), args.host, args.port)
+    logger.info("Serving trends at %s (metrics at /metrics)", server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
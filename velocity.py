@@ -0,0 +1,175 @@
+"""
+View velocity and growth metrics across stored snapshots
+
+Rates are computed per (region, video_id) from consecutive snapshots:
+views and likes gained per hour since the previous snapshot, and the
+change in views per hour per hour (acceleration). Everything runs over
+NumPy arrays sorted by video and time, with no per-video Python loop.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ['region', 'video_id']
+
+VELOCITY_COLUMNS = ['views_per_hour', 'likes_per_hour', 'view_acceleration']
+
+# Samples closer than this to the previous one (a video seen in the unfiltered
+# and a category chart of the same round) reuse the previous rates (hours)
+MIN_INTERVAL_HOURS = 5 / 60
+
+# History the dashboard tracker starts from; only the last two samples matter (hours)
+BOOTSTRAP_HOURS = 48
+
+EPOCH = pd.Timestamp(0, tz='UTC')
+
+def _hours(times):
+    """Snapshot times as float hours since the epoch"""
+    return ((pd.Series(times) - EPOCH) / pd.Timedelta(hours=1)).to_numpy(dtype='float64')
+
+def _growth(codes, hours, views, likes, seed=None, seed_rates=None):
+    """Rates for arrays sorted by (code, hours)
+    
+    seed marks rows carried over from an earlier update; they come first in
+    their group and keep their stored (views/h, likes/h, acceleration) from
+    seed_rates. Returns (views/h, likes/h, acceleration, index of the sample
+    each row's rates came from).
+    """
+    n = len(codes)
+    positions = np.arange(n)
+    first = np.ones(n, dtype=bool)
+    first[1:] = codes[1:] != codes[:-1]
+    
+    keep = first.copy()
+    keep[1:] |= np.diff(hours) >= MIN_INTERVAL_HOURS
+    kept = positions[keep]
+    kept_first = first[kept]
+    
+    dt = np.diff(hours[kept])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        view_rate = np.full(len(kept), np.nan)
+        view_rate[1:] = np.where(kept_first[1:], np.nan, np.diff(views[kept]) / dt)
+        like_rate = np.full(len(kept), np.nan)
+        like_rate[1:] = np.where(kept_first[1:], np.nan, np.diff(likes[kept]) / dt)
+        if seed is not None:
+            view_rate = np.where(seed[kept], seed_rates[0][kept], view_rate)
+            like_rate = np.where(seed[kept], seed_rates[1][kept], like_rate)
+        acceleration = np.full(len(kept), np.nan)
+        acceleration[1:] = np.where(kept_first[1:], np.nan, np.diff(view_rate) / dt)
+        if seed is not None:
+            acceleration = np.where(seed[kept], seed_rates[2][kept], acceleration)
+    
+    # Rows that were too close to their predecessor take its rates
+    source = np.cumsum(keep) - 1
+    return view_rate[source], like_rate[source], acceleration[source], kept[source]
+
+def compute_velocity(history):
+    """Add views_per_hour, likes_per_hour and view_acceleration to a snapshot history
+    
+    history needs region, video_id, snapshot_time, views and likes. The
+    result is sorted by region, video and time; a video's first snapshot
+    has no rates yet (NaN).
+    """
+    if history.empty:
+        return history.assign(**{column: pd.Series(dtype='float64') for column in VELOCITY_COLUMNS})
+    
+    codes = history.groupby(KEY_COLUMNS, sort=False, observed=True).ngroup().to_numpy()
+    hours = _hours(history['snapshot_time'])
+    order = np.lexsort((hours, codes))
+    
+    view_rate, like_rate, acceleration, _ = _growth(
+        codes[order],
+        hours[order],
+        history['views'].to_numpy(dtype='float64')[order],
+        history['likes'].to_numpy(dtype='float64')[order]
+    )
+    result = history.iloc[order].reset_index(drop=True)
+    result['views_per_hour'] = view_rate
+    result['likes_per_hour'] = like_rate
+    result['view_acceleration'] = acceleration
+    return result
+
+class VelocityTracker:
+    """Current growth rates per video, updated as new snapshots arrive
+    
+    Only the last sample of each video is kept, so an update costs the size
+    of the new snapshot plus the number of tracked videos, not the history.
+    """
+    
+    STATE_COLUMNS = KEY_COLUMNS + ['hours', 'views', 'likes', 'snapshot_time'] + VELOCITY_COLUMNS
+    
+    def __init__(self):
+        self.last_time = None
+        self._state = pd.DataFrame(columns=self.STATE_COLUMNS)
+        self._lock = threading.Lock()
+    
+    def update(self, snapshots):
+        """Fold newer snapshot rows into the state; returns their rates
+        
+        snapshots has the same columns as compute_velocity's input and may
+        hold several snapshot times. Rows not newer than last_time are ignored.
+        """
+        with self._lock:
+            if self.last_time is not None:
+                snapshots = snapshots[snapshots['snapshot_time'] > self.last_time]
+            if snapshots.empty:
+                return compute_velocity(snapshots)
+            
+            incoming = snapshots[KEY_COLUMNS + ['snapshot_time', 'views', 'likes']].reset_index(drop=True)
+            incoming['hours'] = _hours(incoming['snapshot_time'])
+            
+            # Previous samples of the videos in this update go first in their group
+            if self._state.empty:
+                matched = np.zeros(0, dtype=bool)
+                frame = incoming.assign(**{column: np.nan for column in VELOCITY_COLUMNS})
+            else:
+                state_keys = pd.MultiIndex.from_frame(self._state[KEY_COLUMNS])
+                matched = state_keys.isin(pd.MultiIndex.from_frame(incoming[KEY_COLUMNS]))
+                frame = pd.concat([self._state[matched], incoming], ignore_index=True)
+            seed = np.zeros(len(frame), dtype=bool)
+            seed[:matched.sum()] = True
+            
+            codes = frame.groupby(KEY_COLUMNS, sort=False, observed=True).ngroup().to_numpy()
+            hours = frame['hours'].to_numpy(dtype='float64')
+            order = np.lexsort((~seed, hours, codes))
+            
+            view_rate, like_rate, acceleration, source = _growth(
+                codes[order],
+                hours[order],
+                frame['views'].to_numpy(dtype='float64')[order],
+                frame['likes'].to_numpy(dtype='float64')[order],
+                seed[order],
+                [frame[column].to_numpy(dtype='float64')[order] for column in VELOCITY_COLUMNS]
+            )
+            
+            rates = frame.iloc[order].reset_index(drop=True)
+            rates['views_per_hour'] = view_rate
+            rates['likes_per_hour'] = like_rate
+            rates['view_acceleration'] = acceleration
+            
+            # The new state is each video's last sample that produced rates
+            sorted_codes = codes[order]
+            last = np.ones(len(rates), dtype=bool)
+            last[:-1] = sorted_codes[1:] != sorted_codes[:-1]
+            latest = rates[last].copy()
+            origin = frame.iloc[order].reset_index(drop=True).iloc[source[last]]
+            for column in ['hours', 'views', 'likes', 'snapshot_time']:
+                latest[column] = origin[column].to_numpy()
+            
+            latest = latest[self.STATE_COLUMNS]
+            self._state = latest.reset_index(drop=True) if self._state.empty \
+                else pd.concat([self._state[~matched], latest], ignore_index=True)
+            self.last_time = snapshots['snapshot_time'].max() if self.last_time is None \
+                else max(self.last_time, snapshots['snapshot_time'].max())
+            
+            return rates[~seed[order]].drop(columns='hours').reset_index(drop=True)
+    
+    def rates(self):
+        """Latest views_per_hour, likes_per_hour and view_acceleration per video"""
+        with self._lock:
+            return self._state[KEY_COLUMNS + VELOCITY_COLUMNS].copy()
+    
+    def __len__(self):
+        return len(self._state)
@@ -0,0 +1,85 @@
+"""
+Process-wide cache of per-video details, shared by search and trending
+
+A video's title, channel, category, publish time, duration, thumbnail and
+description barely change, so once any search or chart has fetched a
+video in full, later lookups of that ID only need its counts. Entries
+expire after a TTL and the least recently used are dropped past
+max_entries; hits and misses are counted for the sidebar.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# Kept per video; counts, rates and region are added for each fetch
+DETAIL_COLUMNS = [
+    'video_id', 'title', 'channel_title', 'category_id', 'published_at',
+    'duration', 'duration_seconds', 'thumbnail', 'description'
+]
+
+DEFAULT_MAX_ENTRIES = 20_000
+
+# Details are fetched in full again after this long, so title edits show up (seconds)
+DETAIL_TTL = 3600
+
+class VideoDetailCache:
+    """LRU + TTL map of video_id to its detail row, with hit and miss counters"""
+    
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DETAIL_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def lookup(self, video_ids):
+        """Split video_ids into (frame of cached details in the given order, missing IDs)"""
+        now = time.monotonic()
+        rows = []
+        missing = []
+        with self._lock:
+            for video_id in video_ids:
+                entry = self._rows.get(video_id)
+                if entry is not None and now - entry[1] < self.ttl:
+                    self._rows.move_to_end(video_id)
+                    rows.append(entry[0])
+                else:
+                    self._rows.pop(video_id, None)
+                    missing.append(video_id)
+            self.hits += len(rows)
+            self.misses += len(missing)
+        return pd.DataFrame(rows, columns=DETAIL_COLUMNS), missing
+    
+    def put(self, df):
+        """Store the detail columns of every row of a freshly fetched frame"""
+        if df.empty:
+            return
+        now = time.monotonic()
+        # Zipped column lists: itertuples on a column subset costs more than the rows of one chart
+        rows = zip(*(df[column].tolist() for column in DETAIL_COLUMNS))
+        with self._lock:
+            for row in rows:
+                self._rows[row[0]] = (row, now)
+                self._rows.move_to_end(row[0])
+            while len(self._rows) > self.max_entries:
+                self._rows.popitem(last=False)
+    
+    def clear(self):
+        """Forget every cached video; the counters keep running"""
+        with self._lock:
+            self._rows.clear()
+    
+    def stats(self):
+        """Entries held, lookups served from the cache and the hit ratio"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._rows),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
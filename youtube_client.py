@@ -0,0 +1,329 @@
+"""
+HTTP plumbing shared by every YouTube Data API call: the pooled session,
+the persistent response cache and the client that ties them together
+with the quota scheduler
+
+Kept free of Streamlit so it can be reused by scripts and benchmarks.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import (
+    API_CACHE, API_COALESCED, API_ERRORS, API_QUOTA_UNITS, API_REQUESTS, API_RESPONSE_BYTES, API_RETRIES, API_STALE,
+    REGISTRY
+)
+from quota import ENDPOINT_COSTS, PRIORITY_INTERACTIVE
+from resilience import CircuitBreakers, CircuitOpenError, RetryPolicy, classify, quota_cooldown
+from singleflight import SingleFlight
+
+try:
+    import orjson
+except ImportError:
+    # Optional: several times faster on large pages, json is used without it
+    orjson = None
+
+DEFAULT_BASE_URL = "https://www.googleapis.com/youtube/v3"
+
+# Connections kept open per host; must cover the concurrent region fan-out
+DEFAULT_POOL_SIZE = 16
+
+# Google APIs only compress responses for clients that advertise gzip in the User-Agent
+USER_AGENT = "youtube-trends-analyser/1.0 (gzip)"
+
+def decode_json(content):
+    """Decode a response body, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def create_http_session(pool_size=DEFAULT_POOL_SIZE):
+    """Create a pooled keep-alive session that negotiates gzip responses"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'User-Agent': USER_AGENT,
+        'Connection': 'keep-alive',
+    })
+    return session
+
+# Freshness window per API endpoint (seconds); categories almost never change
+DEFAULT_TTLS = {
+    'videos': 300,
+    'search': 600,
+    'videoCategories': 7 * 24 * 3600,  # Categories almost never change
+}
+
+# Upper bound on the compressed size of the on-disk response cache
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / '.cache' / 'youtube_responses.sqlite'
+
+class ResponseCache:
+    """SQLite-backed cache of raw API responses with ETags and LRU eviction
+    
+    Entries are keyed on the endpoint plus the normalized query params (the
+    API key is left out), and on the host for any API but Google's. Bodies
+    are stored zlib-compressed; once the total stored size passes max_bytes
+    the least recently used entries are dropped.
+    """
+    
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_BYTES, ttls=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._lock = threading.Lock()
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    stored_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+    
+    @staticmethod
+    def make_key(endpoint, params, base_url=None):
+        """Stable cache key for an endpoint and its query params, scoped to base_url when it is not Google's"""
+        normalized = sorted((str(k), str(v)) for k, v in params.items() if k != 'key' and v is not None)
+        scope = [base_url] if base_url and base_url != DEFAULT_BASE_URL else []
+        raw = json.dumps(scope + [endpoint, normalized], separators=(',', ':'))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, key):
+        """Return (body, etag, is_fresh, stored_at) for a key, or None if it is not cached"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT endpoint, body, etag, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        endpoint, body, etag, stored_at = row
+        is_fresh = now - stored_at < self.ttls.get(endpoint, 0)
+        return zlib.decompress(body), etag, is_fresh, stored_at
+    
+    def put(self, key, endpoint, content, etag=None):
+        """Store a response body and evict least recently used entries over the size bound"""
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, body, etag, stored_at, last_access, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, etag, now, now, len(body))
+            )
+            self._evict()
+    
+    def touch(self, key):
+        """Mark an entry fresh again after the server confirmed it with a 304"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET stored_at = ?, last_access = ? WHERE key = ?", (now, now, key))
+    
+    def expire_all(self):
+        """Make every entry stale so the next request revalidates it, keeping ETags"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET stored_at = 0")
+    
+    def total_bytes(self):
+        """Compressed size of everything currently stored"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+class CachedResponse:
+    """Minimal stand-in for requests.Response when the body comes from the disk cache"""
+    
+    def __init__(self, content, revalidated=False, stale_since=None):
+        self.status_code = 200
+        self.content = content
+        self.headers = {}
+        self.from_cache = True
+        self.revalidated = revalidated
+        # Set when the request failed and this is the last good body, stored at that time
+        self.stale_since = stale_since
+        self.stale = stale_since is not None
+    
+    def json(self):
+        return decode_json(self.content)
+
+class YouTubeClient:
+    """Issues YouTube Data API GET requests through the shared session, response cache and quota scheduler"""
+    
+    def __init__(self, session, base_url, cache=None, scheduler=None, metrics=None, retry=None, breakers=None,
+                 flights=None):
+        self.session = session
+        self.base_url = base_url
+        self.cache = cache
+        self.scheduler = scheduler
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.retry = retry if retry is not None else RetryPolicy()
+        # Pass one CircuitBreakers per process so every client sees the same endpoint state
+        self.breakers = breakers if breakers is not None else CircuitBreakers()
+        # Identical requests in flight at once share one call; share one SingleFlight per process too
+        self.flights = flights if flights is not None else SingleFlight()
+        self.priority = PRIORITY_INTERACTIVE
+        # Send every request, with the cached ETag, instead of serving fresh cache hits
+        self.revalidate = False
+        self._local = threading.local()
+    
+    def set_thread_priority(self, priority):
+        """Queue requests made from the calling thread at priority instead of self.priority (None: stop)"""
+        self._local.priority = priority
+    
+    def thread_priority(self):
+        """Priority requests from the calling thread are queued at"""
+        priority = getattr(self._local, 'priority', None)
+        return self.priority if priority is None else priority
+    
+    def get(self, endpoint, params, timeout=15, use_cache=True, priority=None):
+        """GET an API endpoint, serving fresh cache hits and revalidating stale ones by ETag
+        
+        Only requests that reach the network are charged to the quota
+        scheduler; fresh cache hits are free. Transient failures are
+        retried with backoff. If the request still fails, or the endpoint's
+        circuit breaker is open, the last cached body is returned with
+        stale set; with nothing cached the failed response is returned (or
+        the error raised, CircuitOpenError for an open breaker).
+        use_cache=False requests skip the cache and the breaker. With
+        revalidate set, fresh entries are revalidated like stale ones, so
+        a response is never older than the request.
+        
+        A request identical to one already in flight (same endpoint,
+        parameters and key, from any thread) waits for it and gets the same
+        response instead of sending another.
+        """
+        flight_key = (self.base_url, endpoint, tuple(sorted(params.items())), use_cache, self.revalidate)
+        response, shared = self.flights.do(flight_key, lambda: self._get(endpoint, params, timeout, use_cache, priority))
+        if shared:
+            self.metrics.inc(API_COALESCED, endpoint=endpoint)
+        return response
+    
+    def _get(self, endpoint, params, timeout, use_cache, priority):
+        url = f"{self.base_url}/{endpoint}"
+        key = entry = None
+        headers = {}
+        if self.cache is not None and use_cache:
+            key = self.cache.make_key(endpoint, params, self.base_url)
+            entry = self.cache.get(key)
+            if entry is not None:
+                body, etag, is_fresh, _ = entry
+                if is_fresh and not self.revalidate:
+                    self.metrics.inc(API_CACHE, endpoint=endpoint, result='hit')
+                    return CachedResponse(body)
+                if etag:
+                    headers['If-None-Match'] = etag
+        
+        breaker = self.breakers.get(endpoint) if use_cache else None
+        if breaker is not None and not breaker.allow():
+            return self._stale(endpoint, entry, CircuitOpenError(endpoint, breaker.retry_in()))
+        try:
+            response = self._send(endpoint, url, params, headers, timeout, priority)
+        except requests.RequestException as e:
+            if breaker is not None:
+                breaker.record_failure()
+            return self._stale(endpoint, entry, e)
+        except Exception:
+            # Refused before reaching the network (local quota budget): no verdict on the endpoint
+            if breaker is not None:
+                breaker.cancel()
+            raise
+        
+        failure = classify(response)
+        if breaker is not None:
+            if failure in ('retryable', 'quota'):
+                breaker.record_failure(quota_cooldown() if failure == 'quota' else None)
+            else:
+                breaker.record_success()
+        if failure in ('retryable', 'quota') and entry is not None:
+            return self._stale(endpoint, entry, None)
+        if key is None:
+            return response
+        
+        if response.status_code == 304 and entry is not None:
+            self.metrics.inc(API_CACHE, endpoint=endpoint, result='revalidated')
+            self.cache.touch(key)
+            return CachedResponse(entry[0], revalidated=True)
+        self.metrics.inc(API_CACHE, endpoint=endpoint, result='miss')
+        if response.status_code == 200:
+            self.cache.put(key, endpoint, response.content, response.headers.get('ETag'))
+        return response
+    
+    def _stale(self, endpoint, entry, error):
+        """The cached body of a failed request marked stale; raises error when nothing is cached"""
+        if entry is None:
+            raise error
+        self.metrics.inc(API_STALE, endpoint=endpoint)
+        return CachedResponse(entry[0], stale_since=entry[3])
+    
+    def _send(self, endpoint, url, params, headers, timeout, priority):
+        """The request, retrying transient failures with backoff; every attempt is charged"""
+        for attempt in range(1, self.retry.attempts + 1):
+            self._charge(endpoint, priority)
+            response = None
+            try:
+                response = self._request(endpoint, url, params, headers, timeout)
+            except requests.RequestException as e:
+                if attempt == self.retry.attempts or classify(error=e) != 'retryable':
+                    raise
+                reason = type(e).__name__
+            else:
+                if attempt == self.retry.attempts or classify(response) != 'retryable':
+                    return response
+                reason = str(response.status_code)
+            self.metrics.inc(API_RETRIES, endpoint=endpoint, reason=reason)
+            self.retry.sleep(self.retry.delay(attempt, response))
+    
+    def _request(self, endpoint, url, params, headers, timeout):
+        """One network request, timed and counted by endpoint and outcome"""
+        try:
+            with self.metrics.span(f'api.{endpoint}'):
+                response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            self.metrics.inc(API_ERRORS, endpoint=endpoint, error=type(e).__name__)
+            raise
+        self.metrics.inc(API_REQUESTS, endpoint=endpoint, status=str(response.status_code))
+        self.metrics.inc(API_RESPONSE_BYTES, len(response.content), endpoint=endpoint)
+        if response.status_code >= 400:
+            self.metrics.inc(API_ERRORS, endpoint=endpoint, error=str(response.status_code))
+        return response
+    
+    def _charge(self, endpoint, priority):
+        if self.scheduler is not None:
+            self.scheduler.acquire(endpoint, self.thread_priority() if priority is None else priority)
+        cost = self.scheduler.cost_of(endpoint) if self.scheduler is not None else ENDPOINT_COSTS.get(endpoint, 1)
+        self.metrics.inc(API_QUOTA_UNITS, cost, endpoint=endpoint)
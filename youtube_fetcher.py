@@ -0,0 +1,705 @@
+"""
+Streamlit-free fetching and parsing of YouTube Data API results
+
+The dashboard's LiveYouTubeAnalytics builds on YouTubeFetcher and adds
+Streamlit caching and error reporting; the headless collector uses it
+directly.
+"""
+
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import requests
+
+from categories import CategoryRegistry
+from frames import NUMERIC_DTYPES, categorical, compact_frame, concat_frames
+from metrics import REGISTRY, STAGE_SECONDS
+from quota import QuotaExceededError
+from resilience import QUOTA_REASONS, RETRYABLE_STATUS, CircuitOpenError, error_reason
+from video_details import VideoDetailCache
+from youtube_client import DEFAULT_BASE_URL, YouTubeClient, create_http_session, decode_json
+
+# Points every fetcher at another API host, e.g. the local stand-in in fake_youtube.py
+BASE_URL_ENV = 'YOUTUBE_API_BASE_URL'
+
+def default_base_url():
+    """API base URL from YOUTUBE_API_BASE_URL, else Google's"""
+    return os.environ.get(BASE_URL_ENV) or DEFAULT_BASE_URL
+
+REGIONS = {
+    'US': 'United States', 'CA': 'Canada', 'GB': 'United Kingdom',
+    'DE': 'Germany', 'FR': 'France', 'IN': 'India', 'JP': 'Japan',
+    'KR': 'South Korea', 'MX': 'Mexico', 'RU': 'Russia', 'BR': 'Brazil',
+    'AU': 'Australia', 'IT': 'Italy', 'ES': 'Spain', 'NL': 'Netherlands'
+}
+
+# Upper bound on concurrent region requests for the combined view
+MAX_REGION_WORKERS = 8
+
+# Quota cost of one videos.list page in the deep trending crawl
+CRAWL_PAGE_UNITS = 1
+
+# IDs per videos.list call when fetching by id (API limit)
+VIDEOS_BATCH_SIZE = 50
+
+# Failed chart refreshes that fall back to the held chart (403: quota exhausted)
+STALE_FALLBACK_STATUS = RETRYABLE_STATUS | {403}
+
+# Seconds a key check is remembered: a working key stays valid, a rejected one
+# may soon be fixed (API enabled, restrictions lifted). Other failures are not kept
+KEY_VALID_TTL = 3600
+KEY_REJECTED_TTL = 60
+
+COUNT_COLUMNS = ['views', 'likes', 'comments']
+
+# statistics field each count column is parsed from
+COUNT_FIELDS = {'views': 'viewCount', 'likes': 'likeCount', 'comments': 'commentCount'}
+
+# Descriptions longer than this are cut and end in '...'
+DESCRIPTION_LIMIT = 200
+
+# contentDetails.duration is ISO-8601, e.g. PT4M13S or P1DT2H; live streams are P0D
+DURATION_PATTERN = r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$'
+DURATION_UNITS = np.array([86400, 3600, 60, 1])
+DURATION_REGEX = re.compile(DURATION_PATTERN)
+
+# Shorts can run up to three minutes
+SHORTS_MAX_SECONDS = 180
+
+FORMAT_LIVE = 'Live'
+FORMAT_SHORTS = 'Shorts'
+FORMAT_LONG = 'Long-form'
+
+class YouTubeAPIError(Exception):
+    """Raised when the YouTube Data API returns a non-200 response"""
+    
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def calculate_hours_since_published(published_at_series):
+    """Calculate hours since published, handling timezone issues"""
+    try:
+        # Convert to UTC timezone-aware datetime
+        published_utc = pd.to_datetime(published_at_series, utc=True)
+        
+        # Get current time in UTC
+        now_utc = pd.Timestamp.now(tz='UTC')
+        
+        # Calculate difference in hours
+        time_diff = (now_utc - published_utc).dt.total_seconds() / 3600
+        return time_diff.fillna(0)  # Fill any NaN values with 0
+    except Exception as e:
+        # Fallback: return 0 hours if calculation fails
+        return pd.Series([0] * len(published_at_series), index=published_at_series.index)
+
+def videos_to_frame(items, region_code, region_name=None, categories=None):
+    """Turn videos.list items into the dashboard DataFrame in one columnar pass
+    
+    Each field is pulled out of the items with a single comprehension and
+    built straight into its compact dtype (frames.compact_frame): strings
+    repeated across rows as Categoricals from codes, counts parsed by one
+    Arrow cast each. Description truncation runs on a whole Arrow array and
+    the engagement columns on NumPy arrays. category_name is mapped from
+    categories ({id: name}) when given; frames spanning regions are
+    labelled afterwards with CategoryRegistry.label.
+    """
+    if not items:
+        return pd.DataFrame()
+    
+    count = len(items)
+    snippets = [item['snippet'] for item in items]
+    statistics = [item['statistics'] for item in items]
+    
+    description = pa.array([snippet['description'] for snippet in snippets], pa.string())
+    description = pc.if_else(
+        pc.greater(pc.utf8_length(description), DESCRIPTION_LIMIT),
+        pc.binary_join_element_wise(pc.utf8_slice_codeunits(description, 0, DESCRIPTION_LIMIT), '...', ''),
+        description
+    )
+    category_ids = [snippet['categoryId'] for snippet in snippets]
+    duration = categorical([item['contentDetails']['duration'] for item in items])
+    published_at = pd.to_datetime([snippet['publishedAt'] for snippet in snippets], utc=True)
+    counts = {column: parse_counts(statistics, field) for column, field in COUNT_FIELDS.items()}
+    # One category for every row: no need to factorize
+    region = np.zeros(count, dtype=np.int8)
+    
+    columns = {
+        'video_id': pd.array([item['id'] for item in items], dtype=str),
+        'title': pd.array([snippet['title'] for snippet in snippets], dtype=str),
+        'channel_title': categorical([snippet['channelTitle'] for snippet in snippets]),
+        'category_id': categorical(category_ids),
+        'published_at': published_at,
+        **{column: values.astype(NUMERIC_DTYPES[column]) for column, values in counts.items()},
+        'duration': duration,
+        'region': pd.Categorical.from_codes(region, categories=pd.Index([region_code], dtype=str)),
+        'region_name': pd.Categorical.from_codes(region, categories=pd.Index([region_name or region_code], dtype=str)),
+        'thumbnail': pd.array([snippet['thumbnails']['medium']['url'] for snippet in snippets], dtype=str),
+        'description': description.to_pandas(),
+        'duration_seconds': parse_durations(duration).to_numpy().astype(NUMERIC_DTYPES['duration_seconds']),
+    }
+    if categories is not None:
+        columns['category_name'] = categorical([categories.get(category_id, 'Unknown') for category_id in category_ids])
+    # Built in one go: adding columns one at a time costs more than the data on a 50-row chart
+    columns.update(rate_columns(counts['views'], counts['likes'], counts['comments'], published_at))
+    return pd.DataFrame(columns)
+
+def parse_counts(statistics, name):
+    """One statistics field of every item as int64; hidden counts are missing and become 0"""
+    values = pa.array([stats.get(name) for stats in statistics], pa.string())
+    return pc.fill_null(pc.cast(values, pa.int64()), 0).to_numpy()
+
+def add_rates(df):
+    """(Re)compute the columns derived from the counts and the fetch time, in place"""
+    rates = rate_columns(df['views'].to_numpy(), df['likes'].to_numpy(), df['comments'].to_numpy(), df['published_at'])
+    for column, values in rates.items():
+        df[column] = values
+    return df
+
+def rate_columns(views, likes, comments, published_at):
+    """fetch_time, engagement and comment rates and hours since published, as arrays in their compact dtypes"""
+    views = np.asarray(views, dtype='float64')
+    published_at = pd.DatetimeIndex(published_at)
+    if published_at.tz is None:
+        published_at = published_at.tz_localize('UTC')
+    hours = (pd.Timestamp.now(tz='UTC') - published_at).total_seconds().to_numpy() / 3600
+    hours[np.isnan(hours)] = 0
+    return {
+        'fetch_time': datetime.now(),
+        'engagement_rate': _percent(np.asarray(likes, dtype='float64'), views, NUMERIC_DTYPES['engagement_rate']),
+        'comment_rate': _percent(np.asarray(comments, dtype='float64'), views, NUMERIC_DTYPES['comment_rate']),
+        'hours_since_published': hours.astype(NUMERIC_DTYPES['hours_since_published']),
+    }
+
+def _percent(part, whole, dtype):
+    """part / whole * 100 as dtype; 0 / 0 (no views) is 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = part / whole * 100
+    rate[np.isnan(rate)] = 0
+    return rate.astype(dtype)
+
+def details_to_frame(details, statistics, region_code, region_name=None):
+    """Dashboard frame from cached detail rows plus fresh counts
+    
+    details has the VideoDetailCache columns; videos without counts in
+    statistics (gone from the API) are dropped.
+    """
+    counts = statistics.dropna(subset=COUNT_COLUMNS).drop_duplicates('video_id')
+    df = details.merge(counts, on='video_id', how='inner')
+    if df.empty:
+        return pd.DataFrame()
+    df = df.astype({column: 'int64' for column in COUNT_COLUMNS})
+    df['region'] = region_code
+    df['region_name'] = region_name or region_code
+    # Same column order as videos_to_frame
+    df = df[[
+        'video_id', 'title', 'channel_title', 'category_id', 'published_at', *COUNT_COLUMNS,
+        'duration', 'region', 'region_name', 'thumbnail', 'description', 'duration_seconds'
+    ]]
+    add_rates(df)
+    return compact_frame(df)
+
+def statistics_to_frame(items):
+    """video_id and counts of part=statistics videos.list items, in response order"""
+    statistics = [item.get('statistics', {}) for item in items]
+    return pd.DataFrame({
+        'video_id': pd.Series([item['id'] for item in items], dtype=str),
+        'views': parse_counts(statistics, 'viewCount'),
+        'likes': parse_counts(statistics, 'likeCount'),
+        'comments': parse_counts(statistics, 'commentCount'),
+    })
+
+def merge_statistics(df, statistics):
+    """Overwrite df's counts in place with those in a statistics frame and recompute the rates
+    
+    Rows whose video_id is not in statistics keep their previous counts.
+    """
+    if not statistics['video_id'].is_unique:
+        statistics = statistics.drop_duplicates('video_id')
+    # Counts missing from a by-id response are NaN and count as not found
+    statistics = statistics.dropna(subset=COUNT_COLUMNS)
+    position = pd.Index(statistics['video_id']).get_indexer(df['video_id'])
+    found = position >= 0
+    for column in COUNT_COLUMNS:
+        values = df[column].to_numpy(copy=True)
+        values[found] = statistics[column].to_numpy()[position[found]]
+        df[column] = values
+    return add_rates(df)
+
+def parse_durations(durations):
+    """Convert a Series of ISO-8601 durations to whole seconds
+    
+    Charts repeat the same few hundred durations, so the regex runs once per
+    distinct value and the results are spread back with the factorized codes.
+    Missing or unparsable values become 0, like live streams.
+    """
+    codes, uniques = pd.factorize(np.asarray(durations, dtype=object))
+    seconds = np.array([_duration_seconds(value) for value in uniques], dtype='int64')
+    result = np.where(codes >= 0, seconds[codes] if len(seconds) else 0, 0).astype('int64')
+    return pd.Series(result, index=getattr(durations, 'index', None), name='duration_seconds')
+
+def _duration_seconds(value):
+    match = DURATION_REGEX.match(value) if isinstance(value, str) else None
+    if match is None:
+        return 0
+    return int(sum(int(part) * unit for part, unit in zip(match.groups(), DURATION_UNITS) if part))
+
+def classify_formats(duration_seconds):
+    """Label each video Shorts, Long-form or Live from its duration in seconds"""
+    seconds = np.asarray(duration_seconds)
+    labels = np.select(
+        [seconds <= 0, seconds <= SHORTS_MAX_SECONDS],
+        [FORMAT_LIVE, FORMAT_SHORTS],
+        FORMAT_LONG
+    )
+    return pd.Series(labels, index=getattr(duration_seconds, 'index', None), name='format')
+
+class YouTubeFetcher:
+    """Fetches trending, search and category data and turns it into DataFrames
+    
+    Methods prefixed with fetch_ or _fetch_ raise YouTubeAPIError (or a
+    network/quota exception) on failure instead of reporting it, so callers
+    decide how errors are surfaced.
+    """
+    
+    def __init__(self, session=None, cache=None, scheduler=None, base_url=None, categories=None,
+                 held_frames=None, details=None, metrics=None, breakers=None, retry=None, flights=None):
+        self.api_key = None
+        self.session = session if session is not None else create_http_session()
+        self.base_url = (base_url or default_base_url()).rstrip('/')
+        # Request counters and stage timings; the process-wide registry unless given one
+        self.metrics = metrics if metrics is not None else REGISTRY
+        self.client = YouTubeClient(self.session, self.base_url, cache, scheduler, self.metrics, retry, breakers, flights)
+        self.regions = dict(REGIONS)
+        # Pass a shared registry so every fetcher in the process reuses one load
+        self.categories = categories if categories is not None else CategoryRegistry()
+        # {chart key: (frame, monotonic time of its full fetch, epoch time of its last refresh)};
+        # later fetches of the same chart only refresh counts. Pass a shared dict to share it between fetchers
+        self.held_frames = held_frames if held_frames is not None else {}
+        # Per-video details, so any search or chart only fetches videos in full once
+        self.details = details if details is not None else VideoDetailCache()
+        # Oldest stale (failed, served from cache) response decoded by this thread's current fetch
+        self._local = threading.local()
+        # {api key: (ok, message, monotonic expiry)} from test_api_connection
+        self.key_checks = {}
+    
+    def set_api_key(self, api_key):
+        """Set the YouTube Data API key"""
+        self.api_key = api_key
+    
+    def set_priority(self, priority):
+        """Queue this instance's requests as interactive or background work"""
+        self.client.priority = priority
+    
+    def set_thread_priority(self, priority):
+        """Queue requests started from the calling thread at priority, for an instance shared between sessions"""
+        self.client.set_thread_priority(priority)
+    
+    def set_revalidate(self, revalidate):
+        """Always ask the API (a cheap 304 if unchanged) instead of serving fresh cached responses"""
+        self.client.revalidate = revalidate
+    
+    def test_api_connection(self):
+        """Test if the API key is valid
+        
+        Returns (ok, message). A working or rejected key's answer is
+        remembered per key (KEY_VALID_TTL, KEY_REJECTED_TTL), so a check on
+        every rerun costs one request per key now and then.
+        """
+        if not self.api_key:
+            return False, "No API key provided"
+        
+        api_key = self.api_key
+        checked = self.key_checks.get(api_key)
+        if checked is not None and time.monotonic() < checked[2]:
+            return checked[0], checked[1]
+        ok, message, ttl = self._check_api_key(api_key)
+        if ttl:
+            self.key_checks[api_key] = (ok, message, time.monotonic() + ttl)
+        return ok, message
+    
+    def _check_api_key(self, api_key):
+        """(ok, message, seconds to remember the answer or None) from one request"""
+        try:
+            params = {
+                'part': 'snippet',
+                'chart': 'mostPopular',
+                'maxResults': 1,
+                'key': api_key
+            }
+            # Always hit the network: a cached body says nothing about this key
+            response = self.client.get('videos', params, timeout=10, use_cache=False)
+            
+            if response.status_code == 200:
+                return True, "API connection successful", KEY_VALID_TTL
+            elif response.status_code in (400, 403):
+                error_data = response.json()
+                error_message = error_data.get('error', {}).get('message', 'API key invalid or quota exceeded')
+                # An exhausted quota says nothing lasting about the key
+                ttl = None if error_reason(response) in QUOTA_REASONS else KEY_REJECTED_TTL
+                return False, f"API Error: {error_message}", ttl
+            else:
+                return False, f"HTTP Error: {response.status_code}", None
+        
+        except QuotaExceededError as e:
+            return False, f"Quota Error: {str(e)}", None
+        except requests.exceptions.RequestException as e:
+            return False, f"Connection Error: {str(e)}", None
+    
+    def fetch_video_categories(self, region_code='US'):
+        """Fetch assignable video categories for a region as {id: title}"""
+        params = {
+            'part': 'snippet',
+            'regionCode': region_code,
+            'key': self.api_key
+        }
+        response = self.client.get('videoCategories', params, timeout=10)
+        
+        if response.status_code != 200:
+            raise YouTubeAPIError(f"Could not fetch categories for {region_code}", status_code=response.status_code)
+        
+        data = self._decode(response)
+        categories = {}
+        for item in data.get('items', []):
+            if item['snippet']['assignable']:
+                categories[item['id']] = item['snippet']['title']
+        return categories
+    
+    def load_categories(self, regions=None):
+        """Load the category registry for the given (default: all) regions concurrently
+        
+        Returns {region: error message} for regions that could not be loaded.
+        """
+        if not self.api_key:
+            return {}
+        regions = list(regions if regions is not None else self.regions)
+        with self.metrics.span('categories'):
+            return self.categories.load(self.fetch_video_categories, regions)
+    
+    def get_video_categories(self, region_code='US'):
+        """Video categories for a region as {id: name}, {} if they cannot be loaded"""
+        self.load_categories([region_code])
+        return self.categories.names(region_code)
+    
+    def _label_categories(self, df):
+        """Add category names to a frame of any regions with one registry merge"""
+        if df.empty:
+            return df
+        self.load_categories(list(df['region'].unique()))
+        with self.metrics.span('category_labels'):
+            return compact_frame(self.categories.label(df))
+    
+    def _fetch_trending_page(self, region_code='US', category_id=None, max_results=50, page_token=None,
+                             part='snippet,statistics,contentDetails'):
+        """Fetch one page of the trending chart, returning (items, next_page_token)"""
+        params = {
+            'part': part,
+            'chart': 'mostPopular',
+            'regionCode': region_code,
+            'maxResults': min(max_results, 50),  # API limit
+            'key': self.api_key
+        }
+        
+        if category_id:
+            params['videoCategoryId'] = category_id
+        if page_token:
+            params['pageToken'] = page_token
+        
+        response = self.client.get('videos', params, timeout=15)
+        
+        if response.status_code != 200:
+            raise YouTubeAPIError(
+                f"API Error {response.status_code}: Could not fetch trending videos for {region_code}",
+                status_code=response.status_code
+            )
+        
+        data = self._decode(response)
+        return data.get('items', []), data.get('nextPageToken')
+    
+    def _fetch_videos_by_id(self, video_ids, part='snippet,statistics,contentDetails'):
+        """videos.list items for the given IDs, VIDEOS_BATCH_SIZE per request"""
+        items = []
+        for start in range(0, len(video_ids), VIDEOS_BATCH_SIZE):
+            params = {
+                'part': part,
+                'id': ','.join(video_ids[start:start + VIDEOS_BATCH_SIZE]),
+                'key': self.api_key
+            }
+            response = self.client.get('videos', params, timeout=15)
+            
+            if response.status_code != 200:
+                raise YouTubeAPIError(f"Videos API Error: {response.status_code}", status_code=response.status_code)
+            
+            items.extend(self._decode(response).get('items', []))
+        return items
+    
+    def _decode(self, response):
+        """Body of a successful response, timed as the decode stage"""
+        if getattr(response, 'stale', False):
+            self._note_stale(response.stale_since)
+        with self.metrics.span('decode'):
+            return decode_json(response.content)
+    
+    def _start_stale_tracking(self):
+        self._local.stale_since = None
+    
+    def _note_stale(self, since):
+        """Record that this thread's fetch used data last fetched at since (epoch seconds)"""
+        current = getattr(self._local, 'stale_since', None)
+        self._local.stale_since = since if current is None else min(current, since)
+    
+    def _mark_stale(self, df):
+        """df with attrs['stale_since'] set (epoch seconds) if this thread's fetch used stale responses"""
+        since = getattr(self._local, 'stale_since', None)
+        if since is not None and not df.empty:
+            df.attrs['stale_since'] = since
+        return df
+    
+    def _held_frame(self, key):
+        """Frame held for key, or None if there is none or its snippets are too old"""
+        held = self.held_frames.get(key)
+        if held is None or held[0].empty or time.monotonic() - held[1] > self.details.ttl:
+            return None
+        return held[0]
+    
+    def _fetch_details(self, video_ids, region_code, statistics=None):
+        """Frame for video_ids in that order, fetching only the IDs the detail cache lacks
+        
+        Cached videos take their counts from statistics when given, else
+        from a part=statistics lookup; the rest are fetched in full, 50 IDs
+        per request, and added to the cache.
+        """
+        region_name = self.regions.get(region_code, region_code)
+        details, missing = self.details.lookup(video_ids)
+        frames = []
+        if not details.empty:
+            if statistics is None:
+                items = self._fetch_videos_by_id(details['video_id'].tolist(), part='statistics')
+                with self.metrics.span('transform'):
+                    statistics = statistics_to_frame(items)
+            with self.metrics.span('transform'):
+                frames.append(details_to_frame(details, statistics, region_code, region_name))
+        if missing:
+            items = self._fetch_videos_by_id(missing)
+            with self.metrics.span('transform'):
+                new = videos_to_frame(items, region_code, region_name)
+            self.details.put(new)
+            frames.append(new)
+        return self._in_order([frame for frame in frames if not frame.empty], video_ids)
+    
+    @staticmethod
+    def _in_order(frames, video_ids):
+        """Concatenate frames and sort their rows into the order of video_ids"""
+        df = concat_frames(frames)
+        if df.empty:
+            return df
+        position = pd.Index(video_ids).get_indexer(df['video_id'])
+        if (np.diff(position) < 0).any():
+            df = df.iloc[np.argsort(position, kind='stable')].reset_index(drop=True)
+        return df
+    
+    def _merge_held(self, held, statistics, region_code):
+        """Current frame from held details plus fresh counts, in statistics' order
+        
+        Held rows get the new counts merged in; IDs that are not held come
+        from the detail cache or, failing that, a full fetch. IDs the API
+        no longer returns are dropped.
+        """
+        held_ids = pd.Index(held['video_id'])
+        wanted_ids = pd.Index(statistics['video_id'])
+        known = wanted_ids.get_indexer(held_ids) >= 0
+        frames = [merge_statistics(held[known].reset_index(drop=True), statistics)]
+        new_ids = wanted_ids[held_ids.get_indexer(wanted_ids) < 0].tolist()
+        if new_ids:
+            frames.append(self._fetch_details(new_ids, region_code, statistics))
+        return self._in_order([frame for frame in frames if not frame.empty], wanted_ids)
+    
+    def _fetch_chart_frame(self, region_code='US', category_id=None, max_results=50):
+        """One region's trending chart, without category names
+        
+        The first fetch takes every part; later ones ask the chart for
+        part=statistics only and fetch full details just for videos that
+        joined it.
+        """
+        key = ('chart', region_code, category_id, max_results)
+        held = self._held_frame(key)
+        if held is None:
+            items, _ = self._fetch_trending_page(region_code, category_id, max_results)
+            with self.metrics.span('transform'):
+                df = videos_to_frame(items, region_code, self.regions.get(region_code, region_code))
+            self.details.put(df)
+            self.held_frames[key] = (df, time.monotonic(), time.time())
+            return df.copy()
+        
+        try:
+            items, _ = self._fetch_trending_page(region_code, category_id, max_results, part='statistics')
+        except (YouTubeAPIError, CircuitOpenError, requests.exceptions.RequestException) as e:
+            if isinstance(e, YouTubeAPIError) and e.status_code not in STALE_FALLBACK_STATUS:
+                raise
+            # The API is failing and no refresh is cached to fall back on: the held chart is the last good one
+            self._note_stale(self.held_frames[key][2])
+            return held.copy()
+        with self.metrics.span('transform'):
+            statistics = statistics_to_frame(items)
+        df = self._merge_held(held, statistics, region_code) if items else pd.DataFrame()
+        self.held_frames[key] = (df, self.held_frames[key][1], time.time())
+        return df.copy()
+    
+    def _build_video_frame(self, items, region_code):
+        """Turn a list of videos.list items into the dashboard DataFrame"""
+        with self.metrics.span('transform'):
+            df = videos_to_frame(items, region_code, self.regions.get(region_code, region_code))
+        self.details.put(df)
+        return self._label_categories(df)
+    
+    def fetch_trending_videos(self, region_code='US', category_id=None, max_results=50):
+        """Fetch and parse trending videos for one region, raising on failure
+        
+        If the API failed and cached responses were used instead, the
+        frame's attrs['stale_since'] holds when the oldest was stored.
+        """
+        self._start_stale_tracking()
+        with self.metrics.span('trending'):
+            return self._mark_stale(self._label_categories(self._fetch_chart_frame(region_code, category_id, max_results)))
+    
+    def iter_trending_pages(self, region_code='US', category_ids=None, max_rows=None, max_units=None):
+        """Crawl the trending chart page by page, yielding one DataFrame per page
+        
+        Follows nextPageToken past the 50-result cap. Passing category_ids
+        crawls each videoCategoryId chart in turn so the crawl covers the
+        whole chart rather than just its head; categories without a chart
+        are skipped. Each page is transformed as it arrives, and the crawl
+        stops after max_rows rows or max_units quota units (one per page).
+        Videos already yielded are dropped from later pages.
+        """
+        seen_ids = set()
+        rows = 0
+        units = 0
+        
+        for category_id in (category_ids or [None]):
+            page_token = None
+            while True:
+                if max_units is not None and units >= max_units:
+                    return
+                if max_rows is not None and rows >= max_rows:
+                    return
+                
+                try:
+                    items, page_token = self._fetch_trending_page(region_code, category_id, 50, page_token)
+                except YouTubeAPIError as e:
+                    # Not every category has a chart in every region
+                    if category_id and e.status_code in (400, 404):
+                        break
+                    raise
+                units += CRAWL_PAGE_UNITS
+                
+                items = [item for item in items if item['id'] not in seen_ids]
+                if max_rows is not None:
+                    items = items[:max_rows - rows]
+                seen_ids.update(item['id'] for item in items)
+                
+                if items:
+                    rows += len(items)
+                    yield self._build_video_frame(items, region_code)
+                
+                if not page_token:
+                    break
+    
+    def fetch_all_regions(self, category_id=None, max_results=50, max_workers=MAX_REGION_WORKERS, regions=None):
+        """Fetch trending videos for every region concurrently and merge them
+        
+        Returns a tuple of (combined DataFrame, {region: error message},
+        timing breakdown). A failing region is reported in the errors dict
+        and does not drop the regions that succeeded. Regions answered from
+        stale cached responses are listed in timings['stale_regions'] and
+        mark the frame like fetch_trending_videos.
+        """
+        region_codes = list(regions if regions is not None else self.regions)
+        workers = max(1, min(max_workers, len(region_codes)))
+        self.load_categories(region_codes)
+        
+        # Workers queue their requests like the calling thread
+        priority = self.client.thread_priority()
+        
+        def fetch_region(region_code):
+            start = time.perf_counter()
+            self.client.set_thread_priority(priority)
+            self._start_stale_tracking()
+            try:
+                df = self._fetch_chart_frame(region_code, category_id, max_results)
+                return region_code, self._mark_stale(df), None, time.perf_counter() - start
+            except Exception as e:
+                return region_code, None, str(e), time.perf_counter() - start
+        
+        frames = []
+        errors = {}
+        stale_regions = {}
+        region_seconds = {}
+        
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch_region, code) for code in region_codes]
+            for future in as_completed(futures):
+                region_code, df, error, elapsed = future.result()
+                region_seconds[region_code] = elapsed
+                if error:
+                    errors[region_code] = error
+                elif not df.empty:
+                    frames.append(df)
+                    if 'stale_since' in df.attrs:
+                        stale_regions[region_code] = df.attrs['stale_since']
+        wall_seconds = time.perf_counter() - wall_start
+        self.metrics.observe(STAGE_SECONDS, wall_seconds, stage='trending.all_regions')
+        
+        # The serial loop would have paid every region's latency back to back
+        serial_seconds = sum(region_seconds.values())
+        timings = {
+            'regions': dict(sorted(region_seconds.items(), key=lambda kv: kv[1], reverse=True)),
+            'wall_seconds': wall_seconds,
+            'serial_seconds': serial_seconds,
+            'speedup': serial_seconds / wall_seconds if wall_seconds > 0 else 1.0,
+            'workers': workers,
+            'stale_regions': stale_regions,
+        }
+        
+        # One category merge for every region; it also restores the categoricals the concat dropped
+        combined = self._label_categories(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+        combined.attrs = {'stale_since': min(stale_regions.values())} if stale_regions else {}
+        return combined, errors, timings
+    
+    def fetch_search_videos(self, query, region_code='US', max_results=25):
+        """Search for videos by query and parse the results, raising on failure; stale like fetch_trending_videos"""
+        self._start_stale_tracking()
+        with self.metrics.span('search'):
+            # First, search for video IDs
+            search_params = {
+                'part': 'snippet',
+                'q': query,
+                'type': 'video',
+                'regionCode': region_code,
+                'maxResults': max_results,
+                'order': 'relevance',
+                'key': self.api_key
+            }
+            
+            search_response = self.client.get('search', search_params, timeout=15)
+            
+            if search_response.status_code != 200:
+                raise YouTubeAPIError(f"Search API Error: {search_response.status_code}", status_code=search_response.status_code)
+            
+            search_data = self._decode(search_response)
+            video_ids = [item['id']['videoId'] for item in search_data.get('items', [])]
+            
+            if not video_ids:
+                return pd.DataFrame()
+            
+            # Then get detailed video information; videos any earlier search or chart fetched only need their counts
+            return self._mark_stale(self._label_categories(self._fetch_details(video_ids, region_code)))